@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Incremental polling of the WeOS alarm table."""
+import logging
+import re
+from collections import deque
+from hashlib import sha256
+from threading import Lock
+from time import time
+from typing import Iterator
+
+from connection_pool import pool_key
+
+logger = logging.getLogger(__name__)
+
+ALARM_ROW = re.compile(r"^\s*(\d+)\s+(\S+)\s+(YES|NO)\s+(YES|NO)\s*(.*?)\s*$")
+
+
+class AlarmCursor:
+    """Watermark of the alarm table last seen on one device."""
+
+    def __init__(self, history: int) -> None:
+        """Initialize the class.
+
+        Args:
+            history (int): Number of entries kept in the history
+        """
+        self.digest: str | None = None
+        self.rows: dict[int, str] = {}
+        self.history: deque = deque(maxlen=history)
+
+
+class AlarmMonitor:
+    """Remember the alarm table per device and report only the entries that changed."""
+
+    def __init__(self, history: int | None = None) -> None:
+        """Initialize the class.
+
+        Args:
+            history (int): Entries kept per device, defaults to Config.ALARM_HISTORY
+        """
+        from config import Config
+
+        self.history_size = history if history is not None else Config.ALARM_HISTORY
+        self._lock = Lock()
+        self._cursors: dict[tuple, AlarmCursor] = {}
+
+    def feed(self, device: dict, output: str) -> Iterator[dict]:
+        """Advance the device watermark with a new `show alarm` output.
+
+        Output identical to the previous poll is not parsed again, otherwise
+        only rows that are new or changed since the previous poll are parsed.
+
+        Args:
+            device (dict): Scrapli connection parameters of the device
+            output (str): Output of `show alarm`
+
+        Returns:
+            Iterator[dict]: New entries with id, trigger, enabled, active, reason and seen
+        """
+        digest = sha256(output.encode()).hexdigest()
+        with self._lock:
+            cursor = self._cursors.setdefault(pool_key(device), AlarmCursor(self.history_size))
+            if digest == cursor.digest:
+                return iter(())
+
+            rows = {}
+            entries = []
+            seen = time()
+            for line in output.splitlines():
+                match = ALARM_ROW.match(line)
+                if not match:
+                    continue
+                alarm_id = int(match.group(1))
+                rows[alarm_id] = line
+                if cursor.rows.get(alarm_id) != line:
+                    trigger, enabled, active, reason = match.group(2, 3, 4, 5)
+                    entries.append(
+                        {
+                            "id": alarm_id,
+                            "trigger": trigger,
+                            "enabled": enabled == "YES",
+                            "active": active == "YES",
+                            "reason": reason,
+                            "seen": seen,
+                        }
+                    )
+
+            cursor.digest = digest
+            cursor.rows = rows
+            cursor.history.extend(entries)
+
+        logger.debug("%d new alarm entries for %s", len(entries), device.get("host"))
+        return iter(entries)
+
+    def history(self, device: dict) -> list[dict]:
+        """Return the entries seen on a device, oldest first."""
+        with self._lock:
+            cursor = self._cursors.get(pool_key(device))
+            return list(cursor.history) if cursor else []
+
+    def reset(self, device: dict | None = None) -> None:
+        """Forget the watermark of one device, or of all devices."""
+        with self._lock:
+            if device is None:
+                self._cursors.clear()
+            else:
+                self._cursors.pop(pool_key(device), None)
+
+
+# Shared monitor used by Westermo.poll_alarms
+monitor = AlarmMonitor()
@@ -0,0 +1,8 @@
+"""Benchmarks for the configurator, run them all with `python -m benchmarks.run`."""
+from timeit import Timer
+from typing import Callable
+
+
+def best_time(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Return the best time per call in seconds over `repeat` runs of `number` calls."""
+    return min(Timer(func).repeat(repeat=repeat, number=number)) / number
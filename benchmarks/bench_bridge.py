@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Time the telnet to serial bridge.
+
+The forwarding cases time cleanup_for_serial on telnet input and
+ProtocolInteractions forwarding between a socket and a pty standing in
+for the serial port. Results are seconds per MiB.
+
+The handler cases run the whole Handler loop in a thread. They report
+the round trip of one byte each way, seconds per MiB from serial to
+telnet, seconds per MiB for a config block pasted into telnet and the
+time from a new telnet connection to its first byte on the serial port.
+The CPU share used while idle is printed but not kept, it is too close to
+zero to compare against a baseline. PollingHandler, a copy of the loop
+the event driven one replaced, is timed the same way for comparison.
+Its numbers are printed only, the round trip depends on where its 0.1 s
+select timeout falls and would fail the baseline check at random.
+"""
+import logging
+import os
+import socket
+import sys
+from pathlib import Path
+from select import select
+from threading import Event, Thread
+from time import perf_counter, process_time, sleep
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from serial import Serial  # type: ignore  # noqa: E402
+
+import telnet2serlib  # noqa: E402
+from benchmarks import best_time  # noqa: E402
+from telnet2serlib import Handler, ProtocolInteractions, cleanup_for_serial  # noqa: E402
+
+MIB = 1024 * 1024
+CHUNK = 1024
+# Typed command lines as a telnet client sends them, with CR LF
+TELNET_INPUT = (b"show running-config\r\n" * (CHUNK // 21 + 1))[:CHUNK]
+# Switch output without CR LF, which cleanup_for_serial would shorten
+SERIAL_OUTPUT = (b"Eth 10    UP 10/100TX      100M-Full  Forwarding   N/A     1  00:11:b4:5e:e0:8a\n" * 16)[:CHUNK]
+
+
+def _read_exactly(read, size: int) -> bytes:
+    """Call read until size bytes arrived."""
+    data = b""
+    while len(data) < size:
+        data += read(size - len(data))
+    return data
+
+
+def forward(total: int = MIB) -> dict[str, float]:
+    """Forward `total` bytes each way through ProtocolInteractions and return seconds per MiB."""
+    master, slave = os.openpty()
+    com = Serial(os.ttyname(slave), timeout=1)
+    client, bridge = socket.socketpair()
+    try:
+        conn = ProtocolInteractions(bridge, com)
+        chunks = total // CHUNK
+
+        start = perf_counter()
+        for _ in range(chunks):
+            client.sendall(SERIAL_OUTPUT)
+            received = 0
+            while received < CHUNK:
+                data = conn.recv_tcp()
+                conn.send_serial(data)
+                received += len(data)
+            _read_exactly(lambda size: os.read(master, size), CHUNK)
+        tcp_to_serial = perf_counter() - start
+
+        start = perf_counter()
+        for _ in range(chunks):
+            os.write(master, SERIAL_OUTPUT)
+            received = 0
+            while received < CHUNK:
+                data = conn.recv_serial()
+                if data:
+                    conn.send_tcp(data)
+                    received += len(data)
+            _read_exactly(client.recv, CHUNK)
+        serial_to_tcp = perf_counter() - start
+    finally:
+        client.close()
+        bridge.close()
+        com.close()
+        os.close(master)
+        os.close(slave)
+    return {"forward.tcp_to_serial": tcp_to_serial * MIB / total, "forward.serial_to_tcp": serial_to_tcp * MIB / total}
+
+
+class PollingHandler(Handler):
+    """The bridge loop before it waited on the serial port, for comparison."""
+
+    def run(self, timeout: float | None = None) -> None:
+        """Poll the serial port, then wait up to 0.1 s on the sockets only."""
+        for tcp_conn in self.clist[:]:
+            if tcp_conn.com.isOpen():
+                data = self.com.read(self.com.inWaiting())
+                if data:
+                    tcp_conn.send_tcp(data)
+
+        ready = self.clist[:]
+        if self.listener:
+            ready.append(self.listener)
+        for tcp_conn in select(ready, [], [], 0.1)[0]:
+            if tcp_conn is self.listener:
+                self.accept()
+            else:
+                self.from_tcp(tcp_conn)
+
+
+def _free_port() -> int:
+    """Return a TCP port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def handler_loop(handler_class: type, rounds: int = 20, total: int = 16 * 1024) -> dict[str, float]:
+    """Run a bridge over a pty and time round trips, serial to telnet throughput and idle CPU."""
+    master, slave = os.openpty()
+    port = _free_port()
+    handler = handler_class(tel_port=port, ser_port=os.ttyname(slave), baud=115200, timeout=1)
+
+    stop = Event()
+
+    def loop() -> None:
+        while not stop.is_set():
+            handler.run(0.05)
+
+    thread = Thread(target=loop, daemon=True)
+    thread.start()
+    client = socket.create_connection(("127.0.0.1", port), timeout=5)
+    master_read = lambda size: os.read(master, size)  # noqa: E731
+    try:
+        # The serial input buffer is reset on accept, wait until that happened
+        client.sendall(b"\r")
+        _read_exactly(master_read, 1)
+
+        start = perf_counter()
+        for _ in range(rounds):
+            client.sendall(b"x")
+            _read_exactly(master_read, 1)
+            os.write(master, b"y")
+            _read_exactly(client.recv, 1)
+        round_trip = (perf_counter() - start) / rounds
+
+        start = perf_counter()
+        for _ in range(total // CHUNK):
+            os.write(master, SERIAL_OUTPUT)
+            _read_exactly(client.recv, CHUNK)
+        serial_to_tcp = (perf_counter() - start) * MIB / total
+
+        paste = TELNET_INPUT * (total // CHUNK)
+        pasted = len(paste.replace(b"\r\n", b"\r"))
+        start = perf_counter()
+        client.sendall(paste)
+        _read_exactly(master_read, pasted)
+        tcp_to_serial = (perf_counter() - start) * MIB / total
+
+        start = perf_counter()
+        for _ in range(rounds):
+            client.close()
+            client = socket.create_connection(("127.0.0.1", port), timeout=5)
+            client.sendall(b"x")
+            _read_exactly(master_read, 1)
+        reconnect = (perf_counter() - start) / rounds
+
+        start = process_time()
+        sleep(0.5)
+        idle_cpu = (process_time() - start) / 0.5
+    finally:
+        stop.set()
+        thread.join(timeout=5)
+        client.close()
+        handler.close()
+        os.close(master)
+        os.close(slave)
+    return {
+        "round_trip": round_trip,
+        "serial_to_tcp": serial_to_tcp,
+        "tcp_to_serial": tcp_to_serial,
+        "reconnect": reconnect,
+        "idle_cpu": idle_cpu,
+    }
+
+
+def benchmarks(number: int = 1000) -> dict[str, float]:
+    """Return seconds per MiB through cleanup_for_serial and the pty forwarders, and the handler loop timings."""
+    telnet2serlib.logger.setLevel(logging.ERROR)
+    results = {"cleanup_for_serial": best_time(lambda: cleanup_for_serial(TELNET_INPUT), number) * MIB / CHUNK}
+    results.update(min((forward() for _ in range(3)), key=lambda times: sum(times.values())))
+    timings = handler_loop(Handler)
+    print(f"  event handler idle CPU {timings.pop('idle_cpu'):.2%}")
+    results.update((f"event.{case}", seconds) for case, seconds in timings.items())
+
+    reference = handler_loop(PollingHandler)
+    print(f"  polling handler idle CPU {reference.pop('idle_cpu'):.2%}, for comparison only:")
+    for case, seconds in reference.items():
+        print(f"    polling.{case:<14} {seconds * 1e3:>10.3f}ms  (event {timings[case] * 1e3:.3f}ms)")
+    return results
+
+
+def main() -> dict[str, float]:
+    """Run the benchmarks and print MiB/s per path and milliseconds per round trip."""
+    results = benchmarks()
+    print(f"{'path':<24} {'MiB/s':>10}")
+    for name, seconds in results.items():
+        if name.endswith((".round_trip", ".reconnect")):
+            print(f"{name:<24} {seconds * 1e3:>8.2f}ms")
+        else:
+            print(f"{name:<24} {1 / seconds:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
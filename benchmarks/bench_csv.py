@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Time ConfigFile.read_config and write_config on a large cabinet inventory."""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import best_time  # noqa: E402
+from csv_lib import ConfigFile  # noqa: E402
+
+HEADER = "Cabinet,AP,SW,IOG,MBB,DIPB,MBR,DIPR,IBC IP address,Switch IP address,Position,MAC M,MAC R\n"
+
+
+def write_inventory(path: Path, rows: int) -> None:
+    """Write an inventory of `rows` cabinets, every third one already configured."""
+    with open(path, "w", newline="") as f:
+        f.write(HEADER)
+        for i in range(rows):
+            mac = f"00:11:b4:{i >> 16 & 0xFF:02x}:{i >> 8 & 0xFF:02x}:{i & 0xFF:02x}" if i % 3 == 0 else ""
+            f.write(
+                f"CAB{i:05},1,1,0,1,1,1,0,10.{i >> 16 & 0xFF}.{i >> 8 & 0xFF}.{i & 0xFF},"
+                f'10.128.{i >> 8 & 0xFF}.{i & 0xFF},"Building {i // 100} Room {i % 100}",{mac},\n'
+            )
+
+
+def benchmarks(rows: int = 10000, number: int = 3) -> dict[str, float]:
+    """Return the seconds per read_config, write_config and 100 MAC write_macs call."""
+    directory = Path(tempfile.mkdtemp())
+    try:
+        inventory = directory / "inventory.csv"
+        write_inventory(inventory, rows)
+        config_file = ConfigFile()
+        last = f"CAB{rows - 1:05}"
+        macs = {f"CAB{i:05}": "00:11:b4:00:00:01" for i in range(0, rows, rows // 100)}
+        return {
+            f"read_config.{rows}": best_time(lambda: config_file.read_config(str(inventory)), number),
+            f"write_config.{rows}": best_time(
+                lambda: config_file.write_config(str(inventory), last, "00:11:b4:ff:ff:ff", True), number
+            ),
+            f"write_macs.{rows}": best_time(lambda: config_file.write_macs(str(inventory), macs, False), number),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+
+def main(rows: int = 10000) -> dict[str, float]:
+    """Run the benchmarks and print one line per call."""
+    results = benchmarks(rows)
+    print(f"{'call':<20} {'ms':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds * 1e3:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
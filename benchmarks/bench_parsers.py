@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Compare the native parsers with the TTP templates on return_examples/."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import weos_parsers  # noqa: E402
+from benchmarks import best_time  # noqa: E402
+from ttp_registry import parse_output  # noqa: E402
+from westermo_ser_lib import (  # noqa: E402
+    TEMPLATE_ALARM,
+    TEMPLATE_IFACES,
+    TEMPLATE_PORTS,
+    TEMPLATE_SYSINFO,
+    _process_ifaces,
+    _process_ports,
+    _process_sysinfo,
+)
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "return_examples"
+
+CASES = [
+    (
+        "show port",
+        "show_port.txt",
+        weos_parsers.parse_ports,
+        lambda out: _process_ports(parse_output(TEMPLATE_PORTS, out)),
+    ),
+    (
+        "show ifaces",
+        "show_ifaces.txt",
+        weos_parsers.parse_ifaces,
+        lambda out: _process_ifaces(parse_output(TEMPLATE_IFACES, out)),
+    ),
+    (
+        "system-information",
+        "system-information.txt",
+        weos_parsers.parse_sysinfo,
+        lambda out: _process_sysinfo(parse_output(TEMPLATE_SYSINFO, out)),
+    ),
+]
+
+# TTP template for every file in return_examples/
+TTP_CASES = [
+    ("show_alarm.txt", TEMPLATE_ALARM),
+    ("show_ifaces.txt", TEMPLATE_IFACES),
+    ("show_port.txt", TEMPLATE_PORTS),
+    ("system-information.txt", TEMPLATE_SYSINFO),
+]
+
+
+def benchmarks(number: int = 200) -> dict[str, float]:
+    """Return the seconds per parse of every example, natively and with TTP."""
+    results = {}
+    for example, template in TTP_CASES:
+        output = (EXAMPLES / example).read_text()
+        parse_output(template, output)  # compile the template outside the timing
+        results[f"ttp.{example}"] = best_time(
+            lambda template=template, output=output: parse_output(template, output), number
+        )
+    for _, example, native, _ in CASES:
+        output = (EXAMPLES / example).read_text()
+        results[f"native.{example}"] = best_time(lambda native=native, output=output: native(output), number)
+    return results
+
+
+def main(number: int = 200) -> list[dict]:
+    """Run the comparison and print one line per command."""
+    results = []
+    print(f"{'command':<20} {'native us':>10} {'ttp us':>10} {'speedup':>8}")
+    for name, example, native, ttp in CASES:
+        output = (EXAMPLES / example).read_text()
+        ttp(output)  # compile the template outside the timing
+        native_time = best_time(lambda native=native, output=output: native(output), number)
+        ttp_time = best_time(lambda ttp=ttp, output=output: ttp(output), number)
+        results.append({"command": name, "native": native_time, "ttp": ttp_time})
+        print(f"{name:<20} {native_time * 1e6:>10.1f} {ttp_time * 1e6:>10.1f} {ttp_time / native_time:>7.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Time the GUI refresh cycle against a simulated switch.
+
+refresh_cycle does what MainPage.refresh does without the widgets: one
+snapshot, then the port, alarm and FRNT values the page shows.
+"""
+import logging
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from weos_simulator import Simulator  # noqa: E402
+from westermo_ser_lib import Westermo  # noqa: E402
+
+
+def refresh_cycle(switch: Westermo) -> dict:
+    """Read the values MainPage.refresh puts on screen."""
+    snapshot = switch.get_snapshot()
+    return {
+        "name": snapshot.sysinfo["system_name"],
+        "location": snapshot.sysinfo.get("system_location", ""),
+        "mac": snapshot.sysinfo["system_mac"],
+        "uptime": snapshot.uptime,
+        "mgmt_ip": snapshot.mgmt_ip,
+        "alarms": [port["alarm"] for port in snapshot.ports],
+        "links": [bool(port["link"]) for port in snapshot.ports],
+        "frnt": snapshot.frnt[1]["mode"] if snapshot.frnt else None,
+        "saved": snapshot.config_saved,
+    }
+
+
+def _best(func, number: int) -> float:
+    """Return the best wall time of `number` calls."""
+    best = float("inf")
+    for _ in range(number):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def benchmarks(number: int = 20, baud: int = 0) -> dict[str, float]:
+    """Return the seconds per refresh in an open session and including the login."""
+    logging.getLogger("westermo_ser_lib").setLevel(logging.WARNING)
+    simulator = Simulator(count=1, base_port=0, delay=0.0, baud=baud).start_in_thread()
+    try:
+        host, port = simulator.endpoints[0]
+        device = {
+            "host": host,
+            "port": port,
+            "auth_username": simulator.credentials[0],
+            "auth_password": simulator.credentials[1],
+            "platform": "westermo_weos",
+            "transport": "telnet",
+            "timeout_ops": 10,
+        }
+
+        def connect_and_refresh() -> None:
+            with Westermo(**device) as switch:
+                refresh_cycle(switch)
+
+        with Westermo(**device) as switch:
+            refresh = _best(lambda: refresh_cycle(switch), number)
+        return {"refresh": refresh, "connect_refresh": _best(connect_and_refresh, number)}
+    finally:
+        simulator.stop_thread()
+
+
+def main(baud: int = 0) -> dict[str, float]:
+    """Run the benchmarks and print the best time per cycle."""
+    results = benchmarks(baud=baud)
+    print(f"{'cycle':<20} {'best ms':>10}")
+    for name, seconds in results.items():
+        print(f"{name:<20} {seconds * 1e3:>10.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Replay a recorded session through Westermo and time each method.
+
+Record the session first with the same methods in the same order, e.g.
+
+    with Westermo(record="session.jsonl", **device) as switch:
+        switch.get_snapshot()
+
+then run `python benchmarks/bench_replay.py session.jsonl get_snapshot`.
+"""
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import Config  # noqa: E402
+from transcript import load_transcript  # noqa: E402
+from westermo_ser_lib import Westermo  # noqa: E402
+
+
+def replay_once(path: str, methods: list[str], device: dict, speed: float | None = None) -> dict[str, float]:
+    """Replay the transcript once and return the seconds each method took."""
+    times = {}
+    with Westermo(replay=path, replay_speed=speed, **device) as switch:
+        for method in methods:
+            start = perf_counter()
+            getattr(switch, method)()
+            times[method] = perf_counter() - start
+    return times
+
+
+def main(path: str, methods: list[str], number: int = 20, speed: float | None = None) -> dict[str, float]:
+    """Replay the session `number` times and print the best time per method."""
+    header, _ = load_transcript(path)
+    device = Config.get_device_config()
+    device.update(host=header.get("host", device["host"]), transport=header.get("transport", device["transport"]))
+
+    best: dict[str, float] = {}
+    for _ in range(number):
+        for method, seconds in replay_once(path, methods, device, speed).items():
+            best[method] = min(seconds, best.get(method, seconds))
+
+    print(f"{'method':<24} {'best ms':>10}")
+    for method, seconds in best.items():
+        print(f"{method:<24} {seconds * 1e3:>10.2f}")
+    return best
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"usage: {sys.argv[0]} TRANSCRIPT METHOD [METHOD ...]")
+        sys.exit(2)
+    main(sys.argv[1], sys.argv[2:])
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Time scrapli commands on a serial console.
+
+The commands run through the telnet to serial bridge and with the serial
+transports, to show what the bridge costs.
+
+A simulated switch serves the console on the master side of a pty that
+stands in for the serial adapter. The bridge path runs the telnet
+transport against a Handler loop on the pty, the direct paths the serial
+and asyncserial transports on the pty itself. Each path reports the
+seconds per `uptime` command and per `show running-config`, read in
+batch mode like the clients do so the pager doesn't stop the config.
+"""
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from threading import Event, Thread
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scrapli import AsyncScrapli, Scrapli  # type: ignore  # noqa: E402
+
+import telnet2serlib  # noqa: E402
+from benchmarks.bench_bridge import _free_port  # noqa: E402
+from scrapli_serial import add_console_login  # noqa: E402
+from telnet2serlib import Handler  # noqa: E402
+from weos_simulator import Simulator  # noqa: E402
+
+COMMANDS = {"command": "uptime", "show_config": "show running-config"}
+DEVICE = {"platform": "westermo_weos", "auth_username": "admin", "auth_password": "westermo", "timeout_ops": 10}
+
+
+def _time_commands(send, rounds: int) -> dict[str, float]:
+    """Return the best seconds per command of `rounds` calls of send, per case."""
+    results = {}
+    for case, command in COMMANDS.items():
+        best = float("inf")
+        for _ in range(rounds):
+            start = perf_counter()
+            send(command)
+            best = min(best, perf_counter() - start)
+        results[case] = best
+    return results
+
+
+def direct(tty: str, rounds: int) -> dict[str, float]:
+    """Time commands over the serial transport."""
+    conn = Scrapli(host=tty, transport="serial", **DEVICE)
+    add_console_login(conn)
+    conn.open()
+    try:
+        conn.send_command("batch")
+        return _time_commands(conn.send_command, rounds)
+    finally:
+        conn.close()
+
+
+def async_direct(tty: str, rounds: int) -> dict[str, float]:
+    """Time commands over the asyncserial transport."""
+
+    async def run() -> dict[str, float]:
+        conn = AsyncScrapli(host=tty, transport="asyncserial", **DEVICE)
+        add_console_login(conn)
+        await conn.open()
+        try:
+            await conn.send_command("batch")
+            results = {}
+            for case, command in COMMANDS.items():
+                best = float("inf")
+                for _ in range(rounds):
+                    start = perf_counter()
+                    await conn.send_command(command)
+                    best = min(best, perf_counter() - start)
+                results[case] = best
+            return results
+        finally:
+            await conn.close()
+
+    return asyncio.run(run())
+
+
+def bridge(tty: str, rounds: int) -> dict[str, float]:
+    """Time commands over telnet through a bridge on the serial port."""
+    port = _free_port()
+    handler = Handler(tel_port=port, ser_port=tty, baud=115200, timeout=1)
+    stop = Event()
+
+    def loop() -> None:
+        while not stop.is_set():
+            handler.run(0.05)
+
+    thread = Thread(target=loop, daemon=True)
+    thread.start()
+    # The console is logged in, the platform on_open wakes it with a return
+    conn = Scrapli(host="127.0.0.1", port=port, transport="telnet", auth_bypass=True, **DEVICE)
+    conn.open()
+    try:
+        conn.send_command("batch")
+        return _time_commands(conn.send_command, rounds)
+    finally:
+        conn.close()
+        stop.set()
+        thread.join(timeout=5)
+        handler.close()
+
+
+def benchmarks(rounds: int = 20) -> dict[str, float]:
+    """Return seconds per command for each path to the serial console."""
+    telnet2serlib.logger.setLevel(logging.ERROR)
+    simulator = Simulator(count=1, base_port=0, delay=0.0, baud=0).start_in_thread()
+    results = {}
+    try:
+        for name, path in (("bridge", bridge), ("direct", direct), ("async_direct", async_direct)):
+            master, slave = os.openpty()
+            try:
+                simulator.start_console(master, login=False)
+                for case, seconds in path(os.ttyname(slave), rounds).items():
+                    results[f"{name}.{case}"] = seconds
+            finally:
+                os.close(master)
+                os.close(slave)
+    finally:
+        simulator.stop_thread()
+    return results
+
+
+def main() -> dict[str, float]:
+    """Run the benchmarks and print milliseconds per command."""
+    results = benchmarks()
+    print(f"{'path':<28} {'ms':>8}")
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1e3:>8.3f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Run the benchmark suites and compare them with the stored baseline.
+
+    python -m benchmarks.run              # exit code 1 on a regression
+    python -m benchmarks.run csv bridge   # only these suites
+    python -m benchmarks.run --update     # store the results as new baseline
+
+Every suite module has a benchmarks() function returning seconds per case,
+lower is better. A case regresses when it is more than --tolerance slower
+than its baseline. Baselines are machine specific, update them after
+moving the suite to other hardware.
+"""
+import argparse
+import importlib
+import json
+import platform
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+SUITES = ("parsers", "csv", "bridge", "refresh", "transport")
+TOLERANCE = 0.3
+
+
+def run_suites(suites: list[str]) -> dict[str, float]:
+    """Run the suites and return seconds per case, keyed `suite.case`."""
+    results = {}
+    for suite in suites:
+        module = importlib.import_module(f"benchmarks.bench_{suite}")
+        print(f"Running {suite}...", flush=True)
+        for case, seconds in module.benchmarks().items():
+            results[f"{suite}.{case}"] = seconds
+    return results
+
+
+def load_baseline(path: Path = BASELINE) -> dict[str, float]:
+    """Return the stored results, empty if there is no baseline."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["results"]
+
+
+def save_baseline(results: dict[str, float], path: Path = BASELINE) -> None:
+    """Store results as the baseline, keeping cases of suites that did not run."""
+    merged = {**load_baseline(path), **results}
+    data = {"machine": f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}"}
+    data["results"] = dict(sorted(merged.items()))
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float = TOLERANCE) -> list[str]:
+    """Print results against the baseline and return the cases that regressed."""
+    regressions = []
+    print(f"{'case':<44} {'baseline':>12} {'current':>12} {'ratio':>7}")
+    for case, seconds in results.items():
+        base = baseline.get(case)
+        if base is None:
+            print(f"{case:<44} {'-':>12} {seconds * 1e3:>10.3f}ms {'new':>7}")
+            continue
+        ratio = seconds / base
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append(case)
+            flag = "  REGRESSION"
+        print(f"{case:<44} {base * 1e3:>10.3f}ms {seconds * 1e3:>10.3f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the suites, compare or update the baseline and return the exit code."""
+    parser = argparse.ArgumentParser(description="Run benchmarks against the stored baseline")
+    parser.add_argument("suites", nargs="*", metavar="SUITE", help=f"suites to run, default all of {', '.join(SUITES)}")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.3 is 30%%")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+
+    results = run_suites(args.suites or list(SUITES))
+    regressions = compare(results, load_baseline(), args.tolerance)
+    if args.update:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
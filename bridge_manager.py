@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Serve several serial adapters from one process, each on its own telnet port.
+
+BridgeManager runs one telnet2serlib.Handler per adapter, each in its own
+thread so a slow adapter does not hold up the others. Every Handler serves
+one telnet session after the other on its open serial port. Connect a
+Westermo client to every adapter with devices():
+
+    with BridgeManager(default_mapping()) as bridges:
+        for device in bridges.devices():
+            ...Westermo(**device)...
+
+Run it on its own with `python bridge_manager.py [--map FILE]`. With
+`--observer-offset 1000` read-only observers watch the adapter on telnet
+port 2323 at port 3323, and so on. A mapping file is a JSON object of
+serial device to telnet port:
+
+    {"/dev/ttyUSB0": 2323, "/dev/ttyUSB1": 2324}
+"""
+import argparse
+import json
+import logging
+from dataclasses import dataclass, replace
+from threading import Event, Lock, Thread
+from time import sleep
+
+from telnet2serlib import Handler
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+LISTENING = "listening"
+CONNECTED = "connected"
+FAILED = "failed"
+STOPPED = "stopped"
+
+
+@dataclass
+class AdapterStatus:
+    """State of one serial adapter.
+
+    Attributes:
+        serial_port: Serial device
+        tel_port: Telnet port the adapter is served on
+        state: STARTING, LISTENING, CONNECTED, FAILED or STOPPED
+        client: Address of the connected telnet client
+        sessions: Telnet sessions that ended so far
+        observers: Read-only observers connected now
+        bytes_to_serial: Bytes forwarded from telnet to the serial port
+        bytes_to_tcp: Bytes forwarded from the serial port to telnet
+        error: Why the adapter failed
+    """
+
+    serial_port: str
+    tel_port: int
+    state: str = STARTING
+    client: str = ""
+    sessions: int = 0
+    observers: int = 0
+    bytes_to_serial: int = 0
+    bytes_to_tcp: int = 0
+    error: str = ""
+
+
+def load_mapping(path: str) -> dict[str, int]:
+    """Read a JSON mapping file of serial device to telnet port.
+
+    Raises:
+        ValueError: If the file is not such a mapping or uses a port twice
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(isinstance(port, int) for port in data.values()):
+        raise ValueError(f"{path} must map serial devices to telnet port numbers")
+    if len(set(data.values())) != len(data):
+        raise ValueError(f"{path} uses a telnet port for more than one serial device")
+    return data
+
+
+def default_mapping(serial_ports: list[str] | None = None, base_port: int | None = None) -> dict[str, int]:
+    """Map serial devices to consecutive telnet ports.
+
+    Args:
+        serial_ports (list[str]): Devices, defaults to Config.get_available_serial_ports
+        base_port (int): Port of the first device, defaults to Config.TELNET_PORT
+
+    Returns:
+        dict[str, int]: Telnet port per serial device, in device name order
+    """
+    from config import Config
+
+    if serial_ports is None:
+        serial_ports = Config.get_available_serial_ports()
+    base_port = Config.TELNET_PORT if base_port is None else base_port
+    return {serial_port: base_port + index for index, serial_port in enumerate(sorted(serial_ports))}
+
+
+class BridgeManager:
+    """Run a telnet to serial bridge per adapter and report their status."""
+
+    def __init__(
+        self,
+        mapping: dict[str, int],
+        baud: int | None = None,
+        timeout: int | None = None,
+        xonxoff: bool | None = None,
+        interval: float = 0.2,
+        observer_offset: int | None = None,
+    ) -> None:
+        """Initialize the class.
+
+        Args:
+            mapping (dict): Telnet port per serial device, see load_mapping and default_mapping
+            baud (int): Serial speed, defaults to Config.SERIAL_BAUD
+            timeout (int): Serial timeout, defaults to Config.SERIAL_TIMEOUT
+            xonxoff (bool): Software flow control, defaults to Config.SERIAL_XONXOFF
+            interval (float): Seconds between status updates and stop checks of each bridge
+            observer_offset (int): Serve read-only observers of each adapter on its telnet port plus
+                this offset, defaults to Config.BRIDGE_OBSERVER_OFFSET, 0 for no observers
+        """
+        from config import Config
+
+        self.mapping = dict(mapping)
+        self.serial_args = {"baud": baud, "timeout": timeout, "xonxoff": xonxoff}
+        self.interval = interval
+        self.observer_offset = observer_offset if observer_offset is not None else Config.BRIDGE_OBSERVER_OFFSET
+        self._status = {serial_port: AdapterStatus(serial_port, port) for serial_port, port in self.mapping.items()}
+        self._lock = Lock()
+        self._stop = Event()
+        self._threads: list[Thread] = []
+
+    def __enter__(self) -> "BridgeManager":
+        """Start the bridges."""
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        """Stop the bridges."""
+        self.stop()
+
+    def start(self) -> "BridgeManager":
+        """Start a bridge thread per adapter."""
+        self._stop.clear()
+        for serial_port, tel_port in self.mapping.items():
+            thread = Thread(target=self._serve, args=(serial_port, tel_port), name=f"bridge-{tel_port}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Serving %d serial adapters", len(self.mapping))
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop all bridges and close their serial ports.
+
+        Args:
+            timeout (float): Seconds to wait for each bridge thread
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def status(self) -> list[AdapterStatus]:
+        """Return the status of every adapter, in mapping order."""
+        with self._lock:
+            return [replace(status) for status in self._status.values()]
+
+    def devices(self, host: str = "127.0.0.1") -> list[dict]:
+        """Return Westermo connection parameters for every adapter that is being served."""
+        return [
+            {"host": host, "port": status.tel_port, "transport": "telnet"}
+            for status in self.status()
+            if status.state in (LISTENING, CONNECTED)
+        ]
+
+    def _update(self, serial_port: str, **fields) -> None:
+        """Change fields of an adapter status."""
+        with self._lock:
+            status = self._status[serial_port]
+            for name, value in fields.items():
+                setattr(status, name, value)
+
+    def _serve(self, serial_port: str, tel_port: int) -> None:
+        """Bridge one adapter until stopped."""
+        try:
+            observer_port = tel_port + self.observer_offset if self.observer_offset else 0
+            handler = Handler(tel_port=tel_port, ser_port=serial_port, observer_port=observer_port, **self.serial_args)
+        except (SystemExit, OSError) as e:
+            # Handler exits when the serial device is missing or can't be opened
+            error = str(e) if isinstance(e, OSError) else "serial device missing or not accessible"
+            logger.error("Bridge for %s on port %d failed: %s", serial_port, tel_port, error)
+            self._update(serial_port, state=FAILED, error=error)
+            return
+
+        self._update(serial_port, state=LISTENING)
+        try:
+            while not self._stop.is_set():
+                handler.run(self.interval)
+                client = handler.clist[0].sock.getpeername() if handler.clist else None
+                self._update(
+                    serial_port,
+                    state=CONNECTED if client else LISTENING,
+                    client=f"{client[0]}:{client[1]}" if client else "",
+                    sessions=handler.sessions,
+                    observers=len(handler.observers),
+                    bytes_to_serial=handler.bytes_to_serial,
+                    bytes_to_tcp=handler.bytes_to_tcp,
+                )
+            self._update(serial_port, state=STOPPED, client="", observers=0)
+        except Exception as e:
+            logger.error("Bridge for %s on port %d failed: %s", serial_port, tel_port, e)
+            self._update(serial_port, state=FAILED, client="", observers=0, error=str(e))
+        finally:
+            handler.close()
+
+
+def format_status(statuses: list[AdapterStatus]) -> str:
+    """Return the adapter statuses as a table."""
+    header = (
+        f"{'serial port':<24} {'telnet':>6} {'state':<10} {'sessions':>8} {'observers':>9} "
+        f"{'to serial':>10} {'to telnet':>10}"
+    )
+    lines = [header + "  client"]
+    for status in statuses:
+        detail = status.error if status.state == FAILED else status.client
+        lines.append(
+            f"{status.serial_port:<24} {status.tel_port:>6} {status.state:<10} {status.sessions:>8} "
+            f"{status.observers:>9} {status.bytes_to_serial:>10} {status.bytes_to_tcp:>10}  {detail}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Serve the adapters and print their status until interrupted."""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Serve several serial adapters on consecutive telnet ports")
+    parser.add_argument(
+        "--map", default=Config.BRIDGE_MAP_FILE or None, help="JSON file mapping serial devices to telnet ports"
+    )
+    parser.add_argument("--base-port", type=int, default=Config.TELNET_PORT, help="telnet port of the first adapter")
+    parser.add_argument("--baud", type=int, default=Config.SERIAL_BAUD, help="serial speed")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between status tables")
+    parser.add_argument(
+        "--observer-offset",
+        type=int,
+        default=Config.BRIDGE_OBSERVER_OFFSET,
+        help="serve read-only observers on each telnet port plus this offset, 0 for none",
+    )
+    args = parser.parse_args(argv)
+
+    mapping = load_mapping(args.map) if args.map else default_mapping(base_port=args.base_port)
+    if not mapping:
+        parser.error("no accessible serial ports found, connect an adapter or pass --map")
+
+    with BridgeManager(mapping, baud=args.baud, observer_offset=args.observer_offset) as bridges:
+        try:
+            while True:
+                print(format_status(bridges.status()) + "\n", flush=True)
+                sleep(args.interval)
+        except KeyboardInterrupt:
+            logger.info("Bridges stopped by user")
+
+
+if __name__ == "__main__":
+    main()
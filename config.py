@@ -23,6 +23,22 @@ class Config:
     CONNECTION_TIMEOUT = 30
     COMMAND_TIMEOUT = 10
     MAX_RETRIES = 3
+    POOL_IDLE_TIMEOUT = 300  # Seconds a pooled session is kept unused
+    ALARM_HISTORY = 1000  # Alarm entries kept per device by AlarmMonitor
+    CONFIG_DIGEST_TTL = 60  # Seconds a config digest is trusted without a write
+
+    # Seconds to cache show command output when Westermo(read_cache=True)
+    CACHE_TTLS = {
+        "show system-information": 30,
+        "show ifaces": 10,
+        "show port": 2,
+        "show frnt": 10,
+        "show alarm": 2,
+    }
+
+    # === FLEET PROVISIONING SETTINGS ===
+    FLEET_WORKERS = 32  # Switches provisioned at the same time
+    FLEET_HOST_TIMEOUT = 120  # Seconds allowed per switch
 
     # === TELNET TO SERIAL SETTINGS ===
     TELNET_PORT = 2323
@@ -30,17 +46,33 @@ class Config:
     SERIAL_BAUD = 115200
     SERIAL_TIMEOUT = 1
     SERIAL_XONXOFF = True
+    SERIAL_BAUD_RATES = [115200, 9600, 57600, 38400, 19200]  # Speeds serial_discovery tries, in order
+    SERIAL_PROBE_TIMEOUT = 0.5  # Seconds serial_discovery waits for a console at each speed
+    SERIAL_DIRECT = False  # Talk to SERIAL_PORT with the serial transport instead of through the telnet bridge
+    BRIDGE_START_TIMEOUT = 5  # Seconds Westermo waits for the bridge to listen
+    BRIDGE_CHUNK_SIZE = 65536  # Largest chunk the bridge reads from a telnet client at once
+    BRIDGE_OBSERVER_PORT = 0  # Telnet port for read-only observers of the bridge, 0 = none
+    BRIDGE_OBSERVER_OFFSET = 0  # bridge_manager serves observers on telnet port + offset, 0 = none
+    BRIDGE_SCROLLBACK = 4096  # Bytes of recent serial output sent to new observers
+    BRIDGE_MAP_FILE = ""  # JSON serial device to telnet port map for bridge_manager, empty = all available ports
+
+    # === SIMULATOR SETTINGS ===
+    SIMULATOR_BASE_PORT = 2400  # Telnet port of the first simulated switch
+    SIMULATOR_DELAY = 0.0  # Seconds added before each reply
+    SIMULATOR_BAUD = 0  # Emulated line speed in bit/s, 0 = unlimited
 
     # === GUI SETTINGS ===
     WINDOW_TITLE = "Westermo Configurator"
     WINDOW_WIDTH = 800
     WINDOW_HEIGHT = 600
     AUTO_REFRESH_SECONDS = 30
+    LOG_VIEW_BATCH = 50  # Log records added to the log view per update
 
     # === FILE PATHS ===
     CSV_DIRECTORY = "./site/"
     CONFIG_DIRECTORY = "./site/configs/"
     LOG_DIRECTORY = "./logs/"
+    METRICS_FILE = ""  # Write timing metrics here on exit, .json or Prometheus text, empty = off
 
     # === LOGGING SETTINGS ===
     LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
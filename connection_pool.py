@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Keep scrapli sessions open between Westermo contexts."""
+import logging
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def pool_key(device: dict) -> tuple:
+    """Return the key sessions are pooled under."""
+    return (device.get("host"), device.get("port"), device.get("transport"), device.get("auth_username"))
+
+
+class ConnectionPool:
+    """Per host pool of open sessions, probed before reuse and evicted when idle."""
+
+    def __init__(self, idle_timeout: float | None = None) -> None:
+        """Initialize the class.
+
+        Args:
+            idle_timeout (float): Seconds an unused session is kept, defaults to Config.POOL_IDLE_TIMEOUT
+        """
+        from config import Config
+
+        self.idle_timeout = idle_timeout if idle_timeout is not None else Config.POOL_IDLE_TIMEOUT
+        self._lock = Lock()
+        self._idle: dict = {}
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @staticmethod
+    def probe(conn: Any) -> bool:
+        """Check that a session still answers with a prompt."""
+        try:
+            return bool(conn.isalive() and conn.get_prompt())
+        except Exception as e:
+            logger.debug("Pooled session failed probe: %s", str(e))
+            return False
+
+    @staticmethod
+    def _close(conn: Any) -> None:
+        """Close a session, ignoring errors from broken sessions."""
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug("Error closing pooled session: %s", str(e))
+
+    def has_idle(self, device: dict) -> bool:
+        """Return True if an idle session exists for the device."""
+        with self._lock:
+            return bool(self._idle.get(pool_key(device)))
+
+    def acquire(self, device: dict, connect: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return an open session for the device, reusing an idle one if it passes the probe.
+
+        Args:
+            device (dict): Scrapli connection parameters
+            connect (Callable): Opens and prepares a new session
+
+        Returns:
+            tuple: (session, reused)
+        """
+        self.evict_idle()
+        key = pool_key(device)
+        while True:
+            with self._lock:
+                entries = self._idle.get(key)
+                conn = entries.pop()[1] if entries else None
+            if conn is None:
+                break
+            if self.probe(conn):
+                self.reused += 1
+                logger.debug("Reusing pooled session for %s", key[0])
+                return conn, True
+            self.evicted += 1
+            self._close(conn)
+
+        conn = connect()
+        self.created += 1
+        return conn, False
+
+    def release(self, device: dict, conn: Any, broken: bool = False) -> None:
+        """Return a session to the pool, or close it if it is broken."""
+        if broken:
+            self.evicted += 1
+            self._close(conn)
+            return
+        with self._lock:
+            self._idle.setdefault(pool_key(device), []).append((monotonic(), conn))
+
+    def evict_idle(self) -> None:
+        """Close sessions that have not been used for idle_timeout seconds."""
+        deadline = monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            for entries in self._idle.values():
+                expired.extend(conn for released, conn in entries if released < deadline)
+                entries[:] = [entry for entry in entries if entry[0] >= deadline]
+        for conn in expired:
+            self.evicted += 1
+            self._close(conn)
+
+    def close_all(self) -> None:
+        """Close every idle session."""
+        with self._lock:
+            conns = [conn for entries in self._idle.values() for _, conn in entries]
+            self._idle.clear()
+        for conn in conns:
+            self._close(conn)
+
+    def stats(self) -> dict:
+        """Return how many sessions were created, reused and evicted."""
+        with self._lock:
+            idle = sum(len(entries) for entries in self._idle.values())
+        return {"created": self.created, "reused": self.reused, "evicted": self.evicted, "idle": idle}
+
+
+pool = ConnectionPool()
@@ -36,6 +36,18 @@ class ConfigFile:
             mac(str) MAC to add row
             main(bool) Main or Reserve Mac to add
         """
+        self.write_macs(file, {cabinet: mac}, main)
+
+    def write_macs(self, file: str, macs: dict, main: bool) -> None:
+        """
+        Write the MAC addresses of several cabinets in one pass.
+
+        input:
+            file(str)
+            macs(dict) MAC to add, per cabinet
+            main(bool) Main or Reserve Mac to add
+        """
+        column = "MAC M" if main else "MAC R"
         with open(file, "r+") as f:
             csvobject = DictReader(f, delimiter=",", quotechar='"')
             if csvobject.fieldnames is not None:
@@ -44,15 +56,13 @@ class ConfigFile:
                 fieldnames = ""
             csvlist = list(csvobject)
             for row in csvlist:
-                if row["Cabinet"] == cabinet:
-                    if main:
-                        row["MAC M"] = mac
-                    else:
-                        row["MAC R"] = mac
+                if row["Cabinet"] in macs:
+                    row[column] = macs[row["Cabinet"]]
             f.seek(0)
             data = DictWriter(f, delimiter=",", quotechar='"', fieldnames=fieldnames)
             data.writeheader()
             data.writerows(csvlist)
+            f.truncate()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Desired-state provisioning.
+
+Compare wanted settings with the running config and plan only the
+commands that change something. Westermo.apply_desired_state reads the
+running config once, calls plan_changes and sends the planned commands
+in one configuration session. A switch that already has every setting
+gets no writes at all.
+"""
+from dataclasses import dataclass, field
+
+from weos_config import ConfigNode
+
+# Primary address set_mgmt_ip gives vlan1 next to the management address
+MGMT_PRIMARY = "192.168.2.200/24"
+# Alarm outputs set_alarm uses for the link alarm
+ALARM_TARGETS = ("led", "log", "digout")
+# DesiredState.alarm value for a link alarm on every port that has link
+LINKED_PORTS = "linked"
+
+REMOVE_SECONDARY = "Remove all secondary IP addresses, are you sure (y/N)? "
+
+
+def expand_ports(ports: str) -> set[int]:
+    """Return the port numbers of a WeOS port list like `1,4-5`."""
+    numbers: set[int] = set()
+    for part in ports.replace(" ", ",").split(","):
+        if part:
+            start, _, end = part.partition("-")
+            numbers.update(range(int(start), int(end or start) + 1))
+    return numbers
+
+
+@dataclass
+class DesiredState:
+    """Settings a switch should have, None leaves a setting as it is.
+
+    Attributes:
+        hostname: System hostname
+        location: System location, empty to remove it
+        mgmt_ip: Management address, added to vlan1 as the only secondary address
+        alarm: Link alarm per port, or LINKED_PORTS for the ports that have link
+    """
+
+    hostname: str | None = None
+    location: str | None = None
+    mgmt_ip: str | None = None
+    alarm: list[bool] | str | None = None
+
+
+@dataclass(frozen=True)
+class SettingChange:
+    """One setting whose value on the switch differs from the desired value."""
+
+    setting: str
+    old: str
+    new: str
+
+    def __str__(self) -> str:
+        """Return the change as one line, e.g. `hostname: lynx -> CAB01M`."""
+        return f"{self.setting}: {self.old or '(none)'} -> {self.new or '(none)'}"
+
+
+@dataclass
+class ChangeReport:
+    """Outcome of Westermo.apply_desired_state.
+
+    Attributes:
+        changes: Settings that were changed
+        commands: Configuration commands sent, confirmations included
+        saved: True if the running config was saved to startup afterwards
+        mac: Base MAC address of the switch
+    """
+
+    changes: list[SettingChange] = field(default_factory=list)
+    commands: list[str] = field(default_factory=list)
+    saved: bool = False
+    mac: str = ""
+
+    @property
+    def changed(self) -> bool:
+        """Return True if any setting was changed."""
+        return bool(self.changes)
+
+    def summary(self) -> str:
+        """Return a human readable list of the changes."""
+        if not self.changes:
+            return "Already up to date, nothing sent"
+        return "\n".join(str(change) for change in self.changes)
+
+
+def _value(node: ConfigNode | None, setting: str) -> str | None:
+    """Return the value of the first `setting value` line below a node."""
+    if node is None:
+        return None
+    prefix = setting + " "
+    for child in node.children.values():
+        if child.line.startswith(prefix):
+            return child.line[len(prefix) :]
+    return None
+
+
+def _vlan1(running: ConfigNode) -> tuple[str, str | None, list[str]]:
+    """Return the vlan1 address method, primary address and secondary addresses."""
+    for header, node in running.children.items():
+        words = header.split()
+        if words[:3] == ["iface", "vlan1", "inet"] and len(words) > 3:
+            primary = None
+            secondary = []
+            for child in node.children.values():
+                parts = child.line.split()
+                if parts[0] != "address" or len(parts) < 2:
+                    continue
+                if parts[-1] == "secondary":
+                    secondary.append(parts[1])
+                elif primary is None:
+                    primary = parts[1]
+            return words[3], primary, secondary
+    return "", None, []
+
+
+def _port_text(ports: set[int]) -> str:
+    """Return ports as the comma separated list set_alarm sends."""
+    return ",".join(str(port) for port in sorted(ports))
+
+
+def plan_changes(
+    running: ConfigNode, desired: DesiredState, link_ports: list[bool] | None = None
+) -> tuple[list[SettingChange], list[str | tuple[str, str]]]:
+    """Plan the commands that bring the running config to the desired state.
+
+    The desired values must already be validated, see InputValidator.
+
+    Args:
+        running (ConfigNode): Parsed running config
+        desired (DesiredState): Wanted settings
+        link_ports (list[bool]): Link state per port, needed when desired.alarm is LINKED_PORTS
+
+    Returns:
+        tuple: The setting changes and the configuration steps to send, a step is a command
+            or a (command, confirmation question) tuple answered with `y`
+    """
+    changes: list[SettingChange] = []
+    steps: list[str | tuple[str, str]] = []
+    system = running.find("system")
+
+    if desired.hostname is not None:
+        current = _value(system, "hostname") or ""
+        if current != desired.hostname:
+            changes.append(SettingChange("hostname", current, desired.hostname))
+            steps.append(f"system hostname {desired.hostname}")
+
+    if desired.location is not None:
+        current = (_value(system, "location") or "").strip("'\"")
+        if current != desired.location:
+            changes.append(SettingChange("location", current, desired.location))
+            if desired.location:
+                steps.append(f"system location '{desired.location}'")
+            else:
+                steps.append("no system location")
+
+    if desired.alarm is not None:
+        alarm_changes, alarm_steps = _plan_alarm(running, desired.alarm, link_ports)
+        changes += alarm_changes
+        steps += alarm_steps
+
+    if desired.mgmt_ip is not None:
+        method, primary, secondary = _vlan1(running)
+        if method != "static" or primary != MGMT_PRIMARY:
+            current = f"{method} {primary or ''}".strip()
+            changes.append(SettingChange("vlan1 primary", current, f"static {MGMT_PRIMARY}"))
+            steps += [f"iface vlan1 inet static address {MGMT_PRIMARY}", "exit"]
+        if secondary != [desired.mgmt_ip]:
+            changes.append(SettingChange("mgmt ip", ",".join(secondary), desired.mgmt_ip))
+            if secondary:
+                steps += [("iface vlan1 inet static no address secondary", REMOVE_SECONDARY), "exit"]
+            steps += [f"iface vlan1 inet static address {desired.mgmt_ip} secondary", "exit"]
+
+    return changes, steps
+
+
+def _plan_alarm(
+    running: ConfigNode, alarm: list[bool] | str, link_ports: list[bool] | None
+) -> tuple[list[SettingChange], list[str]]:
+    """Plan the link alarm trigger 1 and its action 1, like set_alarm configures them."""
+    if alarm == LINKED_PORTS:
+        if link_ports is None:
+            raise ValueError("Link state is needed for a link alarm on linked ports")
+        alarm = link_ports
+    wanted = {number for number, enabled in enumerate(alarm, start=1) if enabled}
+
+    trigger = running.find("alarm", "trigger 1 link-alarm")
+    action = running.find("alarm", "action 1")
+    ports = expand_ports(_value(trigger, "port") or "") if trigger is not None else set()
+    targets = (_value(action, "target") or "").replace(",", " ").split() if action is not None else []
+
+    changes = []
+    steps = []
+    if not wanted:
+        if action is not None:
+            changes.append(SettingChange("alarm targets", ",".join(targets), ""))
+            steps.append("alarm no action 1")
+        if trigger is not None:
+            changes.append(SettingChange("link alarm", _port_text(ports), ""))
+            steps.append("alarm no trigger 1")
+        return changes, steps
+
+    trigger_ok = trigger is not None and ports == wanted and "condition low" in trigger
+    action_ok = set(targets) == set(ALARM_TARGETS)
+    if not action_ok:
+        changes.append(SettingChange("alarm targets", ",".join(targets), ",".join(ALARM_TARGETS)))
+        if action is not None:
+            steps.append("alarm no action 1")
+    if not trigger_ok:
+        changes.append(SettingChange("link alarm", _port_text(ports), _port_text(wanted)))
+        if trigger is not None:
+            steps.append("alarm no trigger 1")
+        steps.append(f"alarm trigger 1 link-alarm condition low port {_port_text(wanted)}")
+    if not action_ok:
+        steps.append(f"alarm action 1 target {','.join(ALARM_TARGETS)}")
+    return changes, steps
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Parsing and filtering of the WeOS event log.
+
+The log is read line by line while it arrives from the switch, see
+Westermo.stream_event_log, so records are parsed one at a time and the
+whole log is never held in memory.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator
+
+LOG_LINE = re.compile(
+    r"^(?P<time>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) (?P<host>\S+) (?P<source>[^:\s]+):\s?(?P<message>.*)$"
+)
+
+# Syslog severities, most severe first
+SEVERITIES = ("emerg", "alert", "crit", "err", "warning", "notice", "info", "debug")
+SEVERITY_WORDS = {
+    "emerg": "emerg",
+    "emergency": "emerg",
+    "alert": "alert",
+    "crit": "crit",
+    "critical": "crit",
+    "err": "err",
+    "error": "err",
+    "warn": "warning",
+    "warning": "warning",
+    "notice": "notice",
+    "info": "info",
+    "debug": "debug",
+}
+SEVERITY_WORD = re.compile(r"\b(" + "|".join(SEVERITY_WORDS) + r")\b", re.I)
+
+
+@dataclass
+class LogRecord:
+    """One line of the event log.
+
+    Attributes:
+        time: Timestamp of the record, None if the line has none
+        host: Hostname that logged the record
+        source: Daemon or subsystem, e.g. `alarmd`
+        severity: Syslog severity named in the message, `info` if none is named
+        message: Text after the source
+        line: The line as received
+    """
+
+    time: datetime | None
+    host: str
+    source: str
+    severity: str
+    message: str
+    line: str
+
+
+def _timestamp(text: str, now: datetime) -> datetime:
+    """Return the datetime of a syslog timestamp, which has no year."""
+    stamp = datetime.strptime(f"{now.year} {text}", "%Y %b %d %H:%M:%S")
+    if stamp > now + timedelta(days=1):
+        stamp = stamp.replace(year=now.year - 1)
+    return stamp
+
+
+def parse_log_line(line: str, now: datetime | None = None) -> LogRecord:
+    """Parse one event log line.
+
+    Args:
+        line (str): Line as received from the switch
+        now (datetime): Reference time to complete the year, defaults to now
+
+    Returns:
+        LogRecord: The parsed record, lines without timestamp keep all text as message
+    """
+    severity_match = SEVERITY_WORD.search(line)
+    severity = SEVERITY_WORDS[severity_match.group(1).lower()] if severity_match else "info"
+
+    match = LOG_LINE.match(line)
+    if not match:
+        return LogRecord(None, "", "", severity, line.strip(), line)
+
+    return LogRecord(
+        time=_timestamp(match.group("time"), now or datetime.now()),
+        host=match.group("host"),
+        source=match.group("source"),
+        severity=severity,
+        message=match.group("message"),
+        line=line,
+    )
+
+
+class LogFilter:
+    """Time and severity filter applied to event log lines one at a time."""
+
+    def __init__(self, since: datetime | None = None, until: datetime | None = None, severity: str | None = None):
+        """Initialize the class.
+
+        Args:
+            since (datetime): Skip records older than this
+            until (datetime): Skip records newer than this
+            severity (str): Skip records less severe than this syslog severity
+
+        Raises:
+            ValueError: If severity is not a syslog severity
+        """
+        if severity and severity.lower() not in SEVERITY_WORDS:
+            raise ValueError(f"Unknown severity: {severity}")
+        self.since = since
+        self.until = until
+        self.max_level = SEVERITIES.index(SEVERITY_WORDS[severity.lower()]) if severity else len(SEVERITIES)
+        self.now = datetime.now()
+
+    def __call__(self, line: str) -> LogRecord | None:
+        """Return the parsed record if the line passes the filter, else None."""
+        if not line.strip():
+            return None
+        record = parse_log_line(line, self.now)
+        if SEVERITIES.index(record.severity) > self.max_level:
+            return None
+        if self.since or self.until:
+            if record.time is None:
+                return None
+            if (self.since and record.time < self.since) or (self.until and record.time > self.until):
+                return None
+        return record
+
+
+def filter_records(lines: Iterable[str], log_filter: LogFilter) -> Iterator[LogRecord]:
+    """Parse lines lazily and yield the records that pass the filter.
+
+    Args:
+        lines (Iterable[str]): Event log lines, consumed one at a time
+        log_filter (LogFilter): Filter to apply
+
+    Yields:
+        LogRecord: Records in log order
+    """
+    for line in lines:
+        record = log_filter(line)
+        if record is not None:
+            yield record
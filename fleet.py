@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Provision many switches from the site CSV in parallel."""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Callable, Iterable
+
+from csv_lib import ConfigFile
+from desired_state import LINKED_PORTS, DesiredState
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProvisionResult:
+    """Outcome of provisioning one switch."""
+
+    cabinet: str
+    host: str
+    hostname: str
+    ok: bool = False
+    mac: str = ""
+    error: str = ""
+    elapsed: float = 0.0
+    changes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class FleetReport:
+    """Outcome of a fleet run."""
+
+    results: list[ProvisionResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> list[ProvisionResult]:
+        """Return the switches that were provisioned."""
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> list[ProvisionResult]:
+        """Return the switches that failed."""
+        return [result for result in self.results if not result.ok]
+
+    def summary(self) -> str:
+        """Return a human readable summary of the run."""
+        lines = [
+            f"Provisioned {len(self.succeeded)} of {len(self.results)} switches in {self.elapsed:.1f} s",
+        ]
+        unchanged = [result for result in self.succeeded if not result.changes]
+        if unchanged:
+            lines.append(f"  {len(unchanged)} already up to date")
+        for result in self.failed:
+            lines.append(f"  FAILED {result.cabinet} ({result.host}): {result.error}")
+        return "\n".join(lines)
+
+
+def switch_host(row: dict) -> str:
+    """Return the address used to reach the switch of a CSV row."""
+    return row["Switch IP address"]
+
+
+class FleetProvisioner:
+    """Apply the AutoConf settings to many switches with bounded concurrency."""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        timeout: float | None = None,
+        main: bool = True,
+        host_of: Callable[[dict], str] = switch_host,
+        client_factory: Callable | None = None,
+        **device_kwargs,
+    ) -> None:
+        """Initialize the class.
+
+        Args:
+            workers (int): Switches provisioned at the same time, defaults to Config.FLEET_WORKERS
+            timeout (float): Seconds allowed per switch, defaults to Config.FLEET_HOST_TIMEOUT
+            main (bool): Provision the main (M) or the reserve (R) switch of each cabinet
+            host_of (Callable): Returns the address to connect to for a CSV row
+            client_factory (Callable): Builds the async client, defaults to AsyncWestermo
+            **device_kwargs: Connection parameters passed to every client
+        """
+        from config import Config
+
+        self.workers = workers or Config.FLEET_WORKERS
+        self.timeout = timeout or Config.FLEET_HOST_TIMEOUT
+        self.main = main
+        self.host_of = host_of
+        if client_factory is None:
+            from westermo_async_lib import AsyncWestermo
+
+            client_factory = AsyncWestermo
+        self.client_factory = client_factory
+        self.device_kwargs = device_kwargs
+
+    async def _apply(self, row: dict, result: ProvisionResult) -> None:
+        """Bring hostname, location, mgmt IP and alarm to the CSV values, save and read the MAC."""
+        desired = DesiredState(
+            hostname=result.hostname,
+            location=row["Position"],
+            mgmt_ip=row["Switch IP address"],
+            alarm=LINKED_PORTS,
+        )
+        async with self.client_factory(host=result.host, **self.device_kwargs) as switch:
+            report = await switch.apply_desired_state(desired)
+            result.changes = [str(change) for change in report.changes]
+            result.mac = report.mac
+
+    async def provision_one(self, row: dict) -> ProvisionResult:
+        """Provision the switch of one CSV row.
+
+        Args:
+            row (dict): Row from ConfigFile.read_config
+
+        Returns:
+            ProvisionResult: Outcome, errors are recorded instead of raised
+        """
+        result = ProvisionResult(
+            cabinet=row["Cabinet"],
+            host=self.host_of(row),
+            hostname=row["Cabinet"] + ("M" if self.main else "R"),
+        )
+        start = monotonic()
+        try:
+            await asyncio.wait_for(self._apply(row, result), timeout=self.timeout)
+            result.ok = True
+            logger.info("Provisioned %s (%s)", result.hostname, result.host)
+        except asyncio.TimeoutError:
+            result.error = f"Timed out after {self.timeout} s"
+            logger.error("Provisioning %s timed out", result.hostname)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+            logger.error("Provisioning %s failed: %s", result.hostname, result.error)
+        result.elapsed = monotonic() - start
+        return result
+
+    async def run(self, rows: Iterable[dict]) -> FleetReport:
+        """Provision all rows, at most `workers` at a time.
+
+        Args:
+            rows (Iterable[dict]): Rows from ConfigFile.read_config
+
+        Returns:
+            FleetReport: Result per switch, in input order
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def bounded(row: dict) -> ProvisionResult:
+            async with semaphore:
+                return await self.provision_one(row)
+
+        start = monotonic()
+        results = await asyncio.gather(*(bounded(row) for row in rows))
+        return FleetReport(results=list(results), elapsed=monotonic() - start)
+
+    def run_file(self, file: str) -> FleetReport:
+        """Provision every switch in a site CSV and write the MACs back.
+
+        Only rows with SW set to 1 are provisioned, like in AutoConf.
+
+        Args:
+            file (str): Site CSV file
+
+        Returns:
+            FleetReport: Result per switch
+        """
+        config_file = ConfigFile()
+        rows = [row for row in config_file.read_config(file) if row["SW"] == "1"]
+        report = asyncio.run(self.run(rows))
+        macs = {result.cabinet: result.mac for result in report.succeeded if result.mac}
+        if macs:
+            config_file.write_macs(file, macs, self.main)
+        logger.info(report.summary())
+        return report
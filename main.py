@@ -2,11 +2,14 @@
 # coding=utf-8
 """A GUI configurator for Westermo weos switches."""
 import sys
+from itertools import islice
 import tkinter as tk
 from tkinter import BooleanVar, messagebox as mb
 from tkinter import filedialog as fd
 from tkinter import ttk
-from westermo_ser_lib import Westermo
+from westermo_ser_lib import NetworkError, Westermo
+from weos_config import format_changes
+from desired_state import DesiredState
 from csv_lib import ConfigFile
 from config import Config
 from logging_config import setup_logging
@@ -35,6 +38,9 @@ class WestermoGUI(tk.Tk):
 
     def show_frame(self, cont):
         """Raise the frames."""
+        if cont is not LogView:
+            # A running event log stream owns the switch until it is closed
+            self.frames[LogView].stop_stream()
         self.config(cursor="watch")
         frame = self.frames[cont]
         frame.tkraise()
@@ -248,6 +254,12 @@ class MainPage(tk.Frame):
 
     def apply(self):
         """Save the running config to startup config."""
+        if not self.saved:
+            changes = switch.diff_config()
+            if changes and not mb.askokcancel(
+                title="Unsaved changes", message="Save these changes?\n\n" + format_changes(changes)
+            ):
+                return
         result = switch.save_run2startup()
         if result:
             mb.showinfo(message="Success")
@@ -268,9 +280,9 @@ class MainPage(tk.Frame):
         """Write the new IP address."""
         switch.set_mgmt_ip(self.swip.get())
 
-    def frnt_refresh(self) -> None:
+    def frnt_refresh(self, frnt=None) -> None:
         """Refresh the FRNT button."""
-        self.frnt = switch.get_frnt()
+        self.frnt = frnt if frnt is not None else switch.get_frnt()
         if self.frnt:
             if self.frnt[1]["mode"] == "Focal":
                 self.frnt_button.configure(text="MASTER FRNT")
@@ -294,13 +306,13 @@ class MainPage(tk.Frame):
                     self.mgmt_ip = ""
         return self.mgmt_ip
 
-    def save_refresh(self) -> None:
+    def save_refresh(self, saved=None) -> None:
         """
         Change background of button6.
 
         This indicates if configuration is saved or not.
         """
-        self.saved = switch.compare_config()
+        self.saved = saved if saved is not None else switch.compare_config()
         if not self.saved:
             self.button6.config(background="#FF0000")
         else:
@@ -308,16 +320,17 @@ class MainPage(tk.Frame):
 
     def refresh(self) -> None:
         """Read and refresh the values on screen."""
-        # Read new values
-        self.system = switch.get_sysinfo()
-        self.uptime = switch.get_uptime()
-        self.portlist: list[dict[str, str]] = switch.get_ports()
+        # Read new values in one exchange with the switch
+        snapshot = switch.get_snapshot()
+        self.system = snapshot.sysinfo
+        self.uptime = snapshot.uptime
+        self.portlist: list[dict[str, str]] = snapshot.ports
         self.alintports: list = []
         self.stintports: list[bool] = []
-        self.mgmt_ip = self.mgmt_ip_refresh()
-        self.frnt_refresh()
-        self.mgmt_ip_refresh()
-        self.save_refresh()
+        self.mgmt_ips = snapshot.ifaces
+        self.mgmt_ip = snapshot.mgmt_ip
+        self.frnt_refresh(snapshot.frnt)
+        self.save_refresh(snapshot.config_saved)
         for val in self.portlist:
             self.alintports.append(val["alarm"])
             self.stintports.append(bool(val["link"]))
@@ -451,15 +464,14 @@ class AutoConf(tk.Frame):
             f"Alarm on {ports}"
         )
         if mb.askokcancel(title="Continue?", message=message):
-            switch.set_hostname(config[0] + main_reserve)
-            switch.set_location(config[2])
-            switch.set_mgmt_ip(config[1])
-            switch.set_alarm(ports)
-            switch.save_run2startup()
+            report = switch.apply_desired_state(
+                DesiredState(hostname=config[0] + main_reserve, location=config[2], mgmt_ip=config[1], alarm=ports)
+            )
+            mb.showinfo(title="Applied", message=report.summary())
             self.config_file.write_config(
                 self.file,
                 config[0],
-                switch.get_sysinfo()["system_mac"],
+                report.mac,
                 self.swmainred.get() == 0,
             )
             self.refresh()
@@ -568,6 +580,13 @@ class LogView(tk.Frame):
         self.frame1.grid(row=1, column=0, sticky="nsew")
         self.scrollbar = ttk.Scrollbar(self.frame1, orient=tk.VERTICAL)
         self.logtext = tk.Text(self.frame1)
+        self.records = None
+
+    def stop_stream(self) -> None:
+        """Close the running log stream, which releases the switch."""
+        if self.records is not None:
+            self.records.close()
+            self.records = None
 
     def clearlog(self) -> None:
         """Clear the Eventlog."""
@@ -583,7 +602,30 @@ class LogView(tk.Frame):
         self.logtext.delete(1.0, tk.END)
         self.logtext.grid()
         self.logtext.config(state=tk.DISABLED)
-        self.config(cursor="")
+        self.stop_stream()
+        self.records = switch.stream_event_log()
+        self.after_idle(self.show_records)
+
+    def show_records(self) -> None:
+        """Append the next records and schedule the rest, so the first ones show right away."""
+        if self.records is None:
+            return
+        try:
+            batch = list(islice(self.records, Config.LOG_VIEW_BATCH))
+        except NetworkError as e:
+            self.stop_stream()
+            self.config(cursor="")
+            mb.showerror(title="Error", message=str(e))
+            return
+
+        self.logtext.config(state=tk.NORMAL)
+        self.logtext.insert(tk.END, "".join(record.line + "\n" for record in batch))
+        self.logtext.config(state=tk.DISABLED)
+        if len(batch) == Config.LOG_VIEW_BATCH:
+            self.after(1, self.show_records)
+        else:
+            self.stop_stream()
+            self.config(cursor="")
 
 
 if __name__ == "__main__":
@@ -593,6 +635,8 @@ if __name__ == "__main__":
 
     from config import Config
     from westermo_ser_lib import Westermo
+    from metrics import Metrics
+    from connection_pool import pool
     import os
     import sys
 
@@ -623,8 +667,9 @@ if __name__ == "__main__":
     print(f"✓ Serial device {Config.SERIAL_PORT} found and accessible")
     print("Starting Westermo Configurator...")
 
+    metrics = Metrics() if Config.METRICS_FILE else None
     try:
-        with Westermo(**Config.get_device_config()) as switch:
+        with Westermo(config_digest=True, metrics=metrics, pool=pool, **Config.get_device_config()) as switch:
             start = WestermoGUI()
             start.mainloop()
     except KeyboardInterrupt:
@@ -633,3 +678,7 @@ if __name__ == "__main__":
         print(f"\n❌ Application error: {e}")
         print("Check the logs for more details")
         sys.exit(1)
+    finally:
+        pool.close_all()
+        if metrics is not None:
+            metrics.dump(Config.METRICS_FILE)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Latency, byte and retry instrumentation for the Westermo clients.
+
+Pass a Metrics instance as Westermo(metrics=...) to record:
+
+    westermo_method_seconds      wall time of every public client method
+    westermo_command_seconds     wall time of every scrapli send_* call
+    westermo_parse_seconds       time spent in the native and TTP parsers
+    westermo_bytes_sent_total    bytes written to the switch
+    westermo_bytes_received_total
+    westermo_command_failures_total
+    westermo_retries_total       sessions opened again after a failed probe
+
+Commands and parsers are labelled with the client method they ran in, so
+serial transfer and parsing time can be told apart per operation. The
+results are written as JSON or Prometheus text format with Metrics.dump.
+"""
+import json
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import isasyncgenfunction, iscoroutinefunction, isgeneratorfunction, unwrap
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, from a cached show command to a config download
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Metrics and client method of the operation running in this thread or task
+_current: ContextVar[tuple["Metrics", str] | None] = ContextVar("westermo_metrics", default=None)
+
+
+class Histogram:
+    """Count, sum and bucket counts of observed values."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initialize the class.
+
+        Args:
+            buckets (tuple): Sorted upper bounds, +Inf is added on export
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add one value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Return (upper bound, values at or below it) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+def _label_text(labels: tuple) -> str:
+    """Return labels in Prometheus syntax."""
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metrics:
+    """Thread safe store of histograms and counters."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Initialize the class.
+
+        Args:
+            buckets (tuple): Histogram upper bounds in seconds
+        """
+        self.buckets = buckets
+        self._lock = Lock()
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Add a value to the histogram with this name and labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increase the counter with this name and labels."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def operation(self, method: str) -> Iterator[None]:
+        """Time a client method and label the commands and parsers it runs."""
+        token = _current.set((self, method))
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("westermo_method_seconds", perf_counter() - start, method=method)
+            _current.reset(token)
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def to_json(self) -> dict:
+        """Return all values as a JSON serialisable dict."""
+        with self._lock:
+            return {
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(histogram.cumulative()),
+                    }
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+            }
+
+    def to_prometheus(self) -> str:
+        """Return all values in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        typed = set()
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            for bound, count in histogram.cumulative():
+                lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {count}")
+            lines.append(f"{name}_sum{_label_text(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_label_text(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str) -> None:
+        """Write all values to a file, as JSON if the name ends in .json, else Prometheus text."""
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.to_json(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+        logger.info("Metrics written to %s", path)
+
+
+def current_method() -> str:
+    """Return the client method running in this thread or task, or an empty string."""
+    context = _current.get()
+    return context[1] if context else ""
+
+
+def observe_parse(parser: str, seconds: float) -> None:
+    """Record parse time for the running client method, if it is instrumented."""
+    context = _current.get()
+    if context is not None:
+        context[0].observe("westermo_parse_seconds", seconds, parser=parser, method=context[1])
+
+
+@contextmanager
+def timed_parse(parser: str) -> Iterator[None]:
+    """Time a block of parsing for the running client method."""
+    if _current.get() is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        observe_parse(parser, perf_counter() - start)
+
+
+def _measure(func: Callable) -> Callable:
+    """Wrap a client method so it runs as a Metrics.operation when metrics are on."""
+    if iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return await func(self, *args, **kwargs)
+            with self.metrics.operation(func.__name__):
+                return await func(self, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return func(self, *args, **kwargs)
+        with self.metrics.operation(func.__name__):
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _is_generator(func: Callable) -> bool:
+    """Return True for generator functions and the context managers built on them."""
+    func = unwrap(func)
+    return isgeneratorfunction(func) or isasyncgenfunction(func)
+
+
+def instrument_methods(cls: type) -> type:
+    """Class decorator timing every public method of a client.
+
+    Context managers are left alone, their work runs after the call returns.
+    """
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and callable(attr) and not _is_generator(attr):
+            setattr(cls, name, _measure(attr))
+    return cls
+
+
+def _response_bytes(response: Any) -> int:
+    """Return the raw bytes received for a scrapli Response or MultiResponse."""
+    if isinstance(response, list):
+        return sum(_response_bytes(item) for item in response)
+    raw = getattr(response, "raw_result", b"")
+    return len(raw) if isinstance(raw, (bytes, str)) else 0
+
+
+def _payload_bytes(payload: Any) -> int:
+    """Return the bytes sent for a command, a list of commands or interact events."""
+    if isinstance(payload, str):
+        return len(payload.encode()) + 1
+    if isinstance(payload, (list, tuple)):
+        return sum(_payload_bytes(item[0] if isinstance(item, tuple) else item) for item in payload)
+    return 0
+
+
+class MeteredChannel:
+    """Channel wrapper counting the bytes of direct channel reads and writes."""
+
+    def __init__(self, channel: Any, metrics: Metrics) -> None:
+        """Initialize the class."""
+        self.channel = channel
+        self.metrics = metrics
+
+    def __getattr__(self, name: str) -> Any:
+        """Pass everything else to the channel."""
+        return getattr(self.channel, name)
+
+    def write(self, channel_input: str, **kwargs) -> None:
+        """Write to the channel and count the bytes."""
+        self.metrics.inc("westermo_bytes_sent_total", len(channel_input.encode()), method=current_method())
+        self.channel.write(channel_input=channel_input, **kwargs)
+
+    def read(self) -> bytes:
+        """Read from the channel and count the bytes."""
+        buf = self.channel.read()
+        self.metrics.inc("westermo_bytes_received_total", len(buf), method=current_method())
+        return buf
+
+
+class AsyncMeteredChannel(MeteredChannel):
+    """MeteredChannel for scrapli's async channel."""
+
+    async def read(self) -> bytes:
+        """Read from the channel and count the bytes."""
+        buf = await self.channel.read()
+        self.metrics.inc("westermo_bytes_received_total", len(buf), method=current_method())
+        return buf
+
+
+class MeteredConnection:
+    """Scrapli driver wrapper timing the send_* calls and counting their bytes."""
+
+    CALLS = ("send_command", "send_commands", "send_config", "send_configs", "send_interactive")
+    channel_class = MeteredChannel
+
+    def __init__(self, conn: Any, metrics: Metrics) -> None:
+        """Initialize the class.
+
+        Args:
+            conn: Open scrapli driver
+            metrics (Metrics): Where to record the calls
+        """
+        self.conn = conn
+        self.metrics = metrics
+        self.channel = self.channel_class(conn.channel, metrics)
+
+    def __getattr__(self, name: str) -> Any:
+        """Pass everything else to the driver, wrapping the send_* calls."""
+        attr = getattr(self.conn, name)
+        if name in self.CALLS:
+            return self._wrap(name, attr)
+        return attr
+
+    def _record(self, call: str, payload: Any, response: Any, start: float) -> None:
+        """Record time, bytes and failure of one call."""
+        method = current_method()
+        self.metrics.observe("westermo_command_seconds", perf_counter() - start, call=call, method=method)
+        self.metrics.inc("westermo_bytes_sent_total", _payload_bytes(payload), method=method)
+        self.metrics.inc("westermo_bytes_received_total", _response_bytes(response), method=method)
+        responses = response if isinstance(response, list) else [response]
+        if any(getattr(item, "failed", False) for item in responses):
+            self.metrics.inc("westermo_command_failures_total", call=call, method=method)
+
+    def _wrap(self, call: str, func: Callable) -> Callable:
+        """Return the send_* call with instrumentation."""
+
+        @wraps(func)
+        def wrapper(payload, *args, **kwargs):
+            start = perf_counter()
+            try:
+                response = func(payload, *args, **kwargs)
+            except Exception:
+                self.metrics.inc("westermo_command_failures_total", call=call, method=current_method())
+                raise
+            self._record(call, payload, response, start)
+            return response
+
+        return wrapper
+
+
+class AsyncMeteredConnection(MeteredConnection):
+    """MeteredConnection for scrapli's async drivers."""
+
+    channel_class = AsyncMeteredChannel
+
+    def _wrap(self, call: str, func: Callable) -> Callable:
+        """Return the send_* coroutine with instrumentation."""
+
+        @wraps(func)
+        async def wrapper(payload, *args, **kwargs):
+            start = perf_counter()
+            try:
+                response = await func(payload, *args, **kwargs)
+            except Exception:
+                self.metrics.inc("westermo_command_failures_total", call=call, method=current_method())
+                raise
+            self._record(call, payload, response, start)
+            return response
+
+        return wrapper
@@ -0,0 +1,5 @@
+"""scrapli_asyncserial
+
+Name under which scrapli finds the async serial console transport, which
+lives in scrapli_serial.
+"""
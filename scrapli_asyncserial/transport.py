@@ -0,0 +1,4 @@
+"""scrapli_asyncserial.transport"""
+from scrapli_serial.transport import AsyncserialTransport, PluginTransportArgs
+
+__all__ = ("AsyncserialTransport", "PluginTransportArgs")
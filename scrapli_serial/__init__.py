@@ -0,0 +1,52 @@
+"""scrapli_serial
+
+Serial console transports for scrapli, loaded by scrapli as the `serial`
+transport plugin. The async variant is the `asyncserial` plugin, see
+scrapli_asyncserial.
+"""
+from typing import Any
+
+from scrapli.transport.base import AsyncTransport  # type: ignore
+
+# Transport names of the serial console transports
+SERIAL_TRANSPORTS = ("serial", "asyncserial")
+
+
+def add_console_login(conn: Any) -> None:
+    """Log in on the console when the session opens, before the on_open of the platform runs.
+
+    Scrapli logs in within the channel only on transports named telnet. An
+    idle serial console prints nothing, so a return is sent first to get
+    the login or the prompt of a console that is still logged in. Call
+    before open and before a transcript is attached.
+
+    Args:
+        conn: Scrapli or AsyncScrapli driver using a serial transport
+    """
+    if conn.auth_bypass:
+        return
+    on_open = conn.on_open
+
+    if isinstance(conn.transport, AsyncTransport):
+
+        async def async_login(conn: Any) -> None:
+            conn.channel.send_return()
+            await conn.channel.channel_authenticate_telnet(
+                auth_username=conn.auth_username, auth_password=conn.auth_password
+            )
+            if on_open is not None:
+                await on_open(conn)
+
+        conn.on_open = async_login
+        return
+
+    def login(conn: Any) -> None:
+        conn.channel.send_return()
+        conn.channel.channel_authenticate_telnet(auth_username=conn.auth_username, auth_password=conn.auth_password)
+        if on_open is not None:
+            on_open(conn)
+
+    conn.on_open = login
+
+
+__all__ = ("SERIAL_TRANSPORTS", "add_console_login")
@@ -0,0 +1,182 @@
+"""scrapli_serial.transport
+
+Scrapli transports that read and write the serial device with pyserial,
+without the telnet to serial bridge in between. Select them with
+`transport="serial"` (or `"asyncserial"`) and the serial device as host:
+
+    Scrapli(host="/dev/ttyUSB0", transport="serial", platform="westermo_weos")
+
+The transport options `baud` and `xonxoff` default to Config.SERIAL_BAUD
+and Config.SERIAL_XONXOFF. The port argument is ignored.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any
+
+from scrapli.exceptions import ScrapliConnectionError, ScrapliConnectionNotOpened  # type: ignore
+from scrapli.transport.base import (  # type: ignore
+    AsyncTransport,
+    BasePluginTransportArgs,
+    BaseTransportArgs,
+    Transport,
+)
+from serial import Serial, SerialException  # type: ignore
+
+# Longest a read waits for the console, an empty read lets scrapli's login send a return
+READ_WAIT = 0.1
+# Seconds between reads on platforms where the serial port can't be waited on
+POLL_INTERVAL = 0.01
+
+
+@dataclass()
+class PluginTransportArgs(BasePluginTransportArgs):
+    """The serial transports take their settings from the transport options."""
+
+
+def open_serial(base_transport_args: BaseTransportArgs, timeout: float) -> Serial:
+    """Open the serial device named by the host argument.
+
+    Args:
+        base_transport_args (BaseTransportArgs): Scrapli transport arguments
+        timeout (float): Read timeout, 0 for reads that never block
+
+    Raises:
+        ScrapliConnectionError: If the device is missing or can't be opened
+    """
+    from config import Config
+
+    options = base_transport_args.transport_options
+    try:
+        return Serial(
+            port=base_transport_args.host,
+            baudrate=options.get("baud", Config.SERIAL_BAUD),
+            xonxoff=options.get("xonxoff", Config.SERIAL_XONXOFF),
+            timeout=timeout,
+        )
+    except (SerialException, ValueError) as exc:
+        raise ScrapliConnectionError(f"Failed to open serial port {base_transport_args.host}: {exc}") from exc
+
+
+class SerialTransport(Transport):
+    """Scrapli transport for a serial console."""
+
+    def __init__(self, base_transport_args: BaseTransportArgs, plugin_transport_args: PluginTransportArgs) -> None:
+        """Initialize the class."""
+        super().__init__(base_transport_args=base_transport_args)
+        self.plugin_transport_args = plugin_transport_args
+        self.com: Any = None
+
+    def open(self) -> None:
+        """Open the serial device, reads wait at most READ_WAIT."""
+        self._pre_open_closing_log(closing=False)
+        self.com = open_serial(self._base_transport_args, READ_WAIT)
+        self._post_open_closing_log(closing=False)
+
+    def close(self) -> None:
+        """Close the serial device."""
+        self._pre_open_closing_log(closing=True)
+        if self.com is not None:
+            self.com.close()
+        self.com = None
+        self._post_open_closing_log(closing=True)
+
+    def isalive(self) -> bool:
+        """Return True while the serial device is open."""
+        return self.com is not None and self.com.is_open
+
+    def read(self) -> bytes:
+        """Return what the console sent, waiting at most READ_WAIT for the first byte."""
+        if self.com is None:
+            raise ScrapliConnectionNotOpened
+        try:
+            data = self.com.read(self.com.in_waiting or 1)
+            waiting = self.com.in_waiting
+            if waiting:
+                data += self.com.read(waiting)
+        except SerialException as exc:
+            raise ScrapliConnectionError(f"Failed to read from serial port {self._base_transport_args.host}") from exc
+        return data
+
+    def write(self, channel_input: bytes) -> None:
+        """Write to the console."""
+        if self.com is None:
+            raise ScrapliConnectionNotOpened
+        self.com.write(channel_input)
+
+
+class AsyncserialTransport(AsyncTransport):
+    """SerialTransport for scrapli's async drivers.
+
+    The serial device is read without blocking, waiting for data on the
+    event loop where the platform can select on serial ports and polling
+    every POLL_INTERVAL elsewhere.
+    """
+
+    def __init__(self, base_transport_args: BaseTransportArgs, plugin_transport_args: PluginTransportArgs) -> None:
+        """Initialize the class."""
+        super().__init__(base_transport_args=base_transport_args)
+        self.plugin_transport_args = plugin_transport_args
+        self.com: Any = None
+        self.fd: int | None = None
+
+    async def open(self) -> None:
+        """Open the serial device with reads that never block."""
+        self._pre_open_closing_log(closing=False)
+        self.com = open_serial(self._base_transport_args, 0)
+        try:
+            self.fd = self.com.fileno()
+        except (AttributeError, SerialException):
+            # Windows serial ports have no file descriptor
+            self.fd = None
+        self._post_open_closing_log(closing=False)
+
+    def close(self) -> None:
+        """Close the serial device."""
+        self._pre_open_closing_log(closing=True)
+        if self.com is not None:
+            self.com.close()
+        self.com = None
+        self.fd = None
+        self._post_open_closing_log(closing=True)
+
+    def isalive(self) -> bool:
+        """Return True while the serial device is open."""
+        return self.com is not None and self.com.is_open
+
+    def _read_waiting(self) -> bytes:
+        """Return the bytes the serial device holds, without blocking."""
+        if self.com is None:
+            raise ScrapliConnectionNotOpened
+        try:
+            return self.com.read(self.com.in_waiting)
+        except SerialException as exc:
+            raise ScrapliConnectionError(f"Failed to read from serial port {self._base_transport_args.host}") from exc
+
+    async def _wait_readable(self) -> None:
+        """Wait until the serial device has data, at most READ_WAIT."""
+        if self.fd is None:
+            await asyncio.sleep(POLL_INTERVAL)
+            return
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        loop.add_reader(self.fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, READ_WAIT)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_reader(self.fd)
+
+    async def read(self) -> bytes:
+        """Return what the console sent, waiting at most READ_WAIT for it."""
+        data = self._read_waiting()
+        if not data:
+            await self._wait_readable()
+            data = self._read_waiting()
+        return data
+
+    def write(self, channel_input: bytes) -> None:
+        """Write to the console."""
+        if self.com is None:
+            raise ScrapliConnectionNotOpened
+        self.com.write(channel_input)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Find the serial ports with a WeOS switch attached and the speed of its console.
+
+Every port is probed in its own thread. A probe tries the baud rates in
+order, sends a return at each and waits for the login or shell prompt of
+WeOS, so discovery takes about as long as the slowest port instead of the
+sum of all of them:
+
+    for probe in discover():
+        if probe.found:
+            ...Handler(ser_port=probe.port, baud=probe.baud)...
+"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from time import monotonic
+
+from serial import Serial, SerialException  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# What a WeOS console prints after a return: a login question or a shell prompt
+WEOS_CONSOLE = re.compile(rb"(?:login|Password): |[\w-]+:/(?:config/(?:[\w-]+/)*)?#> ")
+# Longest single read, the probe checks its deadline in between
+READ_WAIT = 0.05
+
+
+@dataclass
+class PortProbe:
+    """Outcome of probing one serial port.
+
+    Attributes:
+        port: Serial device
+        baud: Speed the console answered at, 0 if no switch answered
+        prompt: Login question or shell prompt the console printed
+        error: Why the port could not be probed
+        elapsed: Seconds the probe took
+    """
+
+    port: str
+    baud: int = 0
+    prompt: str = ""
+    error: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def found(self) -> bool:
+        """Return True if a switch answered."""
+        return bool(self.baud)
+
+
+def _read_console(com: Serial, timeout: float) -> re.Match | None:
+    """Read until the console printed a WeOS login or prompt, at most timeout seconds."""
+    deadline = monotonic() + timeout
+    buf = b""
+    while monotonic() < deadline:
+        buf += com.read(com.in_waiting or 1)
+        match = WEOS_CONSOLE.search(buf)
+        if match is not None:
+            return match
+    return None
+
+
+def probe_port(port: str, baud_rates: list[int] | None = None, timeout: float | None = None) -> PortProbe:
+    """Find the speed a WeOS console on a serial port answers at.
+
+    Args:
+        port (str): Serial device
+        baud_rates (list[int]): Speeds to try in order, defaults to Config.SERIAL_BAUD_RATES
+        timeout (float): Seconds to wait for an answer at each speed, defaults to Config.SERIAL_PROBE_TIMEOUT
+
+    Returns:
+        PortProbe: Outcome, errors are recorded instead of raised
+    """
+    from config import Config
+
+    baud_rates = baud_rates or Config.SERIAL_BAUD_RATES
+    timeout = timeout or Config.SERIAL_PROBE_TIMEOUT
+    probe = PortProbe(port)
+    start = monotonic()
+    try:
+        with Serial(port=port, baudrate=baud_rates[0], timeout=READ_WAIT, xonxoff=Config.SERIAL_XONXOFF) as com:
+            for baud in baud_rates:
+                com.baudrate = baud
+                com.reset_input_buffer()
+                com.write(b"\r")
+                match = _read_console(com, timeout)
+                if match is not None:
+                    probe.baud = baud
+                    probe.prompt = match.group().decode(errors="replace").strip()
+                    logger.info("Found a switch on %s at %d baud", port, baud)
+                    break
+    except (SerialException, OSError, ValueError) as e:
+        probe.error = str(e) or type(e).__name__
+        logger.warning("Probing %s failed: %s", port, probe.error)
+    probe.elapsed = monotonic() - start
+    return probe
+
+
+def discover(
+    ports: list[str] | None = None, baud_rates: list[int] | None = None, timeout: float | None = None
+) -> list[PortProbe]:
+    """Probe serial ports at the same time for WeOS consoles.
+
+    Args:
+        ports (list[str]): Devices, defaults to Config.get_available_serial_ports
+        baud_rates (list[int]): Speeds to try in order, defaults to Config.SERIAL_BAUD_RATES
+        timeout (float): Seconds to wait for an answer at each speed, defaults to Config.SERIAL_PROBE_TIMEOUT
+
+    Returns:
+        list[PortProbe]: One probe per port, in port order
+    """
+    from config import Config
+
+    if ports is None:
+        ports = Config.get_available_serial_ports()
+    if not ports:
+        return []
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="probe") as pool:
+        return list(pool.map(lambda port: probe_port(port, baud_rates, timeout), ports))
+
+
+def format_probes(probes: list[PortProbe]) -> str:
+    """Return the probes as a table."""
+    lines = [f"{'serial port':<24} {'baud':>7}  console"]
+    for probe in probes:
+        if probe.error:
+            detail = f"FAILED: {probe.error}"
+        else:
+            detail = probe.prompt if probe.found else "no switch"
+        lines.append(f"{probe.port:<24} {probe.baud or '-':>7}  {detail}")
+    return "\n".join(lines)
@@ -3,10 +3,12 @@
 """Library to make a telnet to serial shim."""
 
 import os
+import re
 import sys
 import logging
-from socket import socket, AF_INET, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR
-from select import select
+from socket import socket, AF_INET, IPPROTO_TCP, SOCK_STREAM, SOL_SOCKET, SO_REUSEADDR, TCP_NODELAY
+from selectors import DefaultSelector, EVENT_READ
+from threading import Event
 from serial import Serial, SerialException  # type: ignore
 
 # logging config:
@@ -18,60 +20,148 @@ formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(messag
 ch.setFormatter(formatter)
 logger.addHandler(ch)
 
+# Seconds between serial polls on platforms where the serial port can't be selected on
+POLL_INTERVAL = 0.01
 
-def cleanup_for_serial(text):
-    """Replace some characters for cleanup."""
+IAC = 255
+CR = 13
+LF = 10
+# re searches bytes, bytearray and memoryview alike, without copying them
+CRLF = re.compile(b"\r\n")
+
+
+def cleanup_for_serial(data, after_cr: bool = False):
+    """Replace some characters for cleanup.
+
+    Args:
+        data (bytes | bytearray | memoryview): Chunk received from the telnet client
+        after_cr (bool): The previous chunk ended with CR
+
+    Returns:
+        bytes | memoryview: The bytes for the serial port, data itself when nothing changed
+    """
     # chr(255) is the "we are negotiating" leading bit.  If it is the first bit in
     # a packet, we do not want to send it on to the serial port
-    if ord(text[:1]) == 255:
-        return ""
+    if not data or data[0] == IAC:
+        return b""
 
     # For some reason, windows likes to send "cr/lf" when you send a "cr".
-    # Strip that so we don't get a double prompt.\
-    text = text.decode("latin-1")
-    text = text.replace(chr(13) + chr(10), chr(13))
-    text = text.encode("latin-1")
-
-    return text
+    # Strip that so we don't get a double prompt, also when the pair is split between chunks.
+    if after_cr and data[0] == LF:
+        data = data[1:]
+    if CRLF.search(data) is None:
+        return data
+    return bytes(data).replace(b"\r\n", b"\r")
 
 
 class ProtocolInteractions:
     """Class to forward requests between TCP and Serial."""
 
-    def __init__(self, sock, com) -> None:
-        """Initialize the class."""
+    def __init__(self, sock, com, chunk_size: int | None = None) -> None:
+        """Initialize the class.
+
+        Args:
+            sock: Telnet client socket
+            com: Serial port
+            chunk_size (int): Largest chunk read from the socket at once, defaults to Config.BRIDGE_CHUNK_SIZE
+        """
+        from config import Config
+
         self.sock = sock
         self.com = com
+        self.buffer = bytearray(chunk_size or Config.BRIDGE_CHUNK_SIZE)
+        self.view = memoryview(self.buffer)
+        self.after_cr = False
 
     def fileno(self) -> socket:
         """Get fileno of socket."""
         return self.sock.fileno()
 
-    def recv_tcp(self) -> str:
-        """Receive some data from the telnet client."""
-        data = self.sock.recv(1024)
-        return data
+    def recv_tcp(self) -> memoryview:
+        """Receive some data from the telnet client, valid until the next call."""
+        size = self.sock.recv_into(self.buffer)
+        return self.view[:size]
 
     def send_tcp(self, data) -> None:
         """Send some data out to the telnet client."""
-        self.sock.send(data)
+        self.sock.sendall(data)
 
     def recv_serial(self) -> str:
-        """Receive some data from the serial port."""
-        data = self.com.read(self.com.inWaiting())
+        """Receive what the serial port has, waits up to the serial timeout when it has nothing."""
+        data = self.com.read(self.com.inWaiting() or 1)
         return data
 
     def send_serial(self, data) -> None:
         """Send some data out to the serial port."""
-        data = cleanup_for_serial(data)
-        try:
-            self.com.write(data)
-        except TypeError:
-            self.com.write(data.encode("latin-1"))
+        cleaned = cleanup_for_serial(data, self.after_cr)
+        if data:
+            self.after_cr = data[-1] == CR
+        if cleaned:
+            self.com.write(cleaned)
+
+
+class Scrollback:
+    """Ring buffer keeping the last bytes of serial output."""
+
+    def __init__(self, size: int) -> None:
+        """Initialize the class.
+
+        Args:
+            size (int): Bytes kept
+        """
+        self.size = size
+        self.buffer = bytearray(size)
+        self.end = 0
+        self.full = False
+
+    def write(self, data) -> None:
+        """Add data, overwriting the oldest bytes once the buffer is full."""
+        length = len(data)
+        if length >= self.size:
+            self.buffer[:] = data[length - self.size :]
+            self.end = 0
+            self.full = True
+            return
+        first = min(length, self.size - self.end)
+        self.buffer[self.end : self.end + first] = data[:first]
+        self.buffer[: length - first] = data[first:]
+        if self.end + length >= self.size:
+            self.full = True
+        self.end = (self.end + length) % self.size
+
+    def getvalue(self) -> bytes:
+        """Return the kept bytes, oldest first."""
+        if not self.full:
+            return bytes(self.buffer[: self.end])
+        return bytes(self.buffer[self.end :] + self.buffer[: self.end])
+
+
+def serial_fileno(com) -> int | None:
+    """Return the file descriptor of an open serial port, None if it has none to select on."""
+    try:
+        return com.fileno()
+    except (AttributeError, SerialException):
+        # Windows serial ports have no file descriptor
+        return None
 
 
 class Handler:
-    """Class to start the handler."""
+    """Class to start the handler.
+
+    Call run in a loop. Each call waits on the listener, the telnet
+    sockets and the serial port together and forwards whatever arrived,
+    so bytes are passed on as soon as they are there and an idle bridge
+    uses no CPU.
+
+    The bridge serves one telnet session after the other on the same open
+    serial port, a client connecting during a session waits until it ends.
+    `ready` is set once the listener accepts connections.
+
+    Any number of read-only observers can connect to the observer port at
+    the same time. They get the serial output of the session from the same
+    read, start with the scrollback of recent output and are dropped when
+    they can't keep up, so they never hold up the session.
+    """
 
     def __init__(
         self,
@@ -80,8 +170,22 @@ class Handler:
         baud: int = None,
         timeout: int = None,
         xonxoff: bool = None,
+        chunk_size: int = None,
+        observer_port: int = None,
+        scrollback: int = None,
     ) -> None:
-        """Initialize the class."""
+        """Initialize the class.
+
+        Args:
+            tel_port (int): Telnet port, defaults to Config.TELNET_PORT
+            ser_port (str): Serial device, defaults to Config.SERIAL_PORT
+            baud (int): Serial speed, defaults to Config.SERIAL_BAUD
+            timeout (int): Serial timeout, defaults to Config.SERIAL_TIMEOUT
+            xonxoff (bool): Software flow control, defaults to Config.SERIAL_XONXOFF
+            chunk_size (int): Largest chunk read from a telnet client, defaults to Config.BRIDGE_CHUNK_SIZE
+            observer_port (int): Telnet port for observers, defaults to Config.BRIDGE_OBSERVER_PORT, 0 for none
+            scrollback (int): Bytes of output kept for new observers, defaults to Config.BRIDGE_SCROLLBACK
+        """
         from config import Config
 
         # Use config defaults if not provided
@@ -90,6 +194,10 @@ class Handler:
         baud = baud or Config.SERIAL_BAUD
         timeout = timeout or Config.SERIAL_TIMEOUT
         xonxoff = xonxoff if xonxoff is not None else Config.SERIAL_XONXOFF
+        self.chunk_size = chunk_size or Config.BRIDGE_CHUNK_SIZE
+        self.observer_port = observer_port if observer_port is not None else Config.BRIDGE_OBSERVER_PORT
+        scrollback = scrollback if scrollback is not None else Config.BRIDGE_SCROLLBACK
+        self.scrollback = Scrollback(scrollback) if scrollback else None
 
         # Check if serial device exists before trying to connect
         if not os.path.exists(self.ser_port):
@@ -105,7 +213,24 @@ class Handler:
             sys.exit(1)  # Exit gracefully with error code
 
         self.clist: list = []
-        self.start_new_listener()
+        self.observers: list[socket] = []
+        self.observer_listener: socket | None = None
+        self.selector = DefaultSelector()
+        self.serial_fd: int | None = None
+        self.bytes_to_serial = 0
+        self.bytes_to_tcp = 0
+        self.sessions = 0
+        self.ready = Event()
+        try:
+            if self.observer_port:
+                self.start_observer_listener()
+            self.start_new_listener()
+        except OSError:
+            # e.g. the telnet port is in use
+            if self.observer_listener is not None:
+                self.observer_listener.close()
+            self.com.close()
+            raise
 
     def start_new_listener(self) -> None:
         """Start the telnet listener."""
@@ -114,54 +239,172 @@ class Handler:
         self.listener.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
         self.listener.bind(("", self.tel_port))
         self.listener.listen(32)
-
-    def run(self) -> None:
-        """Check for incoming telnet connections and start interactions."""
+        self.selector.register(self.listener, EVENT_READ, self.accept)
+        self.ready.set()
+
+    def start_observer_listener(self) -> None:
+        """Start the listener for read-only observers."""
+        logger.debug("Starting the observer listener")
+        self.observer_listener = socket(AF_INET, SOCK_STREAM)
+        self.observer_listener.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        self.observer_listener.bind(("", self.observer_port))
+        self.observer_listener.listen(32)
+        self.selector.register(self.observer_listener, EVENT_READ, self.accept_observer)
+
+    def watch_serial(self) -> None:
+        """Wait on the serial port in run, unless the platform can't select on it."""
+        if self.serial_fd is not None:
+            return
+        self.serial_fd = serial_fileno(self.com)
+        if self.serial_fd is not None:
+            self.selector.register(self.serial_fd, EVENT_READ, self.from_serial)
+
+    def unwatch_serial(self) -> None:
+        """Stop waiting on the serial port once no telnet client or observer is connected."""
+        if self.serial_fd is not None and not self.clist and not self.observers:
+            self.selector.unregister(self.serial_fd)
+            self.serial_fd = None
+
+    def accept(self) -> None:
+        """Accept a telnet connection and start forwarding between it and the serial port."""
+        sock, address = self.listener.accept()
+        logger.debug("Telnet connection from %s", address)
+        # Serial output comes in small pieces, send each one right away
+        sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        # Output that arrived while nobody was connected belongs to no session
+        self.com.reset_input_buffer()
+
+        tcp_conn = ProtocolInteractions(sock, self.com, self.chunk_size)
+        self.clist.append(tcp_conn)
+        self.selector.register(tcp_conn, EVENT_READ, lambda: self.from_tcp(tcp_conn))
+        self.watch_serial()
+
+        # One session at a time, the next client waits in the listen backlog
+        self.selector.unregister(self.listener)
+
+    def disconnect(self, tcp_conn: ProtocolInteractions) -> None:
+        """End a telnet session and accept the next one, the serial port stays open."""
+        logger.debug("TCP connection closed.")
+        self.selector.unregister(tcp_conn)
+        tcp_conn.sock.close()
+        self.clist.remove(tcp_conn)
+        self.sessions += 1
+        if not self.clist:
+            self.unwatch_serial()
+            self.selector.register(self.listener, EVENT_READ, self.accept)
+
+    def accept_observer(self) -> None:
+        """Accept an observer and send it the scrollback."""
+        sock, address = self.observer_listener.accept()
+        logger.debug("Observer connection from %s", address)
+        sock.setsockopt(IPPROTO_TCP, TCP_NODELAY, 1)
+        sock.setblocking(False)
+        self.observers.append(sock)
+        self.selector.register(sock, EVENT_READ, lambda: self.from_observer(sock))
+        if self.scrollback is not None:
+            self.send_observer(sock, self.scrollback.getvalue())
+        self.watch_serial()
+
+    def disconnect_observer(self, sock: socket) -> None:
+        """End an observer session."""
+        logger.debug("Observer connection closed.")
+        self.selector.unregister(sock)
+        sock.close()
+        self.observers.remove(sock)
+        self.unwatch_serial()
+
+    def from_observer(self, sock: socket) -> None:
+        """Drop what an observer types, it is read only."""
+        try:
+            data = sock.recv(self.chunk_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.disconnect_observer(sock)
+
+    def send_observer(self, sock: socket, data) -> None:
+        """Send data to an observer, dropping the observer if it can't take all of it at once."""
+        if not data or sock not in self.observers:
+            return
+        try:
+            sent = sock.send(data)
+        except OSError:
+            # Includes BlockingIOError when its send buffer is full
+            sent = -1
+        if sent < len(data):
+            logger.warning("Observer fell behind, disconnecting it")
+            self.disconnect_observer(sock)
+
+    def from_tcp(self, tcp_conn: ProtocolInteractions) -> None:
+        """Pull from tcp and send it to serial."""
+        try:
+            data = tcp_conn.recv_tcp()
+        except OSError:
+            data = b""
+        if not data:
+            self.disconnect(tcp_conn)
+        else:
+            tcp_conn.send_serial(data)
+            self.bytes_to_serial += len(data)
+
+    def from_serial(self) -> None:
+        """Pull from serial once and send it to every telnet client and observer."""
+        data = self.com.read(self.com.inWaiting() or 1)
+        if not data:
+            return
+        for tcp_conn in self.clist[:]:
+            try:
+                tcp_conn.send_tcp(data)
+            except OSError:
+                self.disconnect(tcp_conn)
+        for sock in self.observers[:]:
+            self.send_observer(sock, data)
+        if self.scrollback is not None:
+            self.scrollback.write(data)
+        self.bytes_to_tcp += len(data)
+
+    def run(self, timeout: float | None = None) -> None:
+        """Wait until a connection or data arrives and forward it.
+
+        Args:
+            timeout (float): Seconds to wait at most, None waits until something happens
+        """
         # If no serial connection available, just return
         if self.com is None:
             return
 
-        for tcp_conn in self.clist[:]:
-            if tcp_conn.com.isOpen():
-                # pull data from serial and send it to tcp if possible
-                data = tcp_conn.recv_serial()
-                if data:
-                    tcp_conn.send_tcp(data)
-
-        ready = self.clist[:]
-
-        if self.listener:
-            ready.append(self.listener)
-
-        ready = select(ready, [], [], 0.1)[0]
-        for tcp_conn in ready:
-            if tcp_conn is self.listener:
-                if self.listener is not None:
-                    sock, address = self.listener.accept()
-                    logger.debug("Telnet connection from %s", address)
-                    try:
-                        self.com.close()
-                        self.com.open()
-                    except SerialException:
-                        logger.critical("Error opening serial port.")
-                        sys.exit(1)
-
-                    tcp_conn = ProtocolInteractions(sock, self.com)
-                    self.clist.append(tcp_conn)
-
-                    # stop the listener when we have a connection
-                    self.listener = None
-            else:
-                # try to pull from tcp and send to serial
-                data = tcp_conn.recv_tcp()
-                if not data:
-                    logger.warning("TCP connection closed.")
-                    # self.clist.remove(tcp_conn)
-                    quit()
-                    # self.start_new_listener()
-
-                else:
-                    tcp_conn.send_serial(data)
+        if (self.clist or self.observers) and self.serial_fd is None:
+            # No descriptor to wait on, poll the serial port instead
+            timeout = POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL)
+            if self.com.isOpen() and self.com.inWaiting():
+                self.from_serial()
+
+        for key, _ in self.selector.select(timeout):
+            # An earlier callback of this round may have closed the connection, its
+            # descriptor may even belong to a new one already
+            if self.selector.get_map().get(key.fd) is not key:
+                continue
+            key.data()
+
+    def close(self) -> None:
+        """Close the listener, the telnet connections and the serial port."""
+        self.ready.clear()
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        if self.observer_listener is not None:
+            self.observer_listener.close()
+            self.observer_listener = None
+        for tcp_conn in self.clist:
+            tcp_conn.sock.close()
+        self.clist = []
+        for sock in self.observers:
+            sock.close()
+        self.observers = []
+        self.selector.close()
+        self.com.close()
 
 
 if __name__ == "__main__":
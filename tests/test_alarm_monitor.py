@@ -0,0 +1,88 @@
+"""
+Tests for the incremental alarm polling.
+"""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from alarm_monitor import AlarmMonitor
+from westermo_ser_lib import NetworkError, Westermo
+
+HEADER = (
+    "No Trigger          Ena Act Reason                        \n"
+    "===============================================================================\n"
+)
+ROW1 = " 1 link-alarm       YES YES Port 1,4-5 DOWN                                   \n"
+ROW2 = " 2 link-alarm       YES NO  Port 6 UP\n"
+DEVICE = {"host": "10.0.0.1", "port": 23, "transport": "telnet", "auth_username": "admin"}
+
+
+class TestAlarmMonitor:
+    """Test the watermark per device."""
+
+    def test_first_poll_returns_all_rows(self):
+        """Test that the first poll reports every alarm row."""
+        entries = list(AlarmMonitor().feed(DEVICE, HEADER + ROW1 + ROW2))
+
+        assert [entry["id"] for entry in entries] == [1, 2]
+        assert entries[0]["active"] is True
+        assert entries[0]["reason"] == "Port 1,4-5 DOWN"
+        assert entries[1]["active"] is False
+
+    def test_only_changed_rows(self):
+        """Test that unchanged output is skipped and only changed rows are reported."""
+        alarms = AlarmMonitor()
+        list(alarms.feed(DEVICE, HEADER + ROW1 + ROW2))
+
+        with patch("alarm_monitor.ALARM_ROW") as row:
+            assert list(alarms.feed(DEVICE, HEADER + ROW1 + ROW2)) == []
+            row.match.assert_not_called()
+
+        entries = list(alarms.feed(DEVICE, HEADER + ROW1 + ROW2.replace("NO  Port 6 UP", "YES Port 6 DOWN")))
+        assert [(entry["id"], entry["active"]) for entry in entries] == [(2, True)]
+
+    def test_watermark_per_device(self):
+        """Test that devices keep separate watermarks."""
+        alarms = AlarmMonitor()
+        list(alarms.feed(DEVICE, HEADER + ROW1))
+
+        assert len(list(alarms.feed({**DEVICE, "host": "10.0.0.2"}, HEADER + ROW1))) == 1
+
+        alarms.reset(DEVICE)
+        assert len(list(alarms.feed(DEVICE, HEADER + ROW1))) == 1
+
+    def test_bounded_history(self):
+        """Test that the history keeps the newest entries only."""
+        alarms = AlarmMonitor(history=2)
+        for state in ("DOWN", "UP", "DOWN"):
+            list(alarms.feed(DEVICE, HEADER + ROW1 + ROW2.replace("UP", state)))
+
+        assert [entry["reason"] for entry in alarms.history(DEVICE)] == ["Port 6 UP", "Port 6 DOWN"]
+        assert alarms.history({"host": "unknown"}) == []
+
+
+class TestWestermoPollAlarms:
+    """Test polling through the Westermo client."""
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device with a mocked connection."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        device.conn = Mock()
+        return device
+
+    def test_poll_alarms(self, westermo_device):
+        """Test that a second identical poll returns nothing."""
+        alarms = AlarmMonitor()
+        westermo_device.conn.send_command.return_value = Mock(failed=False, result=HEADER + ROW1)
+
+        assert len(list(westermo_device.poll_alarms(alarms))) == 1
+        assert list(westermo_device.poll_alarms(alarms)) == []
+        westermo_device.conn.send_command.assert_called_with("show alarm")
+
+    def test_poll_alarms_failure(self, westermo_device):
+        """Test that a failed command raises NetworkError."""
+        westermo_device.conn.send_command.return_value = Mock(failed=True, result="error")
+
+        with pytest.raises(NetworkError):
+            westermo_device.poll_alarms(AlarmMonitor())
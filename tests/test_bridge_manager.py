@@ -0,0 +1,115 @@
+"""
+Tests for serving several serial adapters, with ptys standing in for them.
+"""
+
+import json
+import os
+import socket
+from time import monotonic, sleep
+
+import pytest
+from bridge_manager import CONNECTED, FAILED, LISTENING, BridgeManager, default_mapping, format_status, load_mapping
+from tests.test_telnet2serlib import free_port, read_exactly
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    """Wait until condition() is true."""
+    deadline = monotonic() + timeout
+    while not condition():
+        assert monotonic() < deadline, "timed out"
+        sleep(0.01)
+
+
+class TestMapping:
+    """Tests for building the adapter to port mapping."""
+
+    def test_default_mapping(self):
+        """Test devices get consecutive ports in name order."""
+        assert default_mapping(["/dev/ttyUSB1", "/dev/ttyUSB0"], base_port=3000) == {
+            "/dev/ttyUSB0": 3000,
+            "/dev/ttyUSB1": 3001,
+        }
+
+    def test_load_mapping(self, tmp_path):
+        """Test mapping files are checked."""
+        path = tmp_path / "bridges.json"
+        path.write_text(json.dumps({"/dev/ttyUSB0": 2323, "/dev/ttyUSB1": 2324}))
+        assert load_mapping(str(path)) == {"/dev/ttyUSB0": 2323, "/dev/ttyUSB1": 2324}
+
+        path.write_text(json.dumps({"/dev/ttyUSB0": 2323, "/dev/ttyUSB1": 2323}))
+        with pytest.raises(ValueError):
+            load_mapping(str(path))
+
+
+class TestBridgeManager:
+    """Tests for several bridges in one process."""
+
+    def setup_method(self):
+        """Start a bridge on each of two ptys and one for a missing device."""
+        self.ptys = [os.openpty() for _ in range(2)]
+        self.mapping = {os.ttyname(slave): free_port() for _, slave in self.ptys}
+        self.mapping["/dev/does-not-exist"] = free_port()
+        self.bridges = BridgeManager(self.mapping, baud=115200, timeout=1, interval=0.05).start()
+        wait_for(lambda: all(status.state != "starting" for status in self.bridges.status()))
+
+    def teardown_method(self):
+        """Stop the bridges and close the ptys."""
+        self.bridges.stop()
+        for master, slave in self.ptys:
+            os.close(master)
+            os.close(slave)
+
+    def test_adapters_are_independent(self):
+        """Test each telnet port reaches its own serial device."""
+        clients = [socket.create_connection(("127.0.0.1", port), timeout=5) for port in list(self.mapping.values())[:2]]
+        try:
+            for index, (client, (master, _)) in enumerate(zip(clients, self.ptys)):
+                client.sendall(b"%d\r\n" % index)
+                assert read_exactly(lambda size: os.read(master, size), 2) == b"%d\r" % index
+                os.write(master, b"sw%d:/#> " % index)
+                assert read_exactly(client.recv, 8) == b"sw%d:/#> " % index
+            wait_for(lambda: [status.state for status in self.bridges.status()][:2] == [CONNECTED, CONNECTED])
+        finally:
+            for client in clients:
+                client.close()
+
+    def test_status(self):
+        """Test the status of served and failed adapters."""
+        statuses = self.bridges.status()
+        assert [status.state for status in statuses] == [LISTENING, LISTENING, FAILED]
+        assert statuses[2].error
+        assert [device["port"] for device in self.bridges.devices()] == list(self.mapping.values())[:2]
+        assert "/dev/does-not-exist" in format_status(statuses)
+
+    def test_observers(self):
+        """Test observers are served on the telnet port plus the offset and counted in the status."""
+        master, slave = os.openpty()
+        self.ptys.append((master, slave))
+        tel_port = free_port()
+        observer_port = free_port()
+        bridges = BridgeManager(
+            {os.ttyname(slave): tel_port}, baud=115200, timeout=1, interval=0.05, observer_offset=observer_port - tel_port
+        ).start()
+        try:
+            wait_for(lambda: bridges.status()[0].state == LISTENING)
+            with socket.create_connection(("127.0.0.1", observer_port), timeout=5) as observer:
+                wait_for(lambda: bridges.status()[0].observers == 1)
+                os.write(master, b"lynx:/#> ")
+                assert read_exactly(observer.recv, 9) == b"lynx:/#> "
+                assert bridges.status()[0].state == LISTENING
+        finally:
+            bridges.stop()
+        assert " observers " in format_status(bridges.status())
+
+    def test_next_session_after_disconnect(self):
+        """Test an adapter is served again after its telnet client disconnected."""
+        port = list(self.mapping.values())[0]
+        master = self.ptys[0][0]
+        for session in range(2):
+            with socket.create_connection(("127.0.0.1", port), timeout=5) as client:
+                client.sendall(b"\r")
+                read_exactly(lambda size: os.read(master, size), 1)
+            wait_for(lambda: self.bridges.status()[0].state == LISTENING)
+            assert self.bridges.status()[0].sessions == session + 1
+
+        assert self.bridges.status()[0].bytes_to_serial == 2
@@ -0,0 +1,97 @@
+"""
+Tests for the session pool.
+These tests use MOCKING - no sessions are opened!
+"""
+
+from unittest.mock import Mock, patch
+from connection_pool import ConnectionPool
+from westermo_ser_lib import NetworkError, Westermo
+
+DEVICE = {"host": "10.0.0.1", "port": 22, "transport": "system", "auth_username": "admin"}
+
+
+def healthy_conn():
+    """Return a session that passes the probe."""
+    conn = Mock()
+    conn.isalive.return_value = True
+    conn.get_prompt.return_value = "lynx:/#>"
+    return conn
+
+
+class TestConnectionPool:
+    """Test session reuse, probing and eviction."""
+
+    def test_reuse_after_release(self):
+        """Test that a released session is handed out again."""
+        pool = ConnectionPool(idle_timeout=60)
+        conn = healthy_conn()
+        connect = Mock(return_value=conn)
+
+        first, reused = pool.acquire(DEVICE, connect)
+        pool.release(DEVICE, first)
+        second, reused_again = pool.acquire(DEVICE, connect)
+
+        assert first is second is conn
+        assert (reused, reused_again) == (False, True)
+        connect.assert_called_once()
+        assert pool.stats() == {"created": 1, "reused": 1, "evicted": 0, "idle": 0}
+
+    def test_broken_session_replaced(self):
+        """Test that a session failing the probe is closed and replaced."""
+        pool = ConnectionPool(idle_timeout=60)
+        broken = healthy_conn()
+        broken.get_prompt.side_effect = OSError("closed")
+        pool.release(DEVICE, broken)
+        fresh = healthy_conn()
+
+        conn, reused = pool.acquire(DEVICE, Mock(return_value=fresh))
+
+        assert conn is fresh and not reused
+        broken.close.assert_called_once()
+
+    def test_idle_eviction(self):
+        """Test that sessions idle for too long are closed."""
+        pool = ConnectionPool(idle_timeout=0)
+        conn = healthy_conn()
+        pool.release(DEVICE, conn)
+
+        pool.evict_idle()
+
+        conn.close.assert_called_once()
+        assert not pool.has_idle(DEVICE)
+
+    def test_keys_are_per_host(self):
+        """Test that sessions are not shared between hosts."""
+        pool = ConnectionPool(idle_timeout=60)
+        pool.release(DEVICE, healthy_conn())
+
+        assert not pool.has_idle(dict(DEVICE, host="10.0.0.2"))
+
+
+class TestWestermoPooling:
+    """Test Westermo contexts with a pool."""
+
+    def test_second_context_skips_login(self):
+        """Test that the second context reuses the session without setup."""
+        pool = ConnectionPool(idle_timeout=60)
+        with patch("westermo_ser_lib.Scrapli", return_value=healthy_conn()) as scrapli:
+            for _ in range(3):
+                with Westermo(pool=pool, **DEVICE) as switch:
+                    assert switch.conn is not None
+
+        scrapli.assert_called_once()
+        scrapli.return_value.open.assert_called_once()
+        scrapli.return_value.send_command.assert_not_called()
+        scrapli.return_value.close.assert_not_called()
+
+    def test_network_error_discards_session(self):
+        """Test that a session is not returned to the pool after a NetworkError."""
+        pool = ConnectionPool(idle_timeout=60)
+        with patch("westermo_ser_lib.Scrapli", return_value=healthy_conn()):
+            try:
+                with Westermo(pool=pool, **DEVICE):
+                    raise NetworkError("lost")
+            except NetworkError:
+                pass
+
+        assert not pool.has_idle(DEVICE)
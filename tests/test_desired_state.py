@@ -0,0 +1,170 @@
+"""
+Tests for desired-state planning and Westermo.apply_desired_state.
+"""
+
+import asyncio
+
+import pytest
+from desired_state import (
+    LINKED_PORTS,
+    MGMT_PRIMARY,
+    REMOVE_SECONDARY,
+    DesiredState,
+    SettingChange,
+    expand_ports,
+    plan_changes,
+)
+from metrics import Metrics
+from weos_config import parse_config
+from weos_simulator import PAGE_LINES, SimulatedSwitch, Simulator
+from westermo_async_lib import AsyncWestermo
+from westermo_ser_lib import ValidationError, Westermo
+
+
+def running_config():
+    """Return the example running config as a tree."""
+    with open("running_config.cfg") as f:
+        return parse_config(f.read())
+
+
+class TestPlanChanges:
+    """Tests for plan_changes."""
+
+    def test_expand_ports(self):
+        """Test ranges and separators in port lists."""
+        assert expand_ports("1,4-5") == {1, 4, 5}
+        assert expand_ports("2 6") == {2, 6}
+        assert expand_ports("") == set()
+
+    def test_nothing_desired(self):
+        """Test an empty desired state plans nothing."""
+        assert plan_changes(running_config(), DesiredState()) == ([], [])
+
+    def test_unchanged_hostname(self):
+        """Test a hostname the switch already has is not sent."""
+        assert plan_changes(running_config(), DesiredState(hostname="lynx")) == ([], [])
+
+    def test_hostname_and_location(self):
+        """Test changed system settings."""
+        changes, steps = plan_changes(running_config(), DesiredState(hostname="cab01m", location="Room 1"))
+        assert changes == [SettingChange("hostname", "lynx", "cab01m"), SettingChange("location", "", "Room 1")]
+        assert steps == ["system hostname cab01m", "system location 'Room 1'"]
+
+    def test_alarm_matching_trigger(self):
+        """Test a trigger with the wanted ports only rewrites the action targets."""
+        alarm = [True, False, False, True, True]
+        changes, steps = plan_changes(running_config(), DesiredState(alarm=alarm))
+        assert steps == ["alarm no action 1", "alarm action 1 target led,log,digout"]
+        assert changes == [SettingChange("alarm targets", "snmp,log,led,digout", "led,log,digout")]
+
+    def test_alarm_linked_ports(self):
+        """Test LINKED_PORTS uses the link state."""
+        _, steps = plan_changes(running_config(), DesiredState(alarm=LINKED_PORTS), [False, True])
+        assert "alarm no trigger 1" in steps
+        assert "alarm trigger 1 link-alarm condition low port 2" in steps
+
+        with pytest.raises(ValueError):
+            plan_changes(running_config(), DesiredState(alarm=LINKED_PORTS))
+
+    def test_mgmt_ip_from_dhcp(self):
+        """Test the full sequence on a vlan1 that still uses DHCP."""
+        changes, steps = plan_changes(running_config(), DesiredState(mgmt_ip="10.0.0.5/24"))
+        assert [change.setting for change in changes] == ["vlan1 primary", "mgmt ip"]
+        assert steps == [
+            f"iface vlan1 inet static address {MGMT_PRIMARY}",
+            "exit",
+            ("iface vlan1 inet static no address secondary", REMOVE_SECONDARY),
+            "exit",
+            "iface vlan1 inet static address 10.0.0.5/24 secondary",
+            "exit",
+        ]
+
+    def test_applied_state_plans_nothing(self):
+        """Test a config that has every desired setting needs no commands."""
+        switch = SimulatedSwitch()
+        for line in [
+            "configure",
+            "system hostname cab01m",
+            "system location 'Room 1'",
+            f"iface vlan1 inet static address {MGMT_PRIMARY}",
+            "exit",
+            "iface vlan1 inet static no address secondary",
+            "y",
+            "exit",
+            "iface vlan1 inet static address 10.0.0.5/24 secondary",
+            "exit",
+            "alarm trigger 1 link-alarm condition low port 1,2",
+            "alarm action 1 target led,log,digout",
+        ]:
+            switch.handle_line(line)
+        desired = DesiredState(hostname="cab01m", location="Room 1", mgmt_ip="10.0.0.5/24", alarm=[True, True])
+
+        assert plan_changes(parse_config(switch.render_config(switch.running)), desired) == ([], [])
+
+
+class TestApplyDesiredState:
+    """End to end tests against a simulated switch."""
+
+    def setup_method(self):
+        """Start a simulated switch on a free port."""
+        self.simulator = Simulator(count=1, base_port=0, delay=0.0, baud=0).start_in_thread()
+        host, port = self.simulator.endpoints[0]
+        self.device = {
+            "host": host,
+            "port": port,
+            "auth_username": "admin",
+            "auth_password": "westermo",
+            "platform": "westermo_weos",
+            "transport": "telnet",
+            "timeout_ops": 5,
+        }
+
+    def teardown_method(self):
+        """Stop the simulated switch."""
+        self.simulator.stop_thread()
+
+    def test_apply_then_rerun(self):
+        """Test the first run changes and saves, the second reads once and writes nothing."""
+        desired = DesiredState(hostname="CAB01M", location="Room 1", mgmt_ip="10.0.0.5", alarm=LINKED_PORTS)
+        sim = self.simulator.switches[0]
+        # The config is longer than a page, interactive mode would stop it at the pager
+        assert len(sim.render_config(sim.running).splitlines()) > PAGE_LINES
+
+        with Westermo(**self.device) as switch:
+            report = switch.apply_desired_state(desired)
+        assert report.changed and report.saved
+        assert report.mac == sim.mac
+        assert sim.running.hostname == "cab01m"
+        assert sim.running.secondary == ["10.0.0.5/24"]
+        assert sim.startup == sim.running
+
+        metrics = Metrics()
+        with Westermo(metrics=metrics, **self.device) as switch:
+            report = switch.apply_desired_state(desired)
+        assert not report.changed and not report.saved
+        assert report.commands == []
+        # Only the terminal mode is switched around the batched read
+        calls = [c for c in metrics.to_json()["histograms"] if c["name"] == "westermo_command_seconds"]
+        assert [call["labels"]["method"] for call in calls] == ["set_interactive"]
+        assert report.summary() == "Already up to date, nothing sent"
+
+    def test_async_apply(self):
+        """Test the async client reads the long config in batch mode and applies the changes."""
+        desired = DesiredState(hostname="cab02m", alarm=LINKED_PORTS)
+
+        async def apply():
+            async with AsyncWestermo(**self.device) as switch:
+                report = await switch.apply_desired_state(desired)
+                return report, switch.terminal_mode
+
+        report, terminal_mode = asyncio.run(apply())
+        assert report.changed and report.saved
+        assert terminal_mode == "interactive"
+        assert self.simulator.switches[0].running.hostname == "cab02m"
+
+    def test_invalid_hostname(self):
+        """Test invalid values are rejected before anything is sent."""
+        with Westermo(**self.device) as switch:
+            with pytest.raises(ValidationError):
+                switch.apply_desired_state(DesiredState(hostname="bad name"))
+        assert self.simulator.switches[0].running.hostname == "lynx"
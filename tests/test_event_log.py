@@ -0,0 +1,123 @@
+"""
+Tests for the streaming event log reader.
+"""
+
+from datetime import datetime
+from unittest.mock import MagicMock, Mock
+
+import pytest
+from event_log import LogFilter, filter_records, parse_log_line
+from westermo_ser_lib import NetworkError, ValidationError, Westermo
+
+LOG = [
+    "Jan  5 23:30:01 lynx alarmd[512]: Link alarm trigger 1 active, severity warning",
+    "Jan  5 23:31:12 lynx snmpd[420]: Connection from 10.0.0.2",
+    "Jan  5 23:36:28 lynx alarmd[512]: Power supply 2 failure, severity critical",
+]
+NOW = datetime(1970, 1, 6)
+
+
+class TestParseLogLine:
+    """Test parsing single log lines."""
+
+    def test_syslog_line(self):
+        """Test that timestamp, host, source and severity are parsed."""
+        record = parse_log_line(LOG[0], NOW)
+
+        assert record.time == datetime(1970, 1, 5, 23, 30, 1)
+        assert record.host == "lynx"
+        assert record.source == "alarmd[512]"
+        assert record.severity == "warning"
+        assert record.message == "Link alarm trigger 1 active, severity warning"
+
+    def test_year_rollover(self):
+        """Test that a December record read in January belongs to last year."""
+        assert parse_log_line("Dec 31 23:59:59 lynx init: x", NOW).time.year == 1969
+
+    def test_unparsed_line(self):
+        """Test that a line without timestamp is kept as message."""
+        record = parse_log_line("  continued text", NOW)
+        assert record.time is None
+        assert record.severity == "info"
+        assert record.message == "continued text"
+
+
+class TestFilterRecords:
+    """Test the time and severity filter."""
+
+    def test_severity(self):
+        """Test that less severe records are skipped."""
+        records = list(filter_records(LOG, LogFilter(severity="warning")))
+        assert [record.severity for record in records] == ["warning", "crit"]
+
+    def test_time_window(self):
+        """Test that records outside the window are skipped."""
+        log_filter = LogFilter(since=datetime(1970, 1, 5, 23, 31), until=datetime(1970, 1, 5, 23, 35))
+        log_filter.now = NOW
+        assert [record.line for record in filter_records(LOG + ["no time"], log_filter)] == [LOG[1]]
+
+    def test_lazy(self):
+        """Test that lines are only consumed as records are requested."""
+        lines = iter(LOG)
+        records = filter_records(lines, LogFilter())
+        next(records)
+        assert next(lines) == LOG[1]
+
+    def test_unknown_severity(self):
+        """Test that an unknown severity is rejected."""
+        with pytest.raises(ValueError):
+            LogFilter(severity="loud")
+
+
+class TestWestermoStreamEventLog:
+    """Test streaming the log from the channel."""
+
+    PROMPT = b"lynx:/#> "
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device with a mocked channel."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        device.conn = MagicMock()
+        device.conn.comms_prompt_pattern = r"(^[\w]*:\/#>)|(\w+:\/config\/(?:[\w-]+\/)*#>\s*)"
+        device.conn.timeout_ops = 5
+        device.set_interactive = Mock()
+        return device
+
+    def test_records_arrive_per_chunk(self, westermo_device):
+        """Test that records are yielded before the whole log was read."""
+        output = ("alarm log\r\n" + "\r\n".join(LOG) + "\r\n").encode() + self.PROMPT
+        chunks = [output[:40], output[40:120], output[120:]]
+        westermo_device.conn.channel.read.side_effect = chunks
+
+        records = westermo_device.stream_event_log()
+        first = next(records)
+
+        assert first.line == LOG[0]
+        assert westermo_device.conn.channel.read.call_count == 2
+        assert [record.line for record in records] == LOG[1:]
+        westermo_device.set_interactive.assert_called_with(True)
+
+    def test_close_aborts_command(self, westermo_device):
+        """Test that stopping early interrupts the command and waits for the prompt."""
+        westermo_device.conn.channel.read.side_effect = [("\r\n".join(LOG) + "\r\n").encode(), b"^C\r\n" + self.PROMPT]
+
+        records = westermo_device.stream_event_log(severity="crit")
+        assert next(records).line == LOG[2]
+        records.close()
+
+        westermo_device.conn.channel.write.assert_called_with(channel_input="\x03")
+        westermo_device.set_interactive.assert_called_with(True)
+
+    def test_timeout(self, westermo_device):
+        """Test that a silent channel raises NetworkError."""
+        westermo_device.conn.timeout_ops = 0
+        westermo_device.conn.channel.read.return_value = b""
+
+        with pytest.raises(NetworkError, match="Timed out"):
+            list(westermo_device.stream_event_log())
+
+    def test_invalid_severity(self, westermo_device):
+        """Test that an unknown severity raises ValidationError right away."""
+        with pytest.raises(ValidationError):
+            westermo_device.stream_event_log(severity="loud")
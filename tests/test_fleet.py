@@ -0,0 +1,110 @@
+"""
+Tests for fleet provisioning.
+These tests use a fake switch client - no network!
+"""
+
+import asyncio
+import os
+import tempfile
+import pytest
+from csv_lib import ConfigFile
+from desired_state import LINKED_PORTS, ChangeReport, SettingChange
+from fleet import FleetProvisioner
+from westermo_ser_lib import ConfigurationError
+
+
+class FakeSwitch:
+    """Async client stand-in that records the settings applied."""
+
+    applied: dict = {}
+    active = 0
+    peak = 0
+
+    def __init__(self, host, **kwargs):
+        self.host = host
+
+    async def __aenter__(self):
+        FakeSwitch.active += 1
+        FakeSwitch.peak = max(FakeSwitch.peak, FakeSwitch.active)
+        return self
+
+    async def __aexit__(self, *args):
+        FakeSwitch.active -= 1
+
+    async def apply_desired_state(self, state):
+        await asyncio.sleep(0.01)
+        if self.host == "10.0.0.3":
+            await asyncio.sleep(10)
+        if self.host == "10.0.0.2":
+            raise ConfigurationError("Failed to apply 'iface vlan1 inet static address 10.0.0.2/24 secondary'")
+        previous = FakeSwitch.applied.get(self.host)
+        FakeSwitch.applied[self.host] = {"hostname": state.hostname, "location": state.location, "alarm": state.alarm}
+        changes = [] if previous == FakeSwitch.applied[self.host] else [SettingChange("hostname", "lynx", state.hostname)]
+        return ChangeReport(changes=changes, mac="00:11:b4:00:00:" + self.host.rsplit(".", 1)[1].zfill(2))
+
+
+class TestFleetProvisioner:
+    """Test the fleet runner."""
+
+    @pytest.fixture
+    def site_csv(self):
+        """Create a site CSV with four switches, one not in use."""
+        content = """Cabinet,AP,SW,IOG,MBB,DIPB,MBR,DIPR,IBC IP address,Switch IP address,Position,MAC M,MAC R
+CAB01,1,1,0,1,1,1,0,192.168.1.10,10.0.0.1,Room 1,,
+CAB02,1,1,0,1,0,0,1,192.168.1.11,10.0.0.2,Room 2,,
+CAB03,1,1,0,0,0,0,0,192.168.1.12,10.0.0.3,Room 3,,
+CAB04,1,0,0,0,0,0,0,192.168.1.13,10.0.0.4,Room 4,,"""
+        fd, path = tempfile.mkstemp(suffix=".csv", text=True)
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(content)
+        yield path
+        os.unlink(path)
+
+    @pytest.fixture(autouse=True)
+    def reset_fake(self):
+        """Reset the recorded state of the fake client."""
+        FakeSwitch.applied = {}
+        FakeSwitch.active = 0
+        FakeSwitch.peak = 0
+
+    def test_run_file(self, site_csv):
+        """Test that settings are applied, failures reported and MACs written back."""
+        provisioner = FleetProvisioner(workers=2, timeout=0.5, client_factory=FakeSwitch)
+
+        report = provisioner.run_file(site_csv)
+
+        assert [result.cabinet for result in report.results] == ["CAB01", "CAB02", "CAB03"]
+        assert [result.cabinet for result in report.succeeded] == ["CAB01"]
+        assert report.results[1].error.startswith("Failed to apply 'iface vlan1")
+        assert "Timed out" in report.results[2].error
+        assert FakeSwitch.applied["10.0.0.1"] == {"hostname": "CAB01M", "location": "Room 1", "alarm": LINKED_PORTS}
+        assert "FAILED CAB02" in report.summary()
+
+        rows = {row["Cabinet"]: row for row in ConfigFile().read_config(site_csv)}
+        assert rows["CAB01"]["MAC M"] == "00:11:b4:00:00:01"
+        assert rows["CAB02"]["MAC M"] == ""
+
+    def test_worker_limit(self):
+        """Test that no more than `workers` switches are open at once."""
+        rows = [
+            {"Cabinet": f"CAB{i:02}", "Switch IP address": f"10.1.0.{i}", "Position": "Row"} for i in range(1, 21)
+        ]
+        provisioner = FleetProvisioner(workers=5, timeout=5, main=False, client_factory=FakeSwitch)
+
+        report = asyncio.run(provisioner.run(rows))
+
+        assert len(report.succeeded) == 20
+        assert FakeSwitch.peak == 5
+        assert report.results[0].hostname == "CAB01R"
+
+    def test_rerun_reports_up_to_date(self):
+        """Test that a second run on the same switches reports no changes."""
+        rows = [{"Cabinet": "CAB01", "Switch IP address": "10.1.0.1", "Position": "Row"}]
+        provisioner = FleetProvisioner(workers=1, timeout=5, client_factory=FakeSwitch)
+
+        first = asyncio.run(provisioner.run(rows))
+        second = asyncio.run(provisioner.run(rows))
+
+        assert first.results[0].changes == ["hostname: lynx -> CAB01M"]
+        assert second.results[0].changes == []
+        assert "1 already up to date" in second.summary()
@@ -0,0 +1,150 @@
+"""
+Tests for the latency, byte and retry instrumentation.
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+import pytest
+from metrics import AsyncMeteredConnection, Histogram, Metrics, MeteredConnection, timed_parse
+from westermo_ser_lib import Westermo
+
+
+def find(data, name, **labels):
+    """Return the JSON entry with this name and labels."""
+    for entry in data["histograms"] + data["counters"]:
+        if entry["name"] == name and entry["labels"] == labels:
+            return entry
+    raise KeyError(name)
+
+
+class TestHistogram:
+    """Test the histogram buckets."""
+
+    def test_cumulative_buckets(self):
+        """Test that buckets count the values at or below each bound."""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+
+
+class TestMetrics:
+    """Test recording and export."""
+
+    def test_operation_labels_parsers(self):
+        """Test that parse time is labelled with the running method, and dropped outside one."""
+        metrics = Metrics()
+        with timed_parse("outside"):
+            pass
+        with metrics.operation("get_ports"):
+            with timed_parse("native:show port"):
+                pass
+
+        data = metrics.to_json()
+        assert find(data, "westermo_method_seconds", method="get_ports")["count"] == 1
+        assert find(data, "westermo_parse_seconds", method="get_ports", parser="native:show port")["count"] == 1
+        assert len(data["histograms"]) == 2
+
+    def test_prometheus_text(self):
+        """Test the Prometheus exposition format."""
+        metrics = Metrics(buckets=(1.0,))
+        metrics.observe("westermo_command_seconds", 0.5, call="send_command", method="get_uptime")
+        metrics.inc("westermo_bytes_sent_total", 7, method='a"b')
+
+        assert metrics.to_prometheus() == (
+            "# TYPE westermo_command_seconds histogram\n"
+            'westermo_command_seconds_bucket{call="send_command",method="get_uptime",le="1.0"} 1\n'
+            'westermo_command_seconds_bucket{call="send_command",method="get_uptime",le="+Inf"} 1\n'
+            'westermo_command_seconds_sum{call="send_command",method="get_uptime"} 0.5\n'
+            'westermo_command_seconds_count{call="send_command",method="get_uptime"} 1\n'
+            "# TYPE westermo_bytes_sent_total counter\n"
+            'westermo_bytes_sent_total{method="a\\"b"} 7\n'
+        )
+
+    def test_dump(self, tmp_path):
+        """Test that the file format follows the extension."""
+        metrics = Metrics()
+        metrics.inc("westermo_retries_total", operation="connect")
+
+        metrics.dump(str(tmp_path / "metrics.json"))
+        metrics.dump(str(tmp_path / "metrics.prom"))
+
+        assert json.loads((tmp_path / "metrics.json").read_text())["counters"][0]["value"] == 1
+        assert 'westermo_retries_total{operation="connect"} 1' in (tmp_path / "metrics.prom").read_text()
+
+
+class TestMeteredConnection:
+    """Test the scrapli driver wrapper."""
+
+    def test_send_command(self):
+        """Test that time, bytes and failures are recorded per call."""
+        metrics = Metrics()
+        conn = MagicMock()
+        conn.send_command.return_value = Mock(failed=True, raw_result=b"x" * 100)
+        metered = MeteredConnection(conn, metrics)
+
+        with metrics.operation("get_uptime"):
+            metered.send_command("uptime")
+
+        data = metrics.to_json()
+        assert find(data, "westermo_command_seconds", call="send_command", method="get_uptime")["count"] == 1
+        assert find(data, "westermo_bytes_sent_total", method="get_uptime")["value"] == 7
+        assert find(data, "westermo_bytes_received_total", method="get_uptime")["value"] == 100
+        assert find(data, "westermo_command_failures_total", call="send_command", method="get_uptime")["value"] == 1
+        assert metered.comms_prompt_pattern is conn.comms_prompt_pattern
+
+    def test_channel_bytes(self):
+        """Test that direct channel use is counted."""
+        metrics = Metrics()
+        conn = MagicMock()
+        conn.channel.read.return_value = b"abc"
+        metered = MeteredConnection(conn, metrics)
+
+        metered.channel.write(channel_input="uptime")
+        metered.channel.read()
+
+        data = metrics.to_json()
+        assert find(data, "westermo_bytes_sent_total", method="")["value"] == 6
+        assert find(data, "westermo_bytes_received_total", method="")["value"] == 3
+
+    def test_async_send_config(self):
+        """Test the async wrapper."""
+        metrics = Metrics()
+        conn = MagicMock()
+        conn.send_config = AsyncMock(return_value=Mock(failed=False, raw_result=b"ok"))
+        metered = AsyncMeteredConnection(conn, metrics)
+
+        asyncio.run(metered.send_config("hostname lynx"))
+
+        assert find(metrics.to_json(), "westermo_bytes_sent_total", method="")["value"] == 14
+
+
+class TestWestermoMetrics:
+    """Test instrumentation of the Westermo client."""
+
+    def test_methods_and_commands(self):
+        """Test that a getter records method, command and parser time."""
+        metrics = Metrics()
+        device = Westermo(metrics=metrics, host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        with open("return_examples/show_port.txt") as f:
+            output = f.read()
+        device.conn = MeteredConnection(MagicMock(), metrics)
+        device.conn.conn.send_command.return_value = Mock(failed=False, result=output, raw_result=output.encode())
+
+        device.get_ports()
+
+        data = metrics.to_json()
+        assert find(data, "westermo_method_seconds", method="get_ports")["count"] == 1
+        assert find(data, "westermo_command_seconds", call="send_command", method="get_ports")["count"] == 1
+        assert find(data, "westermo_parse_seconds", method="get_ports", parser="native:show port")["count"] == 1
+
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded without metrics."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        assert device.metrics is None
+        assert device.get_ports.__name__ == "get_ports"
@@ -0,0 +1,88 @@
+"""
+Tests for the serial console transports, with a pty standing in for the serial port.
+"""
+
+import asyncio
+import os
+from time import monotonic
+from unittest.mock import patch
+
+import pytest
+from scrapli.transport.base import BaseTransportArgs  # type: ignore
+from scrapli_serial.transport import READ_WAIT, PluginTransportArgs, SerialTransport
+from weos_simulator import Simulator
+from westermo_async_lib import AsyncWestermo
+from westermo_ser_lib import NetworkError, Westermo
+
+
+class TestSerialTransport:
+    """End to end tests against a simulated switch on a serial console."""
+
+    def setup_method(self):
+        """Serve a simulated switch on the master side of a pty."""
+        self.simulator = Simulator(count=1, base_port=0, delay=0.0, baud=0).start_in_thread()
+        self.master, self.slave = os.openpty()
+        self.device = {"transport": "serial", "host": os.ttyname(self.slave), "timeout_ops": 5}
+
+    def teardown_method(self):
+        """Stop the switch and close the pty."""
+        self.simulator.stop_thread()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_westermo_session(self):
+        """Test the client logs in on the console and runs commands without the bridge."""
+        self.simulator.start_console(self.master)
+        with patch.object(Westermo, "start_bridge") as start_bridge:
+            with Westermo(**self.device) as switch:
+                sysinfo = switch.get_sysinfo()
+                switch.set_hostname("console")
+        start_bridge.assert_not_called()
+        assert sysinfo["system_mac"] == self.simulator.switches[0].mac
+        assert self.simulator.switches[0].running.hostname == "console"
+
+    def test_console_logged_in(self):
+        """Test a console that is still logged in is used as it is."""
+        self.simulator.start_console(self.master, login=False)
+        with Westermo(**self.device) as switch:
+            assert switch.get_uptime()
+
+    def test_async_session(self):
+        """Test the async client uses the async serial transport."""
+        self.simulator.start_console(self.master)
+
+        async def read_sysinfo():
+            async with AsyncWestermo(**self.device) as switch:
+                assert switch.DEVICE["transport"] == "asyncserial"
+                return await switch.get_sysinfo()
+
+        assert asyncio.run(read_sysinfo())["system_mac"] == self.simulator.switches[0].mac
+
+    def test_serial_direct(self):
+        """Test Config.SERIAL_DIRECT replaces the bridge with the serial transport."""
+        with patch("config.Config.SERIAL_DIRECT", True), patch("config.Config.SERIAL_PORT", self.device["host"]):
+            with patch.object(Westermo, "start_bridge") as start_bridge:
+                switch = Westermo(transport="telnet", port=2323)
+            async_switch = AsyncWestermo(transport="telnet", port=2323)
+        start_bridge.assert_not_called()
+        assert (switch.DEVICE["transport"], switch.DEVICE["host"]) == ("serial", self.device["host"])
+        assert (async_switch.DEVICE["transport"], async_switch.DEVICE["host"]) == ("asyncserial", self.device["host"])
+
+    def test_idle_read_returns(self):
+        """Test a read of an idle console returns empty after READ_WAIT, so the login can send returns."""
+        args = BaseTransportArgs(transport_options={}, host=self.device["host"])
+        transport = SerialTransport(args, PluginTransportArgs())
+        transport.open()
+        try:
+            start = monotonic()
+            assert transport.read() == b""
+            assert monotonic() - start < READ_WAIT * 5
+        finally:
+            transport.close()
+        assert not transport.isalive()
+
+    def test_missing_device(self):
+        """Test a missing serial device fails the connection."""
+        with pytest.raises(NetworkError):
+            with Westermo(transport="serial", host="/dev/does-not-exist", timeout_ops=5):
+                pass
@@ -0,0 +1,107 @@
+"""
+Tests for serial port discovery, with ptys standing in for the serial adapters.
+"""
+
+import os
+import termios
+from contextlib import contextmanager
+from select import select
+from threading import Event, Thread
+from time import monotonic
+
+from serial_discovery import discover, format_probes, probe_port
+from weos_simulator import Simulator
+
+
+@contextmanager
+def console_at(speed: int, master: int, slave: int):
+    """Answer returns with a prompt when the pty runs at speed, with line noise otherwise.
+
+    The console stops before the context ends, so it never reads a descriptor closed after it.
+    """
+    stop = Event()
+
+    def answer():
+        while not stop.is_set():
+            if not select([master], [], [], 0.02)[0]:
+                continue
+            if b"\r" in os.read(master, 64):
+                reply = b"\r\nlynx:/#> " if termios.tcgetattr(slave)[4] == speed else b"\xf0\x8c\x1e\xfe"
+                os.write(master, reply)
+
+    thread = Thread(target=answer, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+class TestProbe:
+    """Tests for probing single ports."""
+
+    def setup_method(self):
+        """Open a pty."""
+        self.master, self.slave = os.openpty()
+        self.port = os.ttyname(self.slave)
+
+    def teardown_method(self):
+        """Close the pty."""
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_detects_speed(self):
+        """Test the speeds are tried in order until the console answers."""
+        with console_at(termios.B9600, self.master, self.slave):
+            probe = probe_port(self.port, [115200, 9600, 57600], timeout=0.2)
+        assert probe.found
+        assert (probe.baud, probe.prompt, probe.error) == (9600, "lynx:/#>", "")
+
+    def test_login_prompt(self):
+        """Test a console asking for a login is found."""
+        simulator = Simulator(count=1, base_port=0).start_in_thread()
+        try:
+            simulator.start_console(self.master)
+            probe = probe_port(self.port, [115200], timeout=1)
+        finally:
+            simulator.stop_thread()
+        assert (probe.baud, probe.prompt) == (115200, "login:")
+
+    def test_silent_port(self):
+        """Test a port without a switch is reported after trying every speed."""
+        probe = probe_port(self.port, [115200, 9600], timeout=0.1)
+        assert not probe.found
+        assert probe.elapsed >= 0.2
+        assert "no switch" in format_probes([probe])
+
+    def test_missing_device(self):
+        """Test a port that can't be opened is reported as failed."""
+        probe = probe_port("/dev/does-not-exist", [115200], timeout=0.1)
+        assert not probe.found
+        assert probe.error
+        assert "FAILED" in format_probes([probe])
+
+
+class TestDiscover:
+    """Tests for probing many ports at the same time."""
+
+    def test_ports_probed_in_parallel(self):
+        """Test eight ports take about one probe, not eight."""
+        ptys = [os.openpty() for _ in range(8)]
+        try:
+            with console_at(termios.B9600, *ptys[3]):
+                start = monotonic()
+                probes = discover([os.ttyname(slave) for _, slave in ptys], [115200, 9600], timeout=0.2)
+                elapsed = monotonic() - start
+        finally:
+            for master, slave in ptys:
+                os.close(master)
+                os.close(slave)
+        assert [probe.baud for probe in probes] == [0, 0, 0, 9600, 0, 0, 0, 0]
+        # One port takes 0.4 s for two speeds, eight in turn would take 3.2 s
+        assert elapsed < 1.5
+
+    def test_no_ports(self):
+        """Test discovery without candidate ports returns nothing."""
+        assert discover([]) == []
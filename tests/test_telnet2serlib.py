@@ -0,0 +1,351 @@
+"""
+Tests for the telnet to serial bridge, with a pty standing in for the serial port.
+"""
+
+import os
+import socket
+import struct
+from selectors import EVENT_READ
+from threading import Event, Thread
+from time import monotonic
+from unittest.mock import Mock, patch
+
+import pytest
+from telnet2serlib import Handler, ProtocolInteractions, Scrollback, cleanup_for_serial
+
+
+def free_port() -> int:
+    """Return a TCP port nobody listens on."""
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        return sock.getsockname()[1]
+
+
+def read_exactly(read, size: int) -> bytes:
+    """Call read until size bytes arrived."""
+    data = b""
+    while len(data) < size:
+        data += read(size - len(data))
+    return data
+
+
+def reset(sock: socket.socket) -> None:
+    """Close a socket with a TCP reset instead of a normal close."""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    sock.close()
+
+
+def serial_first(handler: Handler, count: int):
+    """Return a patch making the next select of handler report the serial port before the sockets.
+
+    Waits until count descriptors are ready, so they are all handled in one round.
+    """
+    deadline = monotonic() + 5
+    events = []
+    while len(events) < count:
+        assert monotonic() < deadline, "timed out"
+        events = handler.selector.select(0.05)
+    events.sort(key=lambda event: event[0].fd != handler.serial_fd)
+    return patch.object(handler.selector, "select", return_value=events)
+
+
+class TestCleanup:
+    """Tests for cleanup_for_serial."""
+
+    def test_crlf_becomes_cr(self):
+        """Test CR LF from telnet clients is sent as CR."""
+        assert cleanup_for_serial(b"show port\r\n") == b"show port\r"
+
+    def test_negotiation_dropped(self):
+        """Test telnet negotiation is not sent to the serial port."""
+        assert cleanup_for_serial(b"\xff\xfb\x01") == b""
+
+    def test_unchanged_chunk_not_copied(self):
+        """Test a chunk without CR LF is passed on as it is."""
+        view = memoryview(bytearray(b"show port\r"))
+        assert cleanup_for_serial(view) is view
+
+    def test_crlf_split_between_chunks(self):
+        """Test CR LF is sent as CR when the LF starts the next chunk."""
+        com = Mock()
+        conn = ProtocolInteractions(Mock(), com, chunk_size=16)
+        conn.send_serial(memoryview(b"show port\r"))
+        conn.send_serial(memoryview(b"\nshow frnt\r\n"))
+        conn.send_serial(memoryview(b"\n"))
+        sent = b"".join(bytes(call.args[0]) for call in com.write.call_args_list)
+        # Only an LF right after CR is dropped
+        assert sent == b"show port\rshow frnt\r\n"
+
+    def test_recv_into_buffer(self):
+        """Test telnet input is read into the preallocated buffer in chunks of chunk_size."""
+        client, bridge = socket.socketpair()
+        with client, bridge:
+            conn = ProtocolInteractions(bridge, Mock(), chunk_size=4)
+            client.sendall(b"abcdef")
+            assert bytes(conn.recv_tcp()) == b"abcd"
+            assert conn.recv_tcp().obj is conn.buffer
+
+
+class TestScrollback:
+    """Tests for the ring buffer of recent serial output."""
+
+    def test_keeps_last_bytes(self):
+        """Test the oldest bytes are overwritten once the buffer wraps."""
+        scrollback = Scrollback(8)
+        assert scrollback.getvalue() == b""
+        scrollback.write(b"abcde")
+        assert scrollback.getvalue() == b"abcde"
+        scrollback.write(memoryview(b"fghij"))
+        assert scrollback.getvalue() == b"cdefghij"
+        scrollback.write(b"k")
+        assert scrollback.getvalue() == b"defghijk"
+
+    def test_write_larger_than_buffer(self):
+        """Test a write larger than the buffer keeps its end."""
+        scrollback = Scrollback(4)
+        scrollback.write(b"ab")
+        scrollback.write(b"0123456789")
+        assert scrollback.getvalue() == b"6789"
+
+
+class TestHandler:
+    """Tests for forwarding between a telnet client and the serial port."""
+
+    def setup_method(self):
+        """Start a bridge on a pty."""
+        self.master, self.slave = os.openpty()
+        self.port = free_port()
+        self.handler = Handler(tel_port=self.port, ser_port=os.ttyname(self.slave), baud=115200, timeout=1)
+        self.stop = Event()
+        self.thread = None
+
+    def teardown_method(self):
+        """Stop the bridge and close the pty."""
+        if self.thread is not None:
+            self.stop.set()
+            self.thread.join(timeout=5)
+            self.client.close()
+        self.handler.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def serve(self):
+        """Run the bridge in a thread and connect a telnet client."""
+
+        def loop():
+            while not self.stop.is_set():
+                self.handler.run(0.05)
+
+        self.thread = Thread(target=loop, daemon=True)
+        self.thread.start()
+        self.client = self.connect()
+
+    def connect(self):
+        """Return a new telnet connection to the bridge."""
+        return socket.create_connection(("127.0.0.1", self.port), timeout=5)
+
+    def serial_read(self, size):
+        """Read size bytes the bridge wrote to the serial port."""
+        return read_exactly(lambda count: os.read(self.master, count), size)
+
+    def test_forwards_both_ways(self):
+        """Test bytes are forwarded from telnet to serial and back."""
+        self.serve()
+        self.client.sendall(b"show port\r\n")
+        assert self.serial_read(10) == b"show port\r"
+
+        os.write(self.master, b"lynx:/#> ")
+        assert read_exactly(self.client.recv, 9) == b"lynx:/#> "
+
+    def test_serial_output_is_not_delayed(self):
+        """Test serial output reaches the client without waiting for a poll interval."""
+        self.serve()
+        self.client.sendall(b"\r")
+        self.serial_read(1)
+
+        start = monotonic()
+        for _ in range(20):
+            os.write(self.master, b"x")
+            read_exactly(self.client.recv, 1)
+        assert (monotonic() - start) / 20 < 0.02
+
+    def test_idle_run_waits(self):
+        """Test run blocks until the timeout when nothing happens."""
+        start = monotonic()
+        self.handler.run(timeout=0.1)
+        assert monotonic() - start >= 0.09
+
+    def test_polls_serial_without_descriptor(self):
+        """Test serial ports without a file descriptor are polled."""
+        with patch("telnet2serlib.serial_fileno", return_value=None):
+            self.serve()
+            self.client.sendall(b"\r")
+            self.serial_read(1)
+            os.write(self.master, b"lynx:/#> ")
+            assert read_exactly(self.client.recv, 9) == b"lynx:/#> "
+        assert self.handler.serial_fd is None
+
+    def test_ready_when_listening(self):
+        """Test the ready event is set once the bridge accepts connections."""
+        assert self.handler.ready.is_set()
+
+    def test_consecutive_sessions(self):
+        """Test sessions follow each other without reopening the serial port."""
+        with patch.object(self.handler.com, "open") as reopen:
+            self.serve()
+            for session in range(3):
+                self.client.sendall(b"%d" % session)
+                assert self.serial_read(1) == b"%d" % session
+                os.write(self.master, b"#> ")
+                assert read_exactly(self.client.recv, 3) == b"#> "
+                self.client.close()
+                self.client = self.connect()
+            self.client.sendall(b"x")
+            assert self.serial_read(1) == b"x"
+        assert self.handler.sessions == 3
+        reopen.assert_not_called()
+
+    def test_client_reset_during_serial_output(self):
+        """Test a client resetting while serial output is pending ends the session, not the bridge."""
+        client = self.connect()
+        self.handler.run(1)
+        reset(client)
+        os.write(self.master, b"lynx:/#> ")
+        with serial_first(self.handler, 2):
+            self.handler.run(1)
+        assert self.handler.sessions == 1
+
+        self.serve()
+        self.client.sendall(b"\r")
+        assert self.serial_read(1) == b"\r"
+        os.write(self.master, b"lynx:/#> ")
+        assert read_exactly(self.client.recv, 9) == b"lynx:/#> "
+
+    def test_next_client_waits_for_session(self):
+        """Test a client connecting during a session is served when it ends."""
+        self.serve()
+        self.client.sendall(b"a")
+        self.serial_read(1)
+        waiting = self.connect()
+        try:
+            waiting.sendall(b"b")
+            self.client.sendall(b"c")
+            assert self.serial_read(1) == b"c"
+            self.client.close()
+            assert self.serial_read(1) == b"b"
+        finally:
+            self.client = waiting
+
+    def test_missing_serial_device(self):
+        """Test the handler exits when the serial device does not exist."""
+        with pytest.raises(SystemExit):
+            Handler(tel_port=free_port(), ser_port="/dev/does-not-exist")
+
+
+class TestObservers:
+    """Tests for read-only observers of the bridge."""
+
+    def setup_method(self):
+        """Start a bridge with an observer port on a pty."""
+        self.master, self.slave = os.openpty()
+        self.port = free_port()
+        self.observer_port = free_port()
+        self.handler = Handler(
+            tel_port=self.port,
+            ser_port=os.ttyname(self.slave),
+            baud=115200,
+            timeout=1,
+            observer_port=self.observer_port,
+            scrollback=16,
+        )
+        self.stop = Event()
+        self.thread = Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def teardown_method(self):
+        """Stop the bridge and close the pty."""
+        self.stop.set()
+        self.thread.join(timeout=5)
+        self.handler.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def loop(self):
+        """Run the bridge until stopped."""
+        while not self.stop.is_set():
+            self.handler.run(0.05)
+
+    def wait_for(self, condition):
+        """Wait until condition() is true."""
+        deadline = monotonic() + 5
+        while not condition():
+            assert monotonic() < deadline, "timed out"
+            self.stop.wait(0.01)
+
+    def test_observer_sees_session(self):
+        """Test observers get the serial output of the session and their input is dropped."""
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+            with socket.create_connection(("127.0.0.1", self.observer_port), timeout=5) as observer:
+                self.wait_for(lambda: len(self.handler.observers) == 1)
+                observer.sendall(b"reboot\r")
+                client.sendall(b"show port\r")
+                assert read_exactly(lambda size: os.read(self.master, size), 10) == b"show port\r"
+
+                os.write(self.master, b"lynx:/#> ")
+                assert read_exactly(client.recv, 9) == b"lynx:/#> "
+                assert read_exactly(observer.recv, 9) == b"lynx:/#> "
+            self.wait_for(lambda: not self.handler.observers)
+        assert self.handler.bytes_to_serial == 10
+
+    def test_scrollback_for_new_observer(self):
+        """Test a new observer starts with the last output of the session, the next client does not."""
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+            client.sendall(b"\r")
+            os.read(self.master, 1)
+            os.write(self.master, b"0123456789lynx:/#> ")
+            read_exactly(client.recv, 19)
+        with socket.create_connection(("127.0.0.1", self.observer_port), timeout=5) as observer:
+            assert read_exactly(observer.recv, 16) == b"3456789lynx:/#> "
+            # The serial port is watched for the observer alone
+            os.write(self.master, b"\r\n")
+            assert read_exactly(observer.recv, 2) == b"\r\n"
+            with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+                self.wait_for(lambda: self.handler.clist)
+                os.write(self.master, b"#> ")
+                assert read_exactly(client.recv, 3) == b"#> "
+
+    def test_observer_reset_during_serial_output(self):
+        """Test an observer resetting while serial output is pending leaves the control session running."""
+        self.stop.set()
+        self.thread.join(timeout=5)
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as client:
+            observer = socket.create_connection(("127.0.0.1", self.observer_port), timeout=5)
+            while not (self.handler.clist and self.handler.observers):
+                self.handler.run(0.05)
+            reset(observer)
+            os.write(self.master, b"lynx:/#> ")
+            with serial_first(self.handler, 2):
+                self.handler.run(1)
+            assert not self.handler.observers
+
+            self.stop.clear()
+            self.thread = Thread(target=self.loop, daemon=True)
+            self.thread.start()
+            assert read_exactly(client.recv, 9) == b"lynx:/#> "
+            client.sendall(b"\r")
+            assert os.read(self.master, 1) == b"\r"
+            assert self.handler.sessions == 0
+
+    def test_observer_that_falls_behind_is_dropped(self):
+        """Test an observer that can't take the output at once is disconnected."""
+        self.stop.set()
+        self.thread.join(timeout=5)
+        reader, sock = socket.socketpair()
+        with reader:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+            sock.setblocking(False)
+            self.handler.observers.append(sock)
+            self.handler.selector.register(sock, EVENT_READ, lambda: self.handler.from_observer(sock))
+            self.handler.send_observer(sock, b"x" * 1_000_000)
+        assert not self.handler.observers
+        assert sock.fileno() == -1
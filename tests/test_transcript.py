@@ -0,0 +1,164 @@
+"""
+Tests for the transcript recorder and replayer.
+"""
+
+import json
+from time import monotonic, sleep
+from unittest.mock import patch
+
+import pytest
+import transcript
+from scrapli.transport.base import Transport
+from transcript import ReplayError, ReplayState, load_transcript
+from westermo_ser_lib import NetworkError, Westermo
+
+PROMPT = b"lynx:/#> "
+DEVICE = {
+    "host": "127.0.0.1",
+    "port": 23,
+    "auth_username": "admin",
+    "auth_password": "westermo",
+    "auth_bypass": True,
+    "platform": "westermo_weos",
+    "transport": "telnet",
+    "timeout_ops": 5,
+}
+
+
+def read_example(name):
+    """Return a file from return_examples/ without the echoed command and prompt."""
+    with open(f"return_examples/{name}") as f:
+        return f.read().split("\n", 1)[1].split("lynx:/#>")[0]
+
+
+class ScriptedTransport(Transport):
+    """Transport echoing input and answering commands like a switch."""
+
+    def __init__(self, base_transport_args, replies):
+        """Initialize the class."""
+        super().__init__(base_transport_args=base_transport_args)
+        self.replies = replies
+        self.pending = b""
+        self.line = b""
+
+    def open(self):
+        """Show the first prompt."""
+        self.pending = PROMPT
+
+    def close(self):
+        """Nothing to close."""
+
+    def isalive(self):
+        """Always alive."""
+        return True
+
+    def read(self):
+        """Return what the switch printed since the last read."""
+        if not self.pending:
+            sleep(0.001)
+        data, self.pending = self.pending, b""
+        return data
+
+    def write(self, channel_input):
+        """Echo input and answer complete lines."""
+        if channel_input == b"\n":
+            reply = self.replies.get(self.line.decode(), "")
+            self.pending += b"\n" + reply.encode() + (b"\n" if reply else b"") + PROMPT
+            self.line = b""
+        else:
+            self.line += channel_input
+            self.pending += channel_input
+
+
+def record_session(path, replies):
+    """Run a Westermo session against the scripted transport and record it."""
+    real_attach = transcript.attach_recorder
+
+    def attach(conn, transcript_path):
+        conn.transport = conn.channel.transport = ScriptedTransport(conn.transport._base_transport_args, replies)
+        real_attach(conn, transcript_path)
+
+    with patch("westermo_ser_lib.attach_recorder", side_effect=attach):
+        with Westermo(record=path, **DEVICE) as switch:
+            return switch.get_uptime(), switch.get_ports()
+
+
+class TestReplayState:
+    """Test the ordering of recorded chunks."""
+
+    def test_chunks_wait_for_writes(self):
+        """Test that a received chunk is only released after the writes before it."""
+        state = ReplayState([(0.0, "in", b"a"), (0.1, "out", b"x"), (0.2, "in", b"b")])
+
+        assert state.next_chunk() == (0.0, b"a")
+        assert state.next_chunk() == (0.0, b"")
+        state.write(b"x")
+        assert state.next_chunk() == (0.0, b"b")
+        assert state.finished
+        with pytest.raises(ReplayError, match="exhausted"):
+            state.next_chunk()
+
+    def test_strict_writes(self):
+        """Test that an unexpected write is rejected unless lenient."""
+        with pytest.raises(ReplayError, match="expects"):
+            ReplayState([(0.0, "out", b"show port")]).write(b"show alarm")
+        ReplayState([(0.0, "out", b"show port")], strict=False).write(b"show alarm")
+
+    def test_secrets_redacted(self, tmp_path):
+        """Test that passwords are not written and still match on replay."""
+        path = str(tmp_path / "session.jsonl")
+        writer = transcript.TranscriptWriter(path, {}, secrets=(b"westermo",))
+        writer.event("out", b"westermo\n")
+        writer.close()
+
+        _, events = load_transcript(path)
+        assert events == [(events[0][0], "out", b"<redacted>\n")]
+        ReplayState(events, secrets=(b"westermo",)).write(b"westermo\n")
+
+    def test_recorded_pace(self):
+        """Test that speed 1.0 keeps the recorded timing."""
+        state = ReplayState([(0.05, "in", b"a")], speed=1.0)
+        state.start = monotonic()
+        delay, _ = state.next_chunk()
+        assert 0.03 < delay <= 0.05
+
+
+class TestRecordReplay:
+    """Test recording a session and replaying it through Westermo."""
+
+    REPLIES = {
+        "uptime": "12:34:56 up 5 days",
+        "show port": read_example("show_port.txt"),
+    }
+
+    def test_round_trip(self, tmp_path):
+        """Test that a replayed session gives the recorded results without a switch."""
+        path = str(tmp_path / "session.jsonl")
+        uptime, ports = record_session(path, self.REPLIES)
+
+        header, events = load_transcript(path)
+        assert header["transcript"] == 1
+        assert header["transport"] == "telnet"
+        assert next(data for _, direction, data in events if direction == "in").startswith(PROMPT)
+
+        with Westermo(replay=path, **DEVICE) as switch:
+            assert switch.get_uptime() == uptime == "12:34:56"
+            assert switch.get_ports() == ports
+            assert len(ports) == 10
+
+    def test_divergent_session(self, tmp_path):
+        """Test that a session asking something else than recorded fails."""
+        path = str(tmp_path / "session.jsonl")
+        record_session(path, self.REPLIES)
+
+        with Westermo(replay=path, **DEVICE) as switch:
+            with pytest.raises(NetworkError):
+                switch.get_ports()
+
+    def test_not_a_transcript(self, tmp_path):
+        """Test that other files are rejected."""
+        path = tmp_path / "other.jsonl"
+        path.write_text(json.dumps({"hello": 1}) + "\n")
+
+        with pytest.raises(ReplayError):
+            load_transcript(str(path))
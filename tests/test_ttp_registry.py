@@ -0,0 +1,45 @@
+"""
+Tests for the compiled TTP template registry.
+"""
+
+from scrapli.helper import ttp_parse
+from ttp_registry import TemplateRegistry
+
+
+class TestTemplateRegistry:
+    """Test template compilation and reuse."""
+
+    def test_parse_matches_ttp_parse(self):
+        """Test that the registry returns the same result as scrapli's ttp_parse."""
+        registry = TemplateRegistry()
+        for template, example in [
+            ("ttp_templates/ports.txt", "return_examples/show_port.txt"),
+            ("ttp_templates/show_ifaces.txt", "return_examples/show_ifaces.txt"),
+            ("ttp_templates/system-information.txt", "return_examples/system-information.txt"),
+        ]:
+            with open(example) as f:
+                output = f.read()
+            assert registry.parse(template, output) == ttp_parse(template, output)
+
+    def test_template_compiled_once(self):
+        """Test that repeated parses reuse the compiled template."""
+        registry = TemplateRegistry()
+        registry.parse("ttp_templates/show_ifaces.txt", "")
+        parser = registry._parsers["ttp_templates/show_ifaces.txt"]
+
+        with open("return_examples/show_ifaces.txt") as f:
+            result = registry.parse("ttp_templates/show_ifaces.txt", f.read())
+
+        assert registry._parsers["ttp_templates/show_ifaces.txt"] is parser
+        assert result[0][1]["secondary_ip"] == "169.254.232.177"
+
+    def test_stats(self):
+        """Test that parse calls and times are reported per template."""
+        registry = TemplateRegistry()
+        registry.parse("ttp_templates/show_frnt.txt", "")
+        registry.parse("ttp_templates/show_frnt.txt", "")
+
+        stats = registry.stats()["ttp_templates/show_frnt.txt"]
+        assert stats["calls"] == 2
+        assert stats["total_time"] >= stats["max_time"] > 0
+        assert stats["mean_time"] == stats["total_time"] / 2
@@ -0,0 +1,104 @@
+"""
+Tests for the WeOS config parser and structural diff.
+"""
+
+from time import perf_counter
+
+from weos_config import ConfigChange, changed_sections, diff_configs, format_changes, parse_config
+
+
+def read_config(name):
+    """Return a stored .cfg file."""
+    with open(name) as f:
+        return f.read()
+
+
+class TestParseConfig:
+    """Test parsing config text into a tree."""
+
+    def test_sections_and_settings(self):
+        """Test that sections, nested sections and top level settings are indexed."""
+        tree = parse_config(read_config("startup_config.cfg"))
+
+        assert tree["system"].section is True
+        assert "hostname lynx" in tree["system"]
+        assert tree.find("alarm", "action 1", "target snmp log led digout") is not None
+        assert tree["no spanning-tree"].section is False
+        assert tree.find("ntp", "server pool.ntp.org").section is True
+        assert tree.find("system", "missing") is None
+
+    def test_footer_and_comments_skipped(self):
+        """Test that comments, the pager line and the footer are not config lines."""
+        tree = parse_config(read_config("startup_config.cfg"))
+
+        assert not any(key.startswith(("#", "_", "cfg://")) for key in tree.children)
+        assert "Press Ctrl-C to abort" not in parse_config("Press Ctrl-C to abort\nsystem\n        end\n")
+
+    def test_render_round_trip(self):
+        """Test that rendering gives a config that parses to the same tree."""
+        tree = parse_config(read_config("running_config.cfg"))
+        assert parse_config("\n".join(tree.render())) == tree
+
+    def test_duplicate_lines(self):
+        """Test that a repeated line in one section is kept."""
+        tree = parse_config("ip\n        route 0.0.0.0/0 10.0.0.1\n        route 0.0.0.0/0 10.0.0.1\n        end\n")
+        assert list(tree["ip"].children) == ["route 0.0.0.0/0 10.0.0.1", "route 0.0.0.0/0 10.0.0.1 #2"]
+
+    def test_line_like_numbered_repeat(self):
+        """Test a line that reads like a numbered repeat does not clash with the repeats."""
+        tree = parse_config("x #2\nx\nx\nx\n")
+        assert list(tree.children) == ["x #2", "x", "x #3", "x #4"]
+
+    def test_many_repeated_lines(self):
+        """Test a large repeated block is parsed in linear time."""
+        config = "ip\n" + "        route 0.0.0.0/0 10.0.0.1\n" * 40000 + "        end\n"
+        start = perf_counter()
+        tree = parse_config(config)
+        assert perf_counter() - start < 2
+        assert len(tree["ip"].children) == 40000
+        assert "route 0.0.0.0/0 10.0.0.1 #40000" in tree["ip"]
+
+
+class TestDiffConfigs:
+    """Test the structural diff."""
+
+    def test_running_vs_startup(self):
+        """Test that the stored configs differ by the two alarm triggers."""
+        changes = diff_configs(read_config("startup_config.cfg"), read_config("running_config.cfg"))
+
+        assert changes == [
+            ConfigChange("added", ("alarm",), new="trigger 1 link-alarm"),
+            ConfigChange("added", ("alarm",), new="trigger 2 link-alarm"),
+        ]
+        assert changed_sections(changes) == ["alarm"]
+        assert format_changes(changes) == "alarm: + trigger 1 link-alarm\nalarm: + trigger 2 link-alarm"
+
+    def test_equal_configs(self):
+        """Test that whitespace and footer differences are not changes."""
+        startup = read_config("startup_config.cfg")
+        assert diff_configs(startup, startup.replace("\n", "  \n")) == []
+
+    def test_changed_removed_and_added(self):
+        """Test value changes, removed settings and new sections."""
+        old = "system\n        hostname lynx\n        location hall\n        end\nno spanning-tree\n"
+        new = "system\n        hostname puma\n        end\nspanning-tree\n        mode rstp\n        end\n"
+
+        changes = diff_configs(old, new)
+
+        assert changes == [
+            ConfigChange("changed", ("system",), "hostname lynx", "hostname puma"),
+            ConfigChange("removed", ("system",), old="location hall"),
+            ConfigChange("removed", (), old="no spanning-tree"),
+            ConfigChange("added", (), new="spanning-tree"),
+        ]
+        assert changed_sections(changes) == ["system", "no spanning-tree", "spanning-tree"]
+        assert str(changes[0]) == "system: hostname lynx -> hostname puma"
+
+    def test_large_config(self):
+        """Test a config with thousands of sections."""
+        old = "".join(f"port {n}\n        speed-duplex auto\n        end\n" for n in range(3000))
+        new = old.replace("port 1500\n        speed-duplex auto", "port 1500\n        speed-duplex 100-full")
+
+        assert diff_configs(old, new) == [
+            ConfigChange("changed", ("port 1500",), "speed-duplex auto", "speed-duplex 100-full")
+        ]
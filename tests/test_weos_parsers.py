@@ -0,0 +1,65 @@
+"""
+Tests for the native WeOS parsers.
+These compare against the TTP templates on the stored examples.
+"""
+
+import pytest
+import weos_parsers
+from ttp_registry import parse_output
+from westermo_ser_lib import (
+    TEMPLATE_IFACES,
+    TEMPLATE_PORTS,
+    TEMPLATE_SYSINFO,
+    _process_ifaces,
+    _process_ports,
+    _process_sysinfo,
+)
+
+
+def read_example(name):
+    """Return a file from return_examples/."""
+    with open(f"return_examples/{name}") as f:
+        return f.read()
+
+
+class TestNativeParsers:
+    """Test the native parsers against TTP."""
+
+    def test_ports_match_ttp(self):
+        """Test that show port gives the same ports as the TTP path."""
+        output = read_example("show_port.txt")
+        assert weos_parsers.parse_ports(output) == _process_ports(parse_output(TEMPLATE_PORTS, output))
+
+    def test_ifaces_match_ttp(self):
+        """Test that show ifaces gives the same interfaces as the TTP path."""
+        output = read_example("show_ifaces.txt")
+        assert weos_parsers.parse_ifaces(output) == _process_ifaces(parse_output(TEMPLATE_IFACES, output))
+
+    def test_sysinfo_match_ttp(self):
+        """Test that system information matches TTP, plus the date TTP can't read."""
+        output = read_example("system-information.txt")
+        expected = _process_sysinfo(parse_output(TEMPLATE_SYSINFO, output))
+        expected["hw_dom"] = "Jun 28, 2023"
+        assert weos_parsers.parse_sysinfo(output) == expected
+
+    def test_sysinfo_phrase_location(self):
+        """Test that values with spaces are kept whole and empty values left out."""
+        output = (
+            "System Name        : sw1\n"
+            "System Contact     : \n"
+            "System Location    : Building A Room 1\n"
+        )
+        assert weos_parsers.parse_sysinfo(output) == {"system_name": "sw1", "system_location": "Building A Room 1"}
+
+    @pytest.mark.parametrize(
+        "parser",
+        [weos_parsers.parse_ports, weos_parsers.parse_ifaces, weos_parsers.parse_sysinfo],
+    )
+    def test_unrecognised_output(self, parser):
+        """Test that unknown output is left to the TTP fallback."""
+        assert parser("% Unknown command") is None
+
+    def test_unknown_port_row(self):
+        """Test that a port row in an unknown layout is left to TTP."""
+        output = read_example("show_port.txt") + "Eth 11   UP  weird row\n"
+        assert weos_parsers.parse_ports(output) is None
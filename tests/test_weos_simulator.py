@@ -0,0 +1,226 @@
+"""
+Tests for the simulated WeOS switch.
+"""
+
+import asyncio
+import os
+import socket
+import tty
+from select import select
+from time import monotonic
+
+import pytest
+from alarm_monitor import AlarmMonitor
+from weos_config import parse_config
+from weos_parsers import parse_ports, parse_sysinfo
+from weos_simulator import PAGE_LINES, Link, SimulatedSwitch, Simulator
+from westermo_ser_lib import Westermo
+
+
+class TestSimulatedSwitch:
+    """Tests for the command interpreter."""
+
+    def setup_method(self):
+        """Set up a switch for each test."""
+        self.switch = SimulatedSwitch()
+
+    def test_prompts(self):
+        """Test the prompts follow the configuration mode."""
+        assert self.switch.handle_line("") == "lynx:/#> "
+        assert self.switch.handle_line("configure").endswith("lynx:/config/#> ")
+        assert self.switch.handle_line("iface vlan1 inet static address 10.0.0.1/24").endswith(
+            "lynx:/config/iface-vlan1/#> "
+        )
+        assert self.switch.handle_line("exit").endswith("lynx:/config/#> ")
+        assert self.switch.handle_line("leave").endswith("lynx:/#> ")
+
+    def test_unknown_command_fails(self):
+        """Test unknown commands contain the platform failure marker."""
+        assert "not found." in self.switch.handle_line("shw port")
+
+    def test_viewer_prefix_only_in_interactive_mode(self):
+        """Test show port has the pager line in interactive mode only."""
+        assert self.switch.handle_line("show port").startswith("Press Ctrl-C")
+        self.switch.handle_line("batch")
+        assert self.switch.handle_line("show port").startswith("Ethernet")
+
+    def test_long_viewer_output_is_paged(self):
+        """Test interactive mode stops long output at each page until a key is pressed."""
+        config = self.switch.render_config(self.switch.running).split("\n")
+        first = self.switch.handle_line("show running-config")
+        assert first.endswith(config[PAGE_LINES - 1])
+        assert self.switch.page("\r") == "\n" + config[PAGE_LINES]
+        assert self.switch.page(" ").endswith(config[-1] + "\nlynx:/#> ")
+        assert self.switch.pager is None
+
+        self.switch.handle_line("show running-config")
+        assert self.switch.page("q") == "\nlynx:/#> "
+        self.switch.handle_line("batch")
+        assert self.switch.handle_line("show running-config").endswith(config[-1] + "\nlynx:/#> ")
+
+    def test_hostname_and_location(self):
+        """Test the setters change the system information and the prompt."""
+        self.switch.handle_line("configure")
+        self.switch.handle_line("system hostname core1")
+        self.switch.handle_line("system location 'Rack 4'")
+        assert self.switch.handle_line("leave").endswith("core1:/#> ")
+
+        sysinfo = parse_sysinfo(self.switch.show("show system-information"))
+        assert sysinfo["system_name"] == "core1"
+        assert sysinfo["system_location"] == "Rack 4"
+
+    def test_mac_unique_per_instance(self):
+        """Test every instance has its own base MAC address."""
+        assert SimulatedSwitch(1).mac != SimulatedSwitch(2).mac
+
+    def test_remove_secondary_asks_first(self):
+        """Test removing secondary addresses waits for confirmation."""
+        self.switch.handle_line("configure")
+        reply = self.switch.handle_line("iface vlan1 inet static no address secondary")
+        assert reply.endswith("are you sure (y/N)? ")
+        assert self.switch.running.secondary
+        self.switch.handle_line("y")
+        assert self.switch.running.secondary == []
+
+    def test_alarm_trigger_marks_down_ports(self):
+        """Test a link alarm on a down port shows in show port and show alarm."""
+        self.switch.handle_line("configure")
+        self.switch.handle_line("alarm trigger 1 link-alarm condition low port 1-10")
+        ports = {port["port"]: port for port in parse_ports(self.switch.show("show port"))}
+        assert ports[9]["alarm"] is True
+        assert ports[10]["alarm"] is False
+
+        entries = list(AlarmMonitor(history=10).feed({"host": "sim"}, self.switch.show("show alarm")))
+        assert entries[0]["active"] is True
+
+    def test_copy_run_start(self):
+        """Test the startup config follows the running config after a save."""
+        self.switch.handle_line("configure")
+        self.switch.handle_line("frnt 1 ring-ports 1,2")
+        self.switch.handle_line("leave")
+        assert "frnt 1" not in parse_config(self.switch.render_config(self.switch.startup))
+
+        self.switch.handle_line("copy run start")
+        startup = parse_config(self.switch.render_config(self.switch.startup))
+        assert startup["frnt 1"]["ring-ports 1,2"]
+
+
+class TestLink:
+    """Tests for the emulated line."""
+
+    def test_baud_paces_writes(self):
+        """Test 1000 bytes at 100000 baud take about 0.1 seconds."""
+        written = []
+
+        async def write(data):
+            written.append(data)
+
+        start = monotonic()
+        asyncio.run(Link(baud=100000).send(write, b"x" * 1000))
+        assert monotonic() - start >= 0.09
+        assert b"".join(written) == b"x" * 1000
+        assert len(written) > 1
+
+
+class TestSimulator:
+    """End to end tests through the scrapli telnet driver."""
+
+    def setup_method(self):
+        """Start two switches on free ports."""
+        self.simulator = Simulator(count=2, base_port=0, delay=0.0, baud=0).start_in_thread()
+
+    def teardown_method(self):
+        """Stop the switches."""
+        self.simulator.stop_thread()
+
+    def device(self, index):
+        """Return connection parameters for one simulated switch."""
+        host, port = self.simulator.endpoints[index]
+        return {
+            "host": host,
+            "port": port,
+            "auth_username": "admin",
+            "auth_password": "westermo",
+            "platform": "westermo_weos",
+            "transport": "telnet",
+            "timeout_ops": 5,
+        }
+
+    def test_rejects_wrong_password(self):
+        """Test the telnet login checks the password."""
+        host, port = self.simulator.endpoints[0]
+        with socket.create_connection((host, port), timeout=5) as sock:
+            assert sock.recv(64).endswith(b"login: ")
+            sock.sendall(b"admin\r\n")
+            data = b""
+            while not data.endswith(b"Password: "):
+                data += sock.recv(64)
+            sock.sendall(b"wrong\r\n")
+            data = b""
+            while b"login: " not in data:
+                data += sock.recv(64)
+            assert b"Login incorrect" in data
+
+    def test_westermo_session(self):
+        """Test a configuration session against a simulated switch."""
+        with Westermo(**self.device(0)) as switch:
+            snapshot = switch.get_snapshot()
+            assert snapshot.sysinfo["system_name"] == "lynx"
+            assert len(snapshot.ports) == 10
+
+            switch.set_hostname("sim0")
+            assert switch.compare_config() is False
+            assert switch.save_run2startup() is True
+            assert switch.compare_config() is True
+
+        assert self.simulator.switches[0].running.hostname == "sim0"
+        assert self.simulator.switches[1].running.hostname == "lynx"
+
+    def test_snapshot_in_batch_mode(self):
+        """Test a snapshot inside batch_mode leaves the switch in the tracked mode."""
+        switch_state = self.simulator.switches[0]
+        with Westermo(**self.device(0)) as switch:
+            with switch.batch_mode():
+                switch.compare_config()
+                switch.get_snapshot()
+                assert (switch.terminal_mode, switch_state.interactive) == ("batch", False)
+                # The long running config is read without the pager
+                assert switch.compare_config() is True
+            assert (switch.terminal_mode, switch_state.interactive) == ("interactive", True)
+            switch.get_snapshot()
+            assert (switch.terminal_mode, switch_state.interactive) == ("interactive", True)
+
+    def test_console_waits_for_input(self):
+        """Test a serial console stays quiet until woken and logs in again after a logout."""
+        master, slave = os.openpty()
+        try:
+            tty.setraw(slave)
+            self.simulator.start_console(master, index=1)
+
+            def read_until(suffix: bytes) -> bytes:
+                # Returns wake an idle console, input that arrives with the logout is dropped with the session
+                data = b""
+                deadline = monotonic() + 5
+                while not data.endswith(suffix):
+                    assert monotonic() < deadline, data
+                    if select([slave], [], [], 0.2)[0]:
+                        data += os.read(slave, 64)
+                    else:
+                        os.write(slave, b"\r")
+                return data
+
+            for _ in range(2):
+                read_until(b"login: ")
+                os.write(slave, b"admin\rwestermo\r")
+                assert read_until(b"#> ").endswith(self.simulator.switches[1].prompt.encode())
+                os.write(slave, b"logout\r")
+        finally:
+            os.close(slave)
+            os.close(master)
+
+    @pytest.mark.parametrize("index", [0, 1])
+    def test_instances_are_independent(self, index):
+        """Test each endpoint serves its own switch."""
+        with Westermo(**self.device(index)) as switch:
+            sysinfo = switch.get_sysinfo()
+        assert sysinfo["system_mac"] == self.simulator.switches[index].mac
@@ -0,0 +1,106 @@
+"""
+Tests for the asyncio Westermo client.
+These tests use MOCKING - we fake the network operations!
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from westermo_async_lib import AsyncWestermo
+from westermo_ser_lib import ConfigurationError, NetworkError, ValidationError
+
+
+class TestAsyncWestermo:
+    """Test AsyncWestermo device operations."""
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create an AsyncWestermo device with mocked connection."""
+        device = AsyncWestermo(host="10.0.0.1", port=23, platform="westermo_weos", transport="telnet")
+        device.conn = Mock()
+        device.conn.send_command = AsyncMock(return_value=Mock(failed=False, result=""))
+        device.conn.send_config = AsyncMock(return_value=Mock(failed=False, result=""))
+        device.conn.send_interactive = AsyncMock(return_value=Mock(failed=False, result=""))
+        return device
+
+    def test_async_transport(self, westermo_device):
+        """Test that sync transport names are mapped to scrapli async transports."""
+        assert westermo_device.DEVICE["transport"] == "asynctelnet"
+
+    def test_get_uptime(self, westermo_device):
+        """Test successful uptime retrieval."""
+        westermo_device.conn.send_command.return_value = Mock(failed=False, result="12:34:56 up 5 days")
+
+        assert asyncio.run(westermo_device.get_uptime()) == "12:34:56"
+        westermo_device.conn.send_command.assert_awaited_once_with("uptime")
+
+    def test_get_mgmt_ip(self, westermo_device):
+        """Test interface parsing through the template registry."""
+        with open("return_examples/show_ifaces.txt") as f:
+            westermo_device.conn.send_command.return_value = Mock(failed=False, result=f.read())
+
+        ifaces = asyncio.run(westermo_device.get_mgmt_ip())
+
+        assert ifaces[1]["iface_name"] == "vlan1"
+        assert ifaces[1]["secondary_ip"] == "169.254.232.177"
+
+    def test_set_hostname(self, westermo_device):
+        """Test hostname validation and failure handling."""
+        asyncio.run(westermo_device.set_hostname("SW-01"))
+        westermo_device.conn.send_config.assert_awaited_once_with("system hostname sw-01")
+
+        with pytest.raises(ValidationError):
+            asyncio.run(westermo_device.set_hostname("bad_name"))
+
+        westermo_device.conn.send_config.return_value = Mock(failed=True, result="error")
+        with pytest.raises(ConfigurationError):
+            asyncio.run(westermo_device.set_hostname("sw-02"))
+
+    def test_grouped_batch_mode(self, westermo_device):
+        """Test that batch reads in one batch_mode context switch the terminal mode once each way."""
+        westermo_device.terminal_mode = "interactive"
+
+        async def reads():
+            async with westermo_device.batch_mode():
+                await westermo_device.compare_config()
+                await westermo_device.save_config()
+                await westermo_device.get_event_log()
+
+        asyncio.run(reads())
+        modes = [
+            call.args[0]
+            for call in westermo_device.conn.send_command.await_args_list
+            if call.args[0] in ("interactive", "batch")
+        ]
+        assert modes == ["batch", "interactive"]
+        assert westermo_device.terminal_mode == "interactive"
+
+    def test_not_connected(self):
+        """Test that operations need an open connection."""
+        device = AsyncWestermo(host="10.0.0.1", platform="westermo_weos", transport="telnet")
+        with pytest.raises(NetworkError, match="Not connected"):
+            asyncio.run(device.get_uptime())
+
+    def test_concurrent_devices(self):
+        """Test that several devices run on one event loop."""
+
+        async def delayed_uptime(command):
+            await asyncio.sleep(0.05)
+            return Mock(failed=False, result="01:00:00 up")
+
+        devices = []
+        for host in range(20):
+            device = AsyncWestermo(host=f"10.0.0.{host}", platform="westermo_weos", transport="telnet")
+            device.conn = Mock()
+            device.conn.send_command = delayed_uptime
+            devices.append(device)
+
+        async def run_all():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await asyncio.gather(*(device.get_uptime() for device in devices))
+            return results, loop.time() - start
+
+        results, elapsed = asyncio.run(run_all())
+        assert results == ["01:00:00"] * 20
+        assert elapsed < 0.5
@@ -0,0 +1,122 @@
+"""
+Tests for the westermo-conf command line interface.
+"""
+
+import json
+import os
+import subprocess
+import termios
+import sys
+from unittest.mock import patch
+
+from fleet import FleetReport, ProvisionResult
+from tests.test_serial_discovery import console_at
+from weos_config import parse_config
+from weos_simulator import Simulator
+from westermo_conf import main
+
+
+class TestStartup:
+    """Tests for the import cost of the CLI."""
+
+    def test_heavy_modules_not_imported(self):
+        """Test that parsing arguments imports neither scrapli, ttp nor tkinter."""
+        code = (
+            "import sys, westermo_conf\n"
+            "westermo_conf.build_parser().parse_args(['facts', '10.0.0.1'])\n"
+            "print(sorted(m for m in ('scrapli', 'ttp', 'tkinter') if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
+
+class TestOffline:
+    """Tests that need no switch."""
+
+    def test_diff_files(self, tmp_path, capsys):
+        """Test comparing two config files."""
+        old = tmp_path / "old.cfg"
+        new = tmp_path / "new.cfg"
+        old.write_text("system\n        hostname lynx\n        end\n")
+        new.write_text("system\n        hostname core1\n        end\n")
+
+        assert main(["diff", "--files", str(old), str(new), "--json"]) == 1
+        changes = json.loads(capsys.readouterr().out)
+        assert changes[0]["kind"] == "changed"
+        assert changes[0]["new"] == "hostname core1"
+
+        assert main(["diff", "--files", str(old), str(old)]) == 0
+
+    def test_provision(self, capsys):
+        """Test provision passes the options to FleetProvisioner and reports failures."""
+        report = FleetReport(results=[ProvisionResult("cab01", "10.0.0.1", "cab01R", ok=False, error="Timed out")])
+        with patch("fleet.FleetProvisioner.run_file", return_value=report) as run_file:
+            assert main(["provision", "site.csv", "--reserve", "--workers", "4", "--json"]) == 1
+        run_file.assert_called_once_with("site.csv")
+        data = json.loads(capsys.readouterr().out)
+        assert data["results"][0]["error"] == "Timed out"
+
+    def test_discover(self, capsys):
+        """Test discover reports the speed of each console and fails when none answers."""
+        master, slave = os.openpty()
+        port = os.ttyname(slave)
+        try:
+            with console_at(termios.B9600, master, slave):
+                assert main(["discover", port, "--baud-rates", "115200,9600", "--probe-timeout", "0.2", "--json"]) == 0
+            probes = json.loads(capsys.readouterr().out)
+            assert (probes[0]["port"], probes[0]["baud"], probes[0]["found"]) == (port, 9600, True)
+
+            assert main(["discover", port, "--baud-rates", "115200", "--probe-timeout", "0.1"]) == 1
+            assert "no switch" in capsys.readouterr().out
+        finally:
+            os.close(master)
+            os.close(slave)
+
+
+class TestSimulated:
+    """End to end tests against a simulated switch."""
+
+    def setup_method(self):
+        """Start a simulated switch on a free port."""
+        self.simulator = Simulator(count=1, base_port=0, delay=0.0, baud=0).start_in_thread()
+        self.host, self.port = self.simulator.endpoints[0]
+
+    def teardown_method(self):
+        """Stop the simulated switch."""
+        self.simulator.stop_thread()
+
+    def options(self):
+        """Return the connection options for the simulated switch."""
+        return ["--port", str(self.port), "--transport", "telnet", "--timeout", "5"]
+
+    def test_facts_json(self, capsys):
+        """Test facts reads the snapshot of the switch."""
+        assert main(["facts", self.host, "--json", *self.options()]) == 0
+        facts = json.loads(capsys.readouterr().out)
+        assert facts[0]["ok"] is True
+        assert facts[0]["sysinfo"]["system_mac"] == self.simulator.switches[0].mac
+        assert len(facts[0]["ports"]) == 10
+
+    def test_backup_and_diff(self, tmp_path, capsys):
+        """Test backup writes <hostname>.cfg and diff shows unsaved changes."""
+        assert main(["backup", self.host, "--directory", str(tmp_path), *self.options()]) == 0
+        assert parse_config((tmp_path / "lynx.cfg").read_text())["system"]["hostname lynx"]
+        capsys.readouterr()
+
+        assert main(["diff", self.host, *self.options()]) == 0
+        assert "saved" in capsys.readouterr().out
+
+        switch = self.simulator.switches[0]
+        for line in ("configure", "system hostname core1", "leave"):
+            switch.handle_line(line)
+        assert main(["diff", self.host, *self.options()]) == 1
+        assert "1 unsaved changes" in capsys.readouterr().out
+
+    def test_failed_host(self, capsys):
+        """Test a host that cannot be reached is reported as failed."""
+        stopped = Simulator(count=1, base_port=0).start_in_thread()
+        port = stopped.endpoints[0][1]
+        stopped.stop_thread()
+
+        assert main(["facts", self.host, "--port", str(port), "--transport", "telnet", "--timeout", "2"]) == 1
+        assert "FAILED" in capsys.readouterr().out
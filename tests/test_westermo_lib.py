@@ -4,8 +4,25 @@ These tests use MOCKING - we fake the network operations!
 """
 
 import pytest
+from threading import Event
+from time import monotonic
 from unittest.mock import Mock, patch, MagicMock
-from westermo_ser_lib import Westermo, NetworkError, ValidationError, ConfigurationError, ParseError
+from westermo_ser_lib import (
+    Westermo,
+    NetworkError,
+    ValidationError,
+    ConfigurationError,
+    ParseError,
+    SNAPSHOT_COMMANDS,
+    config_digest,
+    normalize_config,
+)
+
+
+def load_example(name):
+    """Return the command output captured in return_examples/, without echo and prompt."""
+    with open(f"return_examples/{name}") as f:
+        return f.read().split("\n", 1)[1].split("lynx:/#>")[0].strip("\n")
 
 
 class TestWestermoDevice:
@@ -66,7 +83,7 @@ class TestWestermoDevice:
         # Setup mock response with empty parsed data
         mock_response = Mock()
         mock_response.failed = False
-        mock_response.ttp_parse_output.return_value = []  # Empty result
+        mock_response.result = ""  # Nothing to parse
         mock_connection.send_command.return_value = mock_response
 
         # Call the method and expect parse error
@@ -90,3 +107,326 @@ class TestWestermoDevice:
 
             uptime = westermo_device.get_uptime()
             assert uptime == expected, f"Failed for input: {input_str}"
+
+
+class TestWestermoSnapshot:
+    """Test the batched snapshot exchange."""
+
+    PROMPT = "lynx:/#> "
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device with a mocked channel."""
+        device = Westermo(
+            host="127.0.0.1",
+            port=22,
+            auth_username="admin",
+            auth_password="westermo",
+            platform="westermo_weos",
+            transport="system",
+        )
+        device.conn = MagicMock()
+        device.conn.comms_prompt_pattern = r"(^[\w]*:\/#>)|(\w+:\/config\/(?:[\w-]+\/)*#>\s*)"
+        device.conn.comms_return_char = "\n"
+        device.conn.timeout_ops = 5
+        return device
+
+    def channel_output(self, replies):
+        """Build the echoed channel output for command/reply pairs."""
+        return "".join(f"{command}\n{reply}\n{self.PROMPT}" for command, reply in replies)
+
+    def test_send_batch_splits_output(self, westermo_device):
+        """Test that one write returns the output of every command."""
+        output = self.channel_output([("uptime", "12:34:56 up 5 days"), ("show frnt", "")]).encode()
+        westermo_device.conn.channel.read.side_effect = [output[:20], output[20:]]
+
+        outputs = westermo_device._send_batch(["uptime", "show frnt"])
+
+        assert outputs == ["12:34:56 up 5 days", ""]
+        westermo_device.conn.channel.write.assert_called_once_with(channel_input="uptime\nshow frnt")
+
+    def test_get_snapshot(self, westermo_device):
+        """Test that the snapshot parses every output from one exchange."""
+        frnt = (
+            " Rid  Ver   Status     Cnt   Mode       Port 1               Port 2\n"
+            "===============================================================================\n"
+            "   1   0    Broken       0   Member     Eth 1 Down           Eth 2 Down\n"
+        )
+        replies = {
+            "show system-information": load_example("system-information.txt"),
+            "uptime": "12:34:56 up 5 days",
+            "show port": load_example("show_port.txt"),
+            "show ifaces": load_example("show_ifaces.txt"),
+            "show frnt": frnt,
+            "show startup-config": "system\n    hostname lynx\n    end\n\n\n" + "_" * 78 + "\ncfg://config0.cfg",
+            "show running-config": "system\n    hostname lynx\n    end",
+        }
+        output = self.channel_output((command, replies.get(command, "")) for command in SNAPSHOT_COMMANDS)
+        westermo_device.conn.channel.read.return_value = output.encode()
+
+        snapshot = westermo_device.get_snapshot()
+
+        assert snapshot.sysinfo["system_name"] == "lynx"
+        assert snapshot.uptime == "12:34:56"
+        assert len(snapshot.ports) == 10
+        assert snapshot.ports[9] == {
+            "port": 10,
+            "link": True,
+            "type": "10/100TX",
+            "speed": "100M-Full",
+            "state": "Forwarding",
+            "alarm": False,
+            "vid": 1,
+            "mac_address": "00:11:b4:5e:e0:8a",
+        }
+        assert snapshot.mgmt_ip == "169.254.232.177"
+        assert snapshot.frnt[1]["mode"] == "Member"
+        assert snapshot.config_saved is True
+        westermo_device.conn.channel.write.assert_called_once()
+        assert westermo_device.terminal_mode == "interactive"
+
+    def test_snapshot_in_batch_mode(self, westermo_device):
+        """Test that a snapshot of a session in batch mode sends no mode switches and keeps batch mode."""
+        commands = [command for command in SNAPSHOT_COMMANDS if command not in ("batch", "interactive")]
+        replies = {
+            "show system-information": load_example("system-information.txt"),
+            "uptime": "12:34:56 up 5 days",
+            "show port": load_example("show_port.txt"),
+            "show ifaces": load_example("show_ifaces.txt"),
+        }
+        output = self.channel_output((command, replies.get(command, "")) for command in commands)
+        westermo_device.conn.channel.read.return_value = output.encode()
+        westermo_device.terminal_mode = "batch"
+
+        westermo_device.get_snapshot()
+
+        westermo_device.conn.channel.write.assert_called_once_with(channel_input="\n".join(commands))
+        assert westermo_device.terminal_mode == "batch"
+
+    def test_send_batch_timeout(self, westermo_device):
+        """Test that a missing prompt raises NetworkError."""
+        westermo_device.conn.timeout_ops = 0
+        westermo_device.conn.channel.read.return_value = b"no prompt here"
+
+        with pytest.raises(NetworkError, match="Timed out"):
+            westermo_device._send_batch(["uptime"])
+
+
+class TestWestermoReadCache:
+    """Test the opt-in read cache for show commands."""
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device with the read cache enabled."""
+        device = Westermo(
+            read_cache=True,
+            cache_ttls={"show ifaces": 60, "show port": 60},
+            host="127.0.0.1",
+            port=22,
+            platform="westermo_weos",
+            transport="system",
+        )
+        device.conn = Mock()
+        response = Mock()
+        response.failed = False
+        response.result = load_example("show_ifaces.txt")
+        device.conn.send_command.return_value = response
+        device.conn.send_config.return_value = Mock(failed=False, result="")
+        return device
+
+    def test_cache_hit(self, westermo_device):
+        """Test that a repeated show command is answered from the cache."""
+        first = westermo_device.get_mgmt_ip()
+        second = westermo_device.get_mgmt_ip()
+
+        assert first == second
+        westermo_device.conn.send_command.assert_called_once_with("show ifaces")
+        assert westermo_device.cache_stats()["commands"]["show ifaces"] == {"hits": 1, "misses": 1}
+
+    def test_write_invalidates_affected_command(self, westermo_device):
+        """Test that a write only drops the cache entries it affects."""
+        westermo_device.get_mgmt_ip()
+        westermo_device.set_hostname("switch1")
+        westermo_device.get_mgmt_ip()
+        assert westermo_device.conn.send_command.call_count == 1
+
+        westermo_device.set_mgmt_ip("10.0.0.5")
+        westermo_device.get_mgmt_ip()
+        assert westermo_device.conn.send_command.call_count == 2
+
+    def test_uncached_command_and_failures(self, westermo_device):
+        """Test that commands without TTL and failed responses are not cached."""
+        westermo_device.get_uptime()
+        westermo_device.get_uptime()
+        assert westermo_device.conn.send_command.call_count == 2
+
+        westermo_device.conn.send_command.return_value = Mock(failed=True, result="error")
+        with pytest.raises(NetworkError):
+            westermo_device.get_ports()
+        with pytest.raises(NetworkError):
+            westermo_device.get_ports()
+        assert westermo_device.conn.send_command.call_count == 4
+
+    def test_cache_disabled_by_default(self):
+        """Test that the cache is off unless requested."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        assert device.cache is None
+        assert device.cache_stats() == {}
+
+
+class TestWestermoConfigDigest:
+    """Test the digest based running vs startup config comparison."""
+
+    STARTUP = "Press Ctrl-C to abort\nsystem\n    hostname lynx\n    end\n\n\n" + "_" * 78 + "\ncfg://config0.cfg"
+    RUNNING = "system  \n    hostname lynx\n    end  \n"
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device with config digests enabled."""
+        device = Westermo(config_digest=True, host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        device.conn = Mock()
+        configs = {"show startup-config": self.STARTUP, "show running-config": self.RUNNING}
+        device.conn.send_command.side_effect = lambda command: Mock(failed=False, result=configs.get(command, ""))
+        device.conn.send_config.return_value = Mock(failed=False, result="")
+        return device
+
+    def sent(self, device, command):
+        """Count how often a command was sent."""
+        return sum(call.args[0] == command for call in device.conn.send_command.call_args_list)
+
+    def test_normalize_config(self):
+        """Test that pager line, footer and whitespace do not affect the digest."""
+        assert normalize_config(self.STARTUP) == normalize_config(self.RUNNING)
+        assert config_digest(self.STARTUP) == config_digest(self.RUNNING)
+        assert config_digest(self.RUNNING) != config_digest(self.RUNNING.replace("lynx", "puma"))
+
+    def test_compare_uses_fresh_digests(self, westermo_device):
+        """Test that configs are only downloaded again after a write."""
+        assert westermo_device.compare_config() is True
+        assert westermo_device.compare_config() is True
+        assert self.sent(westermo_device, "show running-config") == 1
+
+        westermo_device.set_hostname("switch1")
+        westermo_device.compare_config()
+        assert self.sent(westermo_device, "show running-config") == 2
+        assert self.sent(westermo_device, "show startup-config") == 1
+
+    def test_diff_config(self, westermo_device):
+        """Test that the unsaved changes are reported by section and refresh the digests."""
+        westermo_device.conn.send_command.side_effect = lambda command: Mock(
+            failed=False, result=self.RUNNING.replace("lynx", "puma") if command == "show running-config" else self.STARTUP
+        )
+
+        changes = westermo_device.diff_config()
+
+        assert [str(change) for change in changes] == ["system: hostname lynx -> hostname puma"]
+        assert westermo_device.compare_config() is False
+        assert self.sent(westermo_device, "show running-config") == 1
+
+    def test_invalidate_all_drops_digests(self, westermo_device):
+        """Test that invalidating all commands drops both digests."""
+        westermo_device.compare_config()
+        westermo_device._invalidate("*")
+        assert westermo_device._fresh_digests() == {}
+
+    def test_digest_disabled_by_default(self):
+        """Test that digests are off unless requested."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        assert device.digests is None
+        assert device._snapshot_commands() == (list(SNAPSHOT_COMMANDS), {})
+
+
+class TestWestermoBridgeStart:
+    """Test that the telnet to serial bridge is started once and waited for."""
+
+    DEVICE = {"host": "127.0.0.1", "port": 2323, "platform": "westermo_weos", "transport": "telnet"}
+
+    def test_started_once(self):
+        """Test that a second client reuses the running bridge."""
+        stop = Event()
+
+        def run():
+            stop.wait()
+            raise OSError("stopped")
+
+        with patch("westermo_ser_lib.Handler") as handler, patch("westermo_ser_lib._bridge_ready", None):
+            handler.return_value.run.side_effect = run
+            first = Westermo(**self.DEVICE)
+            Westermo(**self.DEVICE)
+            assert handler.call_count == 1
+            assert first.start_bridge() is True
+            stop.set()
+
+    def test_failed_bridge_does_not_wait(self):
+        """Test that a bridge failing to start is reported without waiting for the timeout."""
+        failing = patch("westermo_ser_lib.Handler", side_effect=SystemExit(1))
+        with failing, patch("westermo_ser_lib._bridge_ready", None):
+            device = Westermo(**{**self.DEVICE, "port": 22})
+            start = monotonic()
+            assert device.start_bridge() is False
+            assert monotonic() - start < 1
+
+
+class TestWestermoTerminalMode:
+    """Test that the terminal mode is only switched when it changes."""
+
+    @pytest.fixture
+    def westermo_device(self):
+        """Create a Westermo device in interactive mode, as after the platform on_open."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        device.conn = Mock()
+        device.conn.send_command.side_effect = lambda command: Mock(failed=False, result="")
+        device.terminal_mode = "interactive"
+        return device
+
+    def modes(self, device):
+        """Return the mode commands sent, in order."""
+        return [
+            call.args[0] for call in device.conn.send_command.call_args_list if call.args[0] in ("interactive", "batch")
+        ]
+
+    def test_repeated_mode_not_sent(self, westermo_device):
+        """Test that selecting the current mode sends nothing."""
+        westermo_device.set_interactive(True)
+        assert self.modes(westermo_device) == []
+
+    def test_single_batch_operation(self, westermo_device):
+        """Test that one batch read switches to batch and back once."""
+        westermo_device.save_config()
+        assert self.modes(westermo_device) == ["batch", "interactive"]
+        assert westermo_device.terminal_mode == "interactive"
+
+    def test_grouped_batch_operations(self, westermo_device):
+        """Test that batch reads in one batch_mode context share one switch."""
+        with westermo_device.batch_mode():
+            westermo_device.compare_config()
+            westermo_device.save_config()
+            westermo_device.get_event_log()
+            assert westermo_device.terminal_mode == "batch"
+
+        assert self.modes(westermo_device) == ["batch", "interactive"]
+
+    def test_failed_read_restores_mode(self, westermo_device):
+        """Test that interactive mode is restored after a failed batch read."""
+        westermo_device.conn.send_command.side_effect = lambda command: Mock(
+            failed=command.startswith("show"), result="Error"
+        )
+        with pytest.raises(NetworkError):
+            westermo_device.compare_config()
+        assert self.modes(westermo_device) == ["batch", "interactive"]
+
+    def test_failed_switch_forgets_mode(self, westermo_device):
+        """Test that the mode is sent again after a failed switch."""
+        westermo_device.conn.send_command.side_effect = lambda command: Mock(failed=command == "batch", result="")
+        westermo_device.set_interactive(False)
+        assert westermo_device.terminal_mode is None
+        westermo_device.set_interactive(True)
+        assert self.modes(westermo_device) == ["batch", "interactive"]
+
+    def test_connect_relies_on_platform_on_open(self):
+        """Test that opening a session sends no extra mode command."""
+        device = Westermo(host="127.0.0.1", port=22, platform="westermo_weos", transport="system")
+        with patch("westermo_ser_lib.Scrapli") as scrapli:
+            with device:
+                assert device.terminal_mode == "interactive"
+        scrapli.return_value.send_command.assert_not_called()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Record and replay the raw channel traffic of a Westermo session.
+
+Westermo(record="session.jsonl") writes every chunk the scrapli channel
+sends and receives, with its time since the session opened, to a
+transcript. Westermo(replay="session.jsonl") serves that transcript back
+through a replay transport, so the client runs without a switch, either
+as fast as possible or at the recorded pace.
+
+A transcript is a JSON lines file. The first line describes the session,
+every following line is one chunk:
+
+    {"transcript": 1, "host": "127.0.0.1", "transport": "telnet"}
+    {"t": 0.0021, "in": "lynx:/#> "}
+    {"t": 0.0105, "out": "show port"}
+
+Passwords are replaced by REDACTED in the transcript, and in what the
+client writes during a replay before it is compared.
+"""
+import json
+import logging
+from asyncio import sleep as async_sleep
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, TextIO
+
+from scrapli.transport.base import AsyncTransport, Transport  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_VERSION = 1
+REDACTED = b"<redacted>"
+
+
+class ReplayError(Exception):
+    """The client did not follow the recorded session."""
+
+
+def _text(data: bytes) -> str:
+    """Return bytes as text for JSON, latin-1 keeps every byte value."""
+    return data.decode("latin-1")
+
+
+def _redact(data: bytes, secrets: tuple[bytes, ...]) -> bytes:
+    """Replace every secret in the data by REDACTED."""
+    for secret in secrets:
+        data = data.replace(secret, REDACTED)
+    return data
+
+
+def _secrets(conn: Any) -> tuple[bytes, ...]:
+    """Return the passwords of a scrapli driver."""
+    passwords = (getattr(conn, "auth_password", ""), getattr(conn, "auth_secondary", ""))
+    return tuple(password.encode() for password in passwords if password)
+
+
+class TranscriptWriter:
+    """Append channel chunks to a transcript file as they happen."""
+
+    def __init__(self, path: str, header: dict, secrets: tuple[bytes, ...] = ()) -> None:
+        """Open the file and write the header.
+
+        Args:
+            path (str): Transcript file, overwritten
+            header (dict): Session description for the first line
+            secrets (tuple): Passwords to redact from sent data
+        """
+        self.path = path
+        self.secrets = secrets
+        self._lock = Lock()
+        self._file: TextIO = open(path, "w", encoding="utf-8")
+        self._file.write(json.dumps({"transcript": TRANSCRIPT_VERSION, **header}) + "\n")
+        self._start = monotonic()
+
+    def event(self, direction: str, data: bytes) -> None:
+        """Write one chunk, direction is "in" for received and "out" for sent."""
+        if not data:
+            return
+        if direction == "out":
+            data = _redact(data, self.secrets)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(json.dumps({"t": round(monotonic() - self._start, 6), direction: _text(data)}) + "\n")
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+                logger.info("Transcript written to %s", self.path)
+
+
+def load_transcript(path: str) -> tuple[dict, list[tuple[float, str, bytes]]]:
+    """Read a transcript file.
+
+    Args:
+        path (str): Transcript file
+
+    Returns:
+        tuple: Header dict and (time, direction, data) events in order
+
+    Raises:
+        ReplayError: If the file is not a transcript
+    """
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("transcript") != TRANSCRIPT_VERSION:
+            raise ReplayError(f"{path} is not a version {TRANSCRIPT_VERSION} transcript")
+
+        events = []
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            direction = "in" if "in" in event else "out"
+            events.append((event["t"], direction, event[direction].encode("latin-1")))
+    return header, events
+
+
+class ReplayState:
+    """Position in a transcript while replaying it.
+
+    Received chunks are released in order, but only once the client has
+    written everything that was sent before them in the recorded session.
+    """
+
+    def __init__(
+        self,
+        events: list[tuple[float, str, bytes]],
+        speed: float | None = None,
+        strict: bool = True,
+        secrets: tuple[bytes, ...] = (),
+    ) -> None:
+        """Initialize the class.
+
+        Args:
+            events (list): Events from load_transcript
+            speed (float): Replay pace, 1.0 is the recorded pace, None as fast as possible
+            strict (bool): Raise ReplayError when the client writes something else than recorded
+            secrets (tuple): Passwords the client writes, redacted in the transcript
+        """
+        self.speed = speed
+        self.strict = strict
+        self.secrets = secrets
+        self.outgoing = b""
+        self.incoming: list[tuple[float, int, bytes]] = []
+        for t, direction, data in events:
+            if direction == "out":
+                self.outgoing += data
+            else:
+                self.incoming.append((t, len(self.outgoing), data))
+        self.sent = 0
+        self.position = 0
+        self.start = monotonic()
+
+    def write(self, data: bytes) -> None:
+        """Match a client write against the recorded writes."""
+        data = _redact(data, self.secrets)
+        expected = self.outgoing[self.sent : self.sent + len(data)]
+        if self.strict and data != expected:
+            raise ReplayError(f"Client wrote {data!r}, transcript expects {expected!r}")
+        self.sent += len(data)
+
+    def next_chunk(self) -> tuple[float, bytes]:
+        """Return the seconds to wait and the next received chunk, empty if it needs a write first.
+
+        Raises:
+            ReplayError: If the transcript has no more received chunks
+        """
+        if self.position >= len(self.incoming):
+            raise ReplayError("Transcript exhausted")
+        t, sent_before, data = self.incoming[self.position]
+        if sent_before > self.sent:
+            return 0.0, b""
+        self.position += 1
+        delay = self.start + t / self.speed - monotonic() if self.speed else 0.0
+        return max(delay, 0.0), data
+
+    @property
+    def finished(self) -> bool:
+        """Return True if every recorded chunk was served."""
+        return self.position >= len(self.incoming)
+
+
+class ReplayTransport(Transport):
+    """Scrapli transport serving a transcript instead of a switch."""
+
+    def __init__(self, base_transport_args: Any, state: ReplayState) -> None:
+        """Initialize the class.
+
+        Args:
+            base_transport_args: Transport args of the transport being replaced
+            state (ReplayState): Transcript to serve
+        """
+        super().__init__(base_transport_args=base_transport_args)
+        self.state = state
+        self._open = False
+
+    def open(self) -> None:
+        """Start serving the transcript."""
+        self.state.start = monotonic()
+        self._open = True
+
+    def close(self) -> None:
+        """Stop serving the transcript."""
+        self._open = False
+
+    def isalive(self) -> bool:
+        """Return True while open."""
+        return self._open
+
+    def read(self) -> bytes:
+        """Return the next recorded chunk."""
+        delay, data = self.state.next_chunk()
+        if delay:
+            sleep(delay)
+        elif not data:
+            # The client reads before writing what the transcript expects
+            sleep(0.001)
+        return data
+
+    def write(self, channel_input: bytes) -> None:
+        """Check the write against the transcript."""
+        self.state.write(channel_input)
+
+
+class AsyncReplayTransport(AsyncTransport):
+    """ReplayTransport for scrapli's async drivers."""
+
+    def __init__(self, base_transport_args: Any, state: ReplayState) -> None:
+        """Initialize the class."""
+        super().__init__(base_transport_args=base_transport_args)
+        self.state = state
+        self._open = False
+
+    async def open(self) -> None:
+        """Start serving the transcript."""
+        self.state.start = monotonic()
+        self._open = True
+
+    def close(self) -> None:
+        """Stop serving the transcript."""
+        self._open = False
+
+    def isalive(self) -> bool:
+        """Return True while open."""
+        return self._open
+
+    async def read(self) -> bytes:
+        """Return the next recorded chunk."""
+        delay, data = self.state.next_chunk()
+        if delay or not data:
+            await async_sleep(delay or 0.001)
+        return data
+
+    def write(self, channel_input: bytes) -> None:
+        """Check the write against the transcript."""
+        self.state.write(channel_input)
+
+
+class RecordingTransport:
+    """Wrapper around a scrapli transport writing its traffic to a transcript."""
+
+    def __init__(self, transport: Any, writer: TranscriptWriter) -> None:
+        """Initialize the class."""
+        self.transport = transport
+        self.writer = writer
+
+    def __getattr__(self, name: str) -> Any:
+        """Pass everything else to the transport."""
+        return getattr(self.transport, name)
+
+    def read(self) -> bytes:
+        """Read from the transport and record the chunk."""
+        data = self.transport.read()
+        self.writer.event("in", data)
+        return data
+
+    def write(self, channel_input: bytes) -> None:
+        """Record the chunk and write it to the transport."""
+        self.writer.event("out", channel_input)
+        self.transport.write(channel_input)
+
+    def close(self) -> None:
+        """Close the transport and the transcript."""
+        try:
+            self.transport.close()
+        finally:
+            self.writer.close()
+
+
+class AsyncRecordingTransport(RecordingTransport):
+    """RecordingTransport for scrapli's async transports."""
+
+    async def read(self) -> bytes:
+        """Read from the transport and record the chunk."""
+        data = await self.transport.read()
+        self.writer.event("in", data)
+        return data
+
+
+def _swap_transport(conn: Any, transport: Any) -> None:
+    """Replace the transport of a scrapli driver that is not open yet."""
+    conn.transport = transport
+    conn.channel.transport = transport
+
+
+def attach_recorder(conn: Any, path: str) -> None:
+    """Record the session of a scrapli driver, call before open.
+
+    Args:
+        conn: Scrapli or AsyncScrapli driver
+        path (str): Transcript file, overwritten
+    """
+    header = {"host": conn.host, "transport": conn.transport_name}
+    writer = TranscriptWriter(path, header, _secrets(conn))
+    wrapper = AsyncRecordingTransport if isinstance(conn.transport, AsyncTransport) else RecordingTransport
+    _swap_transport(conn, wrapper(conn.transport, writer))
+    logger.info("Recording session to %s", path)
+
+
+def attach_replay(conn: Any, path: str, speed: float | None = None, strict: bool = True) -> ReplayState:
+    """Serve a transcript to a scrapli driver instead of the switch, call before open.
+
+    Args:
+        conn: Scrapli or AsyncScrapli driver, created with the recorded transport
+        path (str): Transcript file
+        speed (float): Replay pace, 1.0 is the recorded pace, None as fast as possible
+        strict (bool): Raise ReplayError when the client writes something else than recorded
+
+    Returns:
+        ReplayState: Replay position, e.g. to check that the whole transcript was used
+    """
+    _, events = load_transcript(path)
+    state = ReplayState(events, speed, strict, _secrets(conn))
+    replay = AsyncReplayTransport if isinstance(conn.transport, AsyncTransport) else ReplayTransport
+    _swap_transport(conn, replay(conn.transport._base_transport_args, state))
+    logger.info("Replaying session from %s", path)
+    return state
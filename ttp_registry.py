@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""Process wide registry of compiled TTP templates."""
+import logging
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
+from metrics import observe_parse
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_BASE = Path(__file__).resolve().parent
+
+
+class TemplateRegistry:
+    """Load and compile each TTP template once, and reuse it for every parse."""
+
+    def __init__(self) -> None:
+        """Initialize the class."""
+        self._lock = Lock()
+        self._parsers: dict = {}
+        self._stats: dict = {}
+
+    @staticmethod
+    def _resolve(template: str) -> Path:
+        """Return the template path, relative paths resolved against the project."""
+        path = Path(template)
+        if not path.is_absolute() and not path.exists():
+            path = TEMPLATE_BASE / path
+        return path
+
+    def _get(self, template: str) -> tuple:
+        """Return the compiled parser and its lock, compiling it on first use."""
+        with self._lock:
+            entry = self._parsers.get(template)
+            if entry is None:
+                from ttp import ttp  # type: ignore
+
+                start = perf_counter()
+                parser = ttp()
+                with open(self._resolve(template), "r", encoding="utf-8") as f:
+                    parser.add_template(template=f.read(), template_name=template)
+                entry = (parser, Lock())
+                self._parsers[template] = entry
+                self._stats[template] = {
+                    "compile_time": perf_counter() - start,
+                    "calls": 0,
+                    "total_time": 0.0,
+                    "max_time": 0.0,
+                }
+                logger.debug("Compiled template %s", template)
+            return entry
+
+    def parse(self, template: str, output: str) -> Any:
+        """Parse output with a compiled template.
+
+        Args:
+            template (str): Path of the template, as used by ttp_parse_output
+            output (str): Command output to parse
+
+        Returns:
+            list: Parsed result, same structure as scrapli's ttp_parse
+        """
+        parser, lock = self._get(template)
+        with lock:
+            start = perf_counter()
+            parser.clear_input(template_name=template)
+            parser.clear_result(templates=template)
+            parser.add_input(data=output, template_name=template)
+            parser.parse(one=True)
+            result = parser.result(structure="dictionary")[template]
+            elapsed = perf_counter() - start
+
+        with self._lock:
+            stats = self._stats[template]
+            stats["calls"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+        observe_parse(template, elapsed)
+        logger.debug("Parsed %s in %.6f s", template, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        """Return the compile time and parse times per template."""
+        with self._lock:
+            return {
+                name: dict(values, mean_time=values["total_time"] / values["calls"] if values["calls"] else 0.0)
+                for name, values in self._stats.items()
+            }
+
+    def clear(self) -> None:
+        """Drop all compiled templates and their statistics."""
+        with self._lock:
+            self._parsers.clear()
+            self._stats.clear()
+
+
+registry = TemplateRegistry()
+
+
+def parse_output(template: str, output: str) -> Any:
+    """Parse output with the process wide template registry."""
+    return registry.parse(template, output)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Parser and structural diff for the WeOS configuration format.
+
+A WeOS config is a list of settings and sections. A section is a header
+line followed by its indented body and closed with `end`:
+
+    port 1-2
+            speed-duplex auto
+            end
+
+parse_config turns the text into a tree of ConfigNode indexed by line, and
+diff_configs walks two trees in step to report what changed per section.
+Both are linear in the number of config lines.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Union
+
+COMMENT = re.compile(r"^\s*#")
+
+# Lines that are not part of the configuration itself
+CONFIG_NOISE = re.compile(r"^(Press Ctrl-C .*|_{10,}|cfg://.*)$")
+
+
+@dataclass
+class ConfigNode:
+    """One config line and, for sections, its body indexed by line."""
+
+    line: str
+    children: dict[str, "ConfigNode"] = field(default_factory=dict)
+    section: bool = False
+
+    def __getitem__(self, line: str) -> "ConfigNode":
+        """Return the child with this line."""
+        return self.children[line]
+
+    def __contains__(self, line: str) -> bool:
+        """Return True if a child has this line."""
+        return line in self.children
+
+    def find(self, *path: str) -> "ConfigNode | None":
+        """Return the node at the path of lines below this node, None if missing."""
+        node = self
+        for line in path:
+            node = node.children.get(line)
+            if node is None:
+                return None
+        return node
+
+    def render(self, depth: int = 0) -> list[str]:
+        """Return the node as config lines, indented like WeOS does."""
+        if not self.line:
+            return [line for child in self.children.values() for line in child.render(depth)]
+
+        indent = "        " * depth
+        lines = [indent + self.line]
+        for child in self.children.values():
+            lines.extend(child.render(depth + 1))
+        if self.section:
+            lines.append(indent + "        end")
+        return lines
+
+
+@dataclass(frozen=True)
+class ConfigChange:
+    """A setting or section that differs between two configs.
+
+    Attributes:
+        kind: "added", "removed" or "changed"
+        path: Section headers from the top of the config down to the change
+        old: Line in the old config, None if added
+        new: Line in the new config, None if removed
+    """
+
+    kind: str
+    path: tuple[str, ...]
+    old: str | None = None
+    new: str | None = None
+
+    def __str__(self) -> str:
+        """Return the change as one line, e.g. `system: hostname lynx -> hostname puma`."""
+        where = " / ".join(self.path)
+        prefix = f"{where}: " if where else ""
+        if self.kind == "added":
+            return f"{prefix}+ {self.new}"
+        if self.kind == "removed":
+            return f"{prefix}- {self.old}"
+        return f"{prefix}{self.old} -> {self.new}"
+
+
+def parse_config(config: str) -> ConfigNode:
+    """Parse WeOS config text into a tree.
+
+    Comments, the pager line and the startup config footer are skipped.
+    A line repeated in the same section is indexed as `line #2`, `line #3`.
+
+    Args:
+        config (str): Output of show running-config, show startup-config or a .cfg file
+
+    Returns:
+        ConfigNode: Root node with an empty line, the top level lines as children
+    """
+    root = ConfigNode("", section=True)
+    # Indent, node and how often each line occurred in its body so far
+    stack: list[tuple[int, ConfigNode, Counter]] = [(-1, root, Counter())]
+
+    for raw in config.splitlines():
+        line = raw.strip()
+        if not line or COMMENT.match(raw) or CONFIG_NOISE.match(line):
+            continue
+
+        expanded = raw.expandtabs(8)
+        indent = len(expanded) - len(expanded.lstrip(" "))
+        while stack[-1][0] >= indent:
+            stack.pop()
+        _, parent, seen = stack[-1]
+        parent.section = True
+
+        if line == "end":
+            continue
+
+        seen[line] += 1
+        key = line if seen[line] == 1 else f"{line} #{seen[line]}"
+        while key in parent.children:
+            # A line that reads like a numbered repeat, e.g. `x #2` before the second `x`
+            seen[line] += 1
+            key = f"{line} #{seen[line]}"
+        node = ConfigNode(line)
+        parent.children[key] = node
+        stack.append((indent, node, Counter()))
+
+    return root
+
+
+def _setting(line: str) -> str:
+    """Return the setting a line configures, `no snmp-server` and `snmp-server x` share one."""
+    words = line.split()
+    if words[0] == "no" and len(words) > 1:
+        return words[1]
+    return words[0]
+
+
+def _diff_nodes(old: ConfigNode, new: ConfigNode, path: tuple[str, ...], changes: list[ConfigChange]) -> None:
+    """Append the changes between the children of two nodes."""
+    removed = {}
+    for key, node in old.children.items():
+        other = new.children.get(key)
+        if other is None:
+            removed[key] = node
+        elif node.section or other.section:
+            _diff_nodes(node, other, path + (node.line,), changes)
+
+    added = {key: node for key, node in new.children.items() if key not in old.children}
+
+    # A plain setting that only changed its value is reported as one change
+    added_by_setting: dict[str, list[str]] = {}
+    for key, node in added.items():
+        if not node.section:
+            added_by_setting.setdefault(_setting(node.line), []).append(key)
+
+    for node in removed.values():
+        candidates = added_by_setting.get(_setting(node.line)) if not node.section else None
+        if candidates:
+            replacement = added.pop(candidates.pop(0))
+            changes.append(ConfigChange("changed", path, node.line, replacement.line))
+        else:
+            changes.append(ConfigChange("removed", path, old=node.line))
+
+    for node in added.values():
+        changes.append(ConfigChange("added", path, new=node.line))
+
+
+def diff_configs(old: Union[str, ConfigNode], new: Union[str, ConfigNode]) -> list[ConfigChange]:
+    """Return the structural differences between two configs.
+
+    Sections present in both configs are compared line by line, a section
+    only present in one is reported once by its header.
+
+    Args:
+        old (str | ConfigNode): Reference config, e.g. the startup config
+        new (str | ConfigNode): Config compared to it, e.g. the running config
+
+    Returns:
+        list[ConfigChange]: Changes, empty if the configs are equivalent
+    """
+    old_tree = parse_config(old) if isinstance(old, str) else old
+    new_tree = parse_config(new) if isinstance(new, str) else new
+    changes: list[ConfigChange] = []
+    _diff_nodes(old_tree, new_tree, (), changes)
+    return changes
+
+
+def changed_sections(changes: list[ConfigChange]) -> list[str]:
+    """Return the top level sections touched by the changes, in order."""
+    sections: dict[str, None] = {}
+    for change in changes:
+        sections[change.path[0] if change.path else (change.new or change.old or "")] = None
+    return list(sections)
+
+
+def format_changes(changes: list[ConfigChange]) -> str:
+    """Return the changes as text, one per line."""
+    return "\n".join(str(change) for change in changes)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Native parsers for the fixed layout WeOS show commands.
+
+Each parser returns the same structure the Westermo getters build from the
+TTP templates, or None when the output is not in the expected format so the
+caller can fall back to TTP.
+"""
+import re
+
+PORT_HEADER = re.compile(r"^Port\s+Link\s+Type\s+Speed\s+State\s+Alarm\s+VID\s+MAC Address", re.M)
+PORT_LINE = re.compile(
+    r"^\w+ (\d+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\d+)\s+([0-9A-Fa-f]{2}(?::[0-9A-Fa-f]{2}){5})\s*$"
+)
+PORT_ROW = re.compile(r"^\w+ \d+\s")
+
+IFACES_HEADER = re.compile(r"^Interface Name\s+Oper\s+Address/Length\s+MTU", re.M)
+IFACE_LINE = re.compile(r"^(\S+)\s+(\S+)\s+(\d{1,3}(?:\.\d{1,3}){3})/(\d+)\s+(\d+)\s+(\S+)\s*$")
+IFACE_SECONDARY = re.compile(r"^\s+(\d{1,3}(?:\.\d{1,3}){3})/(\d+)\s*$")
+
+# System information labels are padded to 19 characters, two per line at most
+SYSINFO_SECOND = re.compile(r" {2,}(?=[A-Z][\w .#]{18}:)")
+SYSINFO_LABELS = {
+    "System Name": "system_name",
+    "System Contact": "system_contact",
+    "System Location": "system_location",
+    "System Timezone": "system_timezone",
+    "Product Family": "hw_family",
+    "Model": "hw_model",
+    "Architecture": "hw_arch",
+    "Base MAC Address": "system_mac",
+    "Article number": "hw_article_no",
+    "Serial Number": "hw_serial",
+    "Boot loader ver.": "hw_bootloarder_ver",
+    "Active firmware": "active_fw",
+    "Main firmware ver.": "system_firmware",
+    "Backup firmware ver": "system_backup_fw",
+    "Manufacturing date": "hw_dom",
+}
+
+
+def parse_ports(output: str) -> list[dict] | None:
+    """Parse `show port` output.
+
+    Returns:
+        list[dict]: Ports as returned by Westermo.get_ports, None if not recognised
+    """
+    if not PORT_HEADER.search(output):
+        return None
+
+    ports = []
+    for line in output.splitlines():
+        match = PORT_LINE.match(line)
+        if match:
+            port, link, port_type, speed, state, alarm, vid, mac = match.groups()
+            ports.append(
+                {
+                    "port": int(port),
+                    "link": link == "UP",
+                    "type": port_type,
+                    "speed": speed,
+                    "state": state,
+                    "alarm": alarm == "ALARM",
+                    "vid": int(vid),
+                    "mac_address": mac,
+                }
+            )
+        elif PORT_ROW.match(line):
+            # A port row in a layout we don't know, let TTP have a go
+            return None
+    return ports
+
+
+def parse_ifaces(output: str) -> list[dict] | None:
+    """Parse `show ifaces` output.
+
+    Returns:
+        list[dict]: Interfaces as returned by Westermo.get_mgmt_ip, None if not recognised
+    """
+    if not IFACES_HEADER.search(output):
+        return None
+
+    ifaces: list[dict] = []
+    for line in output.splitlines():
+        match = IFACE_LINE.match(line)
+        if match:
+            name, oper, address, cidr, mtu, mac = match.groups()
+            ifaces.append(
+                {
+                    "iface_name": name,
+                    "operation": oper,
+                    "primary_ip": address,
+                    "pri_cidr": cidr,
+                    "mtu": int(mtu),
+                    "mac": mac,
+                }
+            )
+            continue
+        match = IFACE_SECONDARY.match(line)
+        if match and ifaces and "secondary_ip" not in ifaces[-1]:
+            ifaces[-1]["secondary_ip"], ifaces[-1]["sec_cidr"] = match.groups()
+    return ifaces
+
+
+def parse_sysinfo(output: str) -> dict | None:
+    """Parse `show system-information` output.
+
+    Empty values are left out, like TTP does.
+
+    Returns:
+        dict: System information as returned by Westermo.get_sysinfo, None if not recognised
+    """
+    sysinfo = {}
+    for line in output.splitlines():
+        # "Label              : value          Label              : value"
+        while len(line) > 19 and line[19] == ":":
+            label, line = line[:19].rstrip(), line[20:].lstrip(" ")
+            second = SYSINFO_SECOND.search(line)
+            value, line = (line[: second.start()], line[second.end() :]) if second else (line, "")
+            key = SYSINFO_LABELS.get(label)
+            value = value.strip()
+            if key and value and key not in sysinfo:
+                sysinfo[key] = value
+    if "system_name" not in sysinfo:
+        return None
+    return sysinfo
@@ -0,0 +1,831 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Simulated WeOS switches for load testing without hardware.
+
+Every instance answers on telnet (and on SSH when asyncssh is installed)
+with the prompts of the westermo_weos scrapli platform, the interactive
+mode with its pager and the batch mode, the show commands in return_examples/ and a config model
+behind the commands the Westermo setters send. One asyncio loop serves
+hundreds of instances, each with optional link delay and baud emulation.
+
+    python weos_simulator.py --count 200 --base-port 2400 --baud 115200
+
+With --loopback every instance listens on its own 127.0.x.y address at
+the same port, so fleet provisioning can address them by IP.
+
+serve_console serves a switch on a serial console instead, e.g. the
+master side of a pty standing in for a serial adapter.
+"""
+import argparse
+import asyncio
+import copy
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import monotonic
+
+from desired_state import REMOVE_SECONDARY, expand_ports
+from westermo_ser_lib import ConfigurationError
+
+try:
+    import asyncssh  # type: ignore
+except ImportError:  # SSH is optional
+    asyncssh = None
+
+logger = logging.getLogger(__name__)
+
+EXAMPLES = Path(__file__).resolve().parent / "return_examples"
+
+PAGER = "Press Ctrl-C or Q(uit) to quit viewer, Space for next page, <CR> for next line.\n\n"
+# Lines of viewer output shown at a time in interactive mode
+PAGE_LINES = 24
+FOOTER = "\n\n\n" + "_" * 78 + "\ncfg://config0.cfg                                     {date}"
+FACTORY_RESET = "=> Are you sure (y/N)? "
+
+# Telnet bytes the simulator strips from the input
+IAC = 255
+SB = 250
+SE = 240
+COMMANDS_WITH_OPTION = range(251, 255)
+
+TOP_CONFIG = """\
+# \\\\/ Westermo WeOS v4.32.3, CLI Format v1.32
+# Lynx L110-F2G, art.no. 3649-0241-007 ser.no. 4191
+
+aaa
+        username admin hash $1$r6mXNVvD$JaDxe9xNk/MI7Ebdk7B0q.
+        end
+"""
+
+PORT_CONFIG = """\
+port 1-2
+        speed-duplex auto
+        end
+port 3-10
+        speed-duplex auto
+        end
+
+no spanning-tree
+
+vlan 1
+        name vlan1
+        untagged ALL
+        end
+"""
+
+TAIL_CONFIG = """\
+ip
+        multicast-flood-unknown ALL
+        end
+
+snmp-server
+        rocommunity public
+        no rwcommunity
+        trapcommunity trap
+        end
+
+logging
+        secure-mode
+        end
+"""
+
+
+def _example(name: str) -> str:
+    """Return an example output without the echoed command and the prompt."""
+    text = (EXAMPLES / name).read_text()
+    return text.split("\n", 1)[1].split("lynx:/#>")[0].rstrip("\n")
+
+
+@dataclass
+class SwitchState:
+    """Configuration of a simulated switch, copied to save the startup config."""
+
+    hostname: str = "lynx"
+    location: str = ""
+    inet: str = "dhcp"
+    address: str = "192.168.2.200/24"
+    secondary: list[str] = field(default_factory=lambda: ["169.254.232.177/16"])
+    frnt_ports: str = ""
+    focal_point: bool = False
+    triggers: dict[int, str] = field(default_factory=dict)
+    action_target: str = ""
+
+
+class SimulatedSwitch:
+    """Command interpreter and config model of one WeOS switch, without I/O."""
+
+    def __init__(self, index: int = 0) -> None:
+        """Initialize the class.
+
+        Args:
+            index (int): Instance number, makes the base MAC address unique
+        """
+        self.index = index
+        self.mac = ":".join(f"{b:02x}" for b in (0x0011B45EE080 + index * 0x100).to_bytes(6, "big"))
+        self.started = monotonic()
+        self.running = SwitchState()
+        self.startup = copy.deepcopy(self.running)
+        self.interactive = True
+        self.context: list[str] | None = None
+        self.confirm = None
+        # Viewer lines not shown yet, None when the pager is closed
+        self.pager: list[str] | None = None
+        self.log: list[str] = []
+        self.port_table = _example("show_port.txt")
+        self.down_ports = {
+            int(match.group(1)) for match in re.finditer(r"^Eth (\d+)\s+(?:DOWN|DIS)", self.port_table, re.M)
+        }
+        self._log("syslogd", "started")
+
+    def _log(self, source: str, message: str) -> None:
+        """Append a record to the event log."""
+        stamp = datetime.now().strftime("%b %e %H:%M:%S")
+        self.log.append(f"{stamp} {self.running.hostname} {source}: {message}")
+
+    @property
+    def prompt(self) -> str:
+        """Return the prompt for the current mode."""
+        if self.context is None:
+            return f"{self.running.hostname}:/#> "
+        path = "".join(f"{part}/" for part in self.context)
+        return f"{self.running.hostname}:/config/{path}#> "
+
+    def handle_line(self, line: str) -> str:
+        """Run one input line.
+
+        Returns:
+            str: Everything the switch prints after the line, ending with the
+                prompt or with a question when a confirmation is pending
+        """
+        if self.confirm is not None:
+            question, action = self.confirm
+            self.confirm = None
+            output = action() if line.strip().lower() == "y" else ""
+        else:
+            output = self.execute(line.strip())
+            if self.confirm is not None:
+                return (output + "\n" if output else "") + self.confirm[0]
+            if self.pager is not None:
+                return output
+        return (output + "\n" if output else "") + self.prompt
+
+    def page(self, key: str) -> str:
+        """Answer a key pressed in the pager.
+
+        Space shows the next page, return the next line and q or Ctrl-C
+        quits. Other keys are ignored. The prompt follows once the viewer
+        is closed.
+        """
+        if key in "qQ\x03":
+            lines: list[str] = []
+            self.pager = []
+        elif key == " ":
+            lines, self.pager = self.pager[:PAGE_LINES], self.pager[PAGE_LINES:]
+        elif key in "\r\n":
+            lines, self.pager = self.pager[:1], self.pager[1:]
+        else:
+            return ""
+        output = "".join("\n" + line for line in lines)
+        if self.pager:
+            return output
+        self.pager = None
+        return output + "\n" + self.prompt
+
+    def interrupt(self) -> str:
+        """Abort the current line or question, like Ctrl-C."""
+        self.confirm = None
+        self.pager = None
+        return "^C\n" + self.prompt
+
+    def execute(self, line: str) -> str:
+        """Run one command and return its output."""
+        if not line:
+            return ""
+        if line.startswith("show ") or line in ("uptime", "alarm log"):
+            return self.show(line)
+        if self.context is not None:
+            return self.configure(line)
+
+        if line == "interactive":
+            self.interactive = True
+        elif line == "batch":
+            self.interactive = False
+        elif line == "configure":
+            self.context = []
+        elif line in ("copy run start", "copy running-config startup-config"):
+            self.startup = copy.deepcopy(self.running)
+            self._log("cli", "running-config copied to startup-config")
+        elif line == "factory-reset":
+            self.confirm = (FACTORY_RESET, self._factory_reset)
+        elif line in ("logout", "exit"):
+            raise EOFError
+        else:
+            return self._invalid(line)
+        return ""
+
+    def _invalid(self, line: str) -> str:
+        """Return the error for an unknown command, matching the platform failed_when_contains."""
+        return f"Error: Invalid command '{line.split()[0]}', not found."
+
+    def _factory_reset(self) -> str:
+        """Restore the default configuration."""
+        self.running = SwitchState()
+        self.startup = copy.deepcopy(self.running)
+        self._log("cli", "factory reset")
+        return "Factory reset done."
+
+    def _clear_secondary(self) -> str:
+        """Remove all secondary addresses of vlan1."""
+        self.running.secondary = []
+        return ""
+
+    def configure(self, line: str) -> str:
+        """Run one command in configuration mode."""
+        state = self.running
+        if line == "leave":
+            self.context = None
+        elif line in ("exit", "end"):
+            self.context = self.context[:-1] if self.context else None
+        elif match := re.fullmatch(r"system hostname (\S+)", line):
+            state.hostname = match.group(1)
+            self._log("cli", f"hostname set to {state.hostname}")
+        elif match := re.fullmatch(r"system location '?(.*?)'?", line):
+            state.location = match.group(1)
+        elif line == "no system location":
+            state.location = ""
+        elif match := re.fullmatch(r"iface vlan1 inet static address (\S+)( secondary)?", line):
+            state.inet = "static"
+            if match.group(2):
+                state.secondary.append(match.group(1))
+            else:
+                state.address = match.group(1)
+            self.context = ["iface-vlan1"]
+        elif line == "iface vlan1 inet static no address secondary":
+            state.inet = "static"
+            self.context = ["iface-vlan1"]
+            self.confirm = (REMOVE_SECONDARY, self._clear_secondary)
+        elif line == "no frnt 1":
+            state.frnt_ports = ""
+            state.focal_point = False
+        elif match := re.fullmatch(r"frnt 1 ring-ports (\d+,\d+)", line):
+            state.frnt_ports = match.group(1)
+        elif line in ("frnt 1 focal-point", "frnt 1 no focal-point"):
+            if not state.frnt_ports:
+                return "Error: FRNT ring 1 not found."
+            state.focal_point = "no" not in line
+        elif match := re.fullmatch(r"alarm no (trigger|action) (\d+)", line):
+            if match.group(1) == "trigger":
+                state.triggers.pop(int(match.group(2)), None)
+            else:
+                state.action_target = ""
+        elif match := re.fullmatch(r"alarm trigger (\d+) link-alarm condition low port (\S+)", line):
+            state.triggers[int(match.group(1))] = match.group(2)
+        elif match := re.fullmatch(r"alarm action 1 target (\S+)", line):
+            state.action_target = match.group(1).replace(",", " ")
+        else:
+            return self._invalid(line)
+        return ""
+
+    def show(self, line: str) -> str:
+        """Return the output of a show command."""
+        renderers = {
+            "show system-information": self._sysinfo,
+            "show port": lambda: self._viewer(self._ports()),
+            "show ifaces": lambda: self._viewer(self._ifaces()),
+            "show frnt": self._frnt,
+            "show alarm": self._alarm,
+            "show running-config": lambda: self._viewer(self.render_config(self.running)),
+            "show startup-config": lambda: self.render_config(self.startup)
+            + FOOTER.format(date=datetime.now().strftime("%a %b %e %H:%M:%S %Y")),
+            "uptime": self._uptime,
+            "alarm log": lambda: "\n".join(self.log),
+        }
+        renderer = renderers.get(line)
+        return renderer() if renderer else self._invalid(line)
+
+    def _viewer(self, text: str) -> str:
+        """Page viewer output in interactive mode, the rest waits for a key, see page."""
+        if not self.interactive:
+            return text
+        lines = text.split("\n")
+        if len(lines) > PAGE_LINES:
+            self.pager = lines[PAGE_LINES:]
+        return PAGER + "\n".join(lines[:PAGE_LINES])
+
+    def _sysinfo(self) -> str:
+        """Render show system-information."""
+        text = _example("system-information.txt")
+        text = re.sub(r"^System Name        : .*$", f"System Name        : {self.running.hostname}", text, flags=re.M)
+        text = re.sub(r"^System Location    : .*$", f"System Location    : {self.running.location}", text, flags=re.M)
+        return text.replace("00:11:b4:5e:e0:80", self.mac)
+
+    def _alarm_ports(self) -> set[int]:
+        """Return the ports with an active link alarm."""
+        ports: set[int] = set()
+        for port_list in self.running.triggers.values():
+            ports |= expand_ports(port_list) & self.down_ports
+        return ports
+
+    def _ports(self) -> str:
+        """Render show port, with the alarm column following the triggers."""
+        alarmed = self._alarm_ports()
+
+        def alarm_column(match: re.Match) -> str:
+            return match.group(0).replace("  N/A", "ALARM") if int(match.group(1)) in alarmed else match.group(0)
+
+        return re.sub(r"^Eth (\d+) .*$", alarm_column, self.port_table, flags=re.M)
+
+    def _ifaces(self) -> str:
+        """Render show ifaces."""
+        rows = [
+            "Interface Name    Oper  Address/Length      MTU    MAC/PtP Address",
+            "----------------  ----  ------------------  -----  ---------------------------",
+            f"{'lo':<18}{'UP':<6}{'127.0.0.1/8':<20}{'16436':<7}N/A",
+            f"{'vlan1':<18}{'UP':<6}{self.running.address:<20}{'1500':<7}{self.mac[:-1]}1",
+        ]
+        rows.extend(" " * 24 + address for address in self.running.secondary)
+        rows.append("-" * 78)
+        return "\n".join(rows)
+
+    def _frnt(self) -> str:
+        """Render show frnt, empty when no ring is configured."""
+        state = self.running
+        if not state.frnt_ports:
+            return ""
+        port_1, port_2 = (
+            f"Eth {port} {'Down' if int(port) in self.down_ports else 'Up'}" for port in state.frnt_ports.split(",")
+        )
+        mode = "Focal" if state.focal_point else "Member"
+        return "\n".join(
+            [
+                " Rid  Ver   Status     Cnt   Mode       Port 1               Port 2",
+                "=" * 79,
+                f"   1   0    Broken       0   {mode:<11}{port_1:<21}{port_2}",
+                "-" * 79,
+            ]
+        )
+
+    def _alarm(self) -> str:
+        """Render show alarm."""
+        rows = ["No Trigger          Ena Act Reason                        ", "=" * 79]
+        for number, port_list in sorted(self.running.triggers.items()):
+            down = sorted(expand_ports(port_list) & self.down_ports)
+            active = "YES" if down else "NO "
+            reason = f"Port {port_list} {'DOWN' if down else 'UP'}"
+            rows.append(f"{number:>2} {'link-alarm':<16} YES {active} {reason}")
+        return "\n".join(rows)
+
+    def _uptime(self) -> str:
+        """Render uptime."""
+        seconds = int(monotonic() - self.started)
+        days, hours, minutes = seconds // 86400, seconds % 86400 // 3600, seconds % 3600 // 60
+        return f"{datetime.now():%H:%M:%S} up {days} days, {hours}:{minutes:02}"
+
+    def render_config(self, state: SwitchState) -> str:
+        """Render a config in the show running-config format."""
+        lines = [TOP_CONFIG, "system", f"        hostname {state.hostname}"]
+        if state.location:
+            lines.append(f'        location "{state.location}"')
+        lines += ["        end", "", "alarm"]
+        for number, port_list in sorted(state.triggers.items()):
+            lines += [
+                f"        trigger {number} link-alarm",
+                f"                port {port_list}",
+                "                severity active warning inactive notice",
+                "                condition low",
+                "                action 1",
+                "                end",
+            ]
+        if state.action_target:
+            lines += ["        action 1", f"                target {state.action_target}", "                end"]
+        lines += ["        end", ""]
+        if state.frnt_ports:
+            lines += ["frnt 1", f"        ring-ports {state.frnt_ports}"]
+            if state.focal_point:
+                lines.append("        focal-point")
+            lines += ["        end", ""]
+        lines.append(PORT_CONFIG)
+        lines += [f"iface vlan1 inet {state.inet}", f"        address {state.address}"]
+        lines += [f"        address {address} secondary" for address in state.secondary]
+        lines += ["        management ssh http https ipconfig snmp", "        end", "", TAIL_CONFIG]
+        return "\n".join(lines).rstrip("\n")
+
+
+class Link:
+    """Delay and baud rate of the emulated line between client and switch."""
+
+    def __init__(self, delay: float = 0.0, baud: int = 0) -> None:
+        """Initialize the class.
+
+        Args:
+            delay (float): Seconds added before each reply
+            baud (int): Bits per second of the line, 0 for unlimited
+        """
+        self.delay = delay
+        self.baud = baud
+
+    async def send(self, write, data: bytes) -> None:
+        """Write data at the emulated speed."""
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if not self.baud:
+            await write(data)
+            return
+        # 10 bits per byte on a serial line with start and stop bit, sent in 10 ms slices
+        chunk = max(1, self.baud // 1000)
+        for start in range(0, len(data), chunk):
+            piece = data[start : start + chunk]
+            await write(piece)
+            await asyncio.sleep(len(piece) * 10 / self.baud)
+
+
+class CliSession:
+    """One login session on a simulated switch, over telnet or SSH."""
+
+    def __init__(self, switch: SimulatedSwitch, reader, write, link: Link, credentials: tuple[str, str] | None):
+        """Initialize the class.
+
+        Args:
+            switch (SimulatedSwitch): Switch the session talks to
+            reader: Stream with an async read(n) returning bytes
+            write: Coroutine function writing bytes to the client
+            link (Link): Emulated line
+            credentials (tuple): Username and password to ask for, None if already authenticated
+        """
+        self.switch = switch
+        self.reader = reader
+        self.write = write
+        self.link = link
+        self.credentials = credentials
+        self._pending = b""
+        self._skip_lf = False
+
+    async def send(self, text: str) -> None:
+        """Send text, with the newlines a terminal expects."""
+        await self.link.send(self.write, text.replace("\n", "\r\n").encode("latin-1", errors="replace"))
+
+    async def _chars(self):
+        """Yield input characters with telnet commands removed."""
+        while True:
+            data = await self.reader.read(1024)
+            if not data:
+                return
+            if isinstance(data, str):
+                data = data.encode("latin-1", errors="replace")
+            data = self._pending + data
+            self._pending = b""
+            i = 0
+            while i < len(data):
+                byte = data[i]
+                if byte == IAC:
+                    if i + 1 >= len(data) or (data[i + 1] in COMMANDS_WITH_OPTION and i + 2 >= len(data)):
+                        self._pending = data[i:]
+                        break
+                    if data[i + 1] == SB:
+                        end = data.find(bytes([IAC, SE]), i)
+                        if end == -1:
+                            self._pending = data[i:]
+                            break
+                        i = end + 2
+                    elif data[i + 1] in COMMANDS_WITH_OPTION:
+                        i += 3
+                    elif data[i + 1] == IAC:
+                        # Escaped 255 data byte
+                        i += 2
+                        yield chr(IAC)
+                    else:
+                        i += 2
+                    continue
+                i += 1
+                yield chr(byte)
+
+    async def _read_line(self, chars, echo: bool = True) -> str | None:
+        """Read one line, echoing it if asked."""
+        line = ""
+        async for char in chars:
+            if self._skip_lf and char in "\n\0":
+                self._skip_lf = False
+                continue
+            self._skip_lf = char == "\r"
+            if char in "\r\n":
+                return line
+            if char == "\x03":
+                return None
+            if char in "\x08\x7f":
+                if line:
+                    line = line[:-1]
+                    if echo:
+                        await self.send("\b \b")
+                continue
+            line += char
+            if echo:
+                await self.send(char)
+        raise EOFError
+
+    async def _read_key(self, chars) -> str:
+        """Read one key, the LF of a CR LF pair is dropped."""
+        async for char in chars:
+            if self._skip_lf and char in "\n\0":
+                self._skip_lf = False
+                continue
+            self._skip_lf = char == "\r"
+            return char
+        raise EOFError
+
+    async def _login(self, chars) -> bool:
+        """Ask for username and password, three attempts."""
+        for _ in range(3):
+            await self.send("login: ")
+            username = await self._read_line(chars)
+            await self.send("\nPassword: ")
+            password = await self._read_line(chars, echo=False)
+            if (username, password) == self.credentials:
+                await self.send("\n")
+                return True
+            await self.send("\nLogin incorrect\n")
+        return False
+
+    async def run(self) -> None:
+        """Serve the session until the client logs out or disconnects."""
+        chars = self._chars()
+        try:
+            if self.credentials is not None and not await self._login(chars):
+                return
+            await self.send(self.switch.prompt)
+            while True:
+                if self.switch.pager is not None:
+                    await self.send(self.switch.page(await self._read_key(chars)))
+                    continue
+                line = await self._read_line(chars)
+                if line is None:
+                    await self.send(self.switch.interrupt())
+                    continue
+                await self.send("\n" + self.switch.handle_line(line))
+        except (EOFError, ConnectionError):
+            pass
+        finally:
+            await chars.aclose()
+            self.switch.context = None
+            self.switch.confirm = None
+            self.switch.pager = None
+
+
+class Simulator:
+    """Run many simulated switches in one asyncio loop."""
+
+    def __init__(
+        self,
+        count: int = 1,
+        host: str = "127.0.0.1",
+        base_port: int | None = None,
+        ssh_base_port: int | None = None,
+        loopback: bool = False,
+        delay: float | None = None,
+        baud: int | None = None,
+        username: str | None = None,
+        password: str | None = None,
+    ) -> None:
+        """Initialize the class.
+
+        Args:
+            count (int): Number of switches
+            host (str): Address to listen on, ignored with loopback
+            base_port (int): Telnet port of the first switch, defaults to Config.SIMULATOR_BASE_PORT, 0 for any
+            ssh_base_port (int): SSH port of the first switch, None for no SSH
+            loopback (bool): Give every switch its own 127.0.x.y address on the same ports
+            delay (float): Seconds added before each reply, defaults to Config.SIMULATOR_DELAY
+            baud (int): Emulated line speed, 0 for unlimited, defaults to Config.SIMULATOR_BAUD
+            username (str): Login name, defaults to the Config.DEFAULT_DEVICE user
+            password (str): Login password, defaults to the Config.DEFAULT_DEVICE password
+
+        Raises:
+            ConfigurationError: If SSH is requested and asyncssh is not installed
+        """
+        from config import Config
+
+        if ssh_base_port is not None and asyncssh is None:
+            raise ConfigurationError("SSH simulation needs asyncssh, install it with 'pip install asyncssh'")
+
+        self.count = count
+        self.host = host
+        self.base_port = base_port if base_port is not None else Config.SIMULATOR_BASE_PORT
+        self.ssh_base_port = ssh_base_port
+        self.loopback = loopback
+        self.link = Link(
+            delay if delay is not None else Config.SIMULATOR_DELAY,
+            baud if baud is not None else Config.SIMULATOR_BAUD,
+        )
+        self.credentials = (
+            username or Config.DEFAULT_DEVICE["auth_username"],
+            password or Config.DEFAULT_DEVICE["auth_password"],
+        )
+        self.switches = [SimulatedSwitch(index) for index in range(count)]
+        self.endpoints: list[tuple[str, int]] = []
+        self.ssh_endpoints: list[tuple[str, int]] = []
+        self._servers: list = []
+        self._consoles: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def _address(self, index: int, base_port: int) -> tuple[str, int]:
+        """Return the address and port switch `index` listens on."""
+        if self.loopback:
+            return f"127.0.{1 + index // 250}.{1 + index % 250}", base_port
+        return self.host, base_port + index if base_port else 0
+
+    async def _serve_telnet(self, switch: SimulatedSwitch, reader, writer) -> None:
+        """Serve one telnet connection."""
+
+        async def write(data: bytes) -> None:
+            writer.write(data)
+            await writer.drain()
+
+        try:
+            await CliSession(switch, reader, write, self.link, self.credentials).run()
+        finally:
+            writer.close()
+
+    async def _serve_ssh(self, switch: SimulatedSwitch, process) -> None:
+        """Serve one SSH session, the SSH layer did the authentication."""
+
+        async def write(data: bytes) -> None:
+            process.stdout.write(data)
+            await process.stdout.drain()
+
+        try:
+            await CliSession(switch, process.stdin, write, self.link, None).run()
+        finally:
+            process.exit(0)
+
+    async def serve_console(self, fd: int, index: int = 0, login: bool = True) -> None:
+        """Serve a switch on a serial console until the line closes.
+
+        The console prints nothing until it gets input, like an idle serial
+        line, and drops the input that woke it. It waits again after a logout.
+
+        Args:
+            fd (int): Console file descriptor, e.g. the master side of a pty
+            index (int): Switch to serve
+            login (bool): Ask for username and password, False for a console left logged in
+        """
+        self._consoles.append(asyncio.current_task())
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        read_pipe, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(os.dup(fd), "rb", buffering=0)
+        )
+        write_pipe, _ = await loop.connect_write_pipe(asyncio.Protocol, os.fdopen(os.dup(fd), "wb", buffering=0))
+
+        async def write(data: bytes) -> None:
+            write_pipe.write(data)
+
+        credentials = self.credentials if login else None
+        try:
+            while await reader.read(1024):
+                await CliSession(self.switches[index], reader, write, self.link, credentials).run()
+        except OSError:
+            # The other side of the line was closed
+            pass
+        finally:
+            read_pipe.close()
+            write_pipe.close()
+
+    def start_console(self, fd: int, index: int = 0, login: bool = True) -> None:
+        """Serve a serial console from the loop started by start_in_thread, see serve_console."""
+        asyncio.run_coroutine_threadsafe(self.serve_console(fd, index, login), self._loop)
+
+    async def start(self) -> None:
+        """Start listening for every switch."""
+        for index, switch in enumerate(self.switches):
+            host, port = self._address(index, self.base_port)
+            server = await asyncio.start_server(
+                lambda r, w, switch=switch: self._serve_telnet(switch, r, w), host=host, port=port
+            )
+            self._servers.append(server)
+            self.endpoints.append((host, server.sockets[0].getsockname()[1]))
+
+            if self.ssh_base_port is not None:
+                host, port = self._address(index, self.ssh_base_port)
+                ssh_server = await asyncssh.create_server(
+                    lambda: _SSHServer(self.credentials),
+                    host,
+                    port,
+                    server_host_keys=[asyncssh.generate_private_key("ssh-ed25519")],
+                    process_factory=lambda process, switch=switch: self._serve_ssh(switch, process),
+                    encoding=None,
+                    line_editor=False,
+                )
+                self._servers.append(ssh_server)
+                self.ssh_endpoints.append((host, ssh_server.sockets[0].getsockname()[1]))
+        logger.info("Simulating %d switches from %s:%d", self.count, *self.endpoints[0])
+
+    async def stop(self) -> None:
+        """Stop listening and serving consoles."""
+        for console in self._consoles:
+            console.cancel()
+        await asyncio.gather(*self._consoles, return_exceptions=True)
+        self._consoles.clear()
+        for server in self._servers:
+            server.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+
+    def start_in_thread(self) -> "Simulator":
+        """Start the switches in a background event loop and return when they listen."""
+        ready = threading.Event()
+        errors: list[Exception] = []
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop_thread(self) -> None:
+        """Stop the background event loop started by start_in_thread."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+
+if asyncssh is not None:
+
+    class _SSHServer(asyncssh.SSHServer):
+        """Password authentication for the simulated switches."""
+
+        def __init__(self, credentials: tuple[str, str]) -> None:
+            """Initialize the class."""
+            self.credentials = credentials
+
+        def begin_auth(self, username: str) -> bool:
+            """Require a password."""
+            return True
+
+        def password_auth_supported(self) -> bool:
+            """Accept password authentication."""
+            return True
+
+        def validate_password(self, username: str, password: str) -> bool:
+            """Check the login."""
+            return (username, password) == self.credentials
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run simulated switches until interrupted."""
+    parser = argparse.ArgumentParser(description="Simulated WeOS switches for load testing")
+    parser.add_argument("--count", type=int, default=1, help="number of switches")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--base-port", type=int, default=None, help="telnet port of the first switch")
+    parser.add_argument("--ssh-base-port", type=int, default=None, help="SSH port of the first switch")
+    parser.add_argument("--loopback", action="store_true", help="one 127.0.x.y address per switch")
+    parser.add_argument("--delay", type=float, default=None, help="seconds added before each reply")
+    parser.add_argument("--baud", type=int, default=None, help="emulated line speed, 0 for unlimited")
+    args = parser.parse_args(argv)
+
+    simulator = Simulator(
+        count=args.count,
+        host=args.host,
+        base_port=args.base_port,
+        ssh_base_port=args.ssh_base_port,
+        loopback=args.loopback,
+        delay=args.delay,
+        baud=args.baud,
+    )
+
+    async def run() -> None:
+        await simulator.start()
+        for host, port in simulator.endpoints:
+            print(f"telnet {host} {port}")
+        for host, port in simulator.ssh_endpoints:
+            print(f"ssh -p {port} {host}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nSimulator stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,982 @@
+#!/usr/bin/python3
+"""
+Westermo_async_lib.
+
+Asyncio version of westermo_ser_lib.Westermo, built on scrapli's AsyncScrapli,
+so one event loop can drive many switches at the same time.
+"""
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime
+from time import monotonic
+from typing import Any, AsyncIterator, Iterator, Sequence
+from scrapli import AsyncScrapli  # type: ignore
+from scrapli_serial import SERIAL_TRANSPORTS, add_console_login
+from alarm_monitor import AlarmMonitor, monitor
+from desired_state import ALARM_TARGETS, MGMT_PRIMARY, REMOVE_SECONDARY, ChangeReport, DesiredState
+from event_log import LogFilter, LogRecord
+from metrics import AsyncMeteredConnection, instrument_methods
+from transcript import attach_recorder, attach_replay
+from ttp_registry import parse_output
+from weos_config import ConfigChange, diff_configs
+from westermo_ser_lib import (
+    ALL_COMMANDS,
+    BATCH,
+    CONFIG_COMMANDS,
+    RUNNING_CONFIG,
+    STARTUP_CONFIG,
+    TEMPLATE_ALARM,
+    TEMPLATE_FRNT,
+    CommandCache,
+    ConfigurationError,
+    INTERACTIVE,
+    DeviceSnapshot,
+    InputValidator,
+    NetworkError,
+    ParseError,
+    SessionState,
+    ValidationError,
+    _build_snapshot,
+    _desired_state_commands,
+    _parse_ifaces,
+    _parse_ports,
+    _parse_sysinfo,
+    _process_uptime,
+    _split_batch_output,
+    invalidates,
+    logger,
+    uses_bridge,
+)
+
+# Async transport to use for each sync transport name
+ASYNC_TRANSPORTS = {
+    "telnet": "asynctelnet",
+    "system": "asyncssh",
+    "ssh2": "asyncssh",
+    "paramiko": "asyncssh",
+    "serial": "asyncserial",
+}
+
+
+@instrument_methods
+class AsyncWestermo(SessionState):
+    """Class for interacting with the westermo switch from asyncio."""
+
+    def __init__(
+        self,
+        read_cache: bool = False,
+        cache_ttls: dict | None = None,
+        config_digest: bool = False,
+        metrics: Any = None,
+        record: str | None = None,
+        replay: str | None = None,
+        replay_speed: float | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize the Class.
+
+        The telnet to serial bridge is not started, the switch must be
+        reachable over the network or connected with the serial transport,
+        which is used instead of the bridge when Config.SERIAL_DIRECT is set.
+
+        Args:
+            read_cache (bool): Cache the output of show commands
+            cache_ttls (dict): Seconds to cache each show command, defaults to Config.CACHE_TTLS
+            config_digest (bool): Compare configs by digest, downloading them again only
+                after a write or when Config.CONFIG_DIGEST_TTL expired
+            metrics (Metrics): Record method and command latency, bytes and retries here
+            record (str): Write the channel traffic of each session to this transcript
+            replay (str): Serve this transcript instead of connecting to a switch
+            replay_speed (float): Replay pace, 1.0 is the recorded pace, None as fast as possible
+            **kwargs: Scrapli connection parameters
+        """
+        from config import Config
+
+        self.metrics = metrics
+        self.record = record
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.cache = CommandCache(cache_ttls if cache_ttls is not None else Config.CACHE_TTLS) if read_cache else None
+        self.digests = CommandCache(dict.fromkeys(CONFIG_COMMANDS, Config.CONFIG_DIGEST_TTL)) if config_digest else None
+
+        device_config = Config.get_device_config()
+        device_config.update(kwargs)
+        if uses_bridge(kwargs) and Config.SERIAL_DIRECT:
+            device_config.update(transport="serial", host=Config.SERIAL_PORT)
+        device_config["transport"] = ASYNC_TRANSPORTS.get(device_config["transport"], device_config["transport"])
+
+        safe_params = {k: v for k, v in kwargs.items() if k not in ["auth_password", "password"]}
+        logger.info("Initializing async Westermo connection: %s", safe_params)
+
+        self.DEVICE = device_config
+
+    async def __aenter__(self):
+        """Run commands on class enter."""
+        logger.info("Establishing async connection to Westermo device %s", self.DEVICE["host"])
+        try:
+            self.conn = AsyncScrapli(**self.DEVICE)
+            if self.DEVICE["transport"] in SERIAL_TRANSPORTS:
+                add_console_login(self.conn)
+            if self.replay is not None:
+                attach_replay(self.conn, self.replay, self.replay_speed)
+            elif self.record is not None:
+                attach_recorder(self.conn, self.record)
+            await self.conn.open()
+            logger.info("AsyncScrapli connection opened")
+            if "on_open" in self.DEVICE:
+                # A custom on_open may leave the terminal in any mode
+                self.terminal_mode = None
+                await self.set_interactive()
+            else:
+                # The platform on_open already selected interactive mode
+                self.terminal_mode = INTERACTIVE
+            if self.metrics is not None:
+                self.conn = AsyncMeteredConnection(self.conn, self.metrics)
+            return self
+        except Exception as e:
+            logger.error("Failed to connect: %s", str(e))
+            raise NetworkError(f"Connection failed: {str(e)}")
+
+    async def __aexit__(self, *args) -> None:
+        """Run commands on class exit."""
+        _ = args
+        if hasattr(self, "conn") and self.conn:
+            try:
+                await self.conn.close()
+                logger.info("Disconnected from Westermo device %s", self.DEVICE["host"])
+            except Exception as e:
+                logger.warning("Error during disconnect: %s", str(e))
+
+    def _validate_connection(self) -> None:
+        """Validate that connection is established before operations."""
+        if not hasattr(self, "conn") or self.conn is None:
+            raise NetworkError("Not connected to device. Use 'async with AsyncWestermo(...):' context manager.")
+
+    async def _send_show(self, command: str) -> Any:
+        """Send a read-only command, answering from the read cache when enabled."""
+        if self.cache is None:
+            return await self.conn.send_command(command)
+
+        response = self.cache.get(command)
+        if response is None:
+            response = await self.conn.send_command(command)
+            if not response.failed:
+                self.cache.put(command, response)
+        return response
+
+    async def _send_batch(self, commands: Sequence[str]) -> list[str]:
+        """Send several commands in one channel write and split the output.
+
+        Args:
+            commands (Sequence[str]): Commands to send, in order
+
+        Returns:
+            list[str]: Output of each command
+
+        Raises:
+            NetworkError: If not all prompts are seen before the timeout
+        """
+        channel = self.conn.channel
+        prompt = re.compile(self.conn.comms_prompt_pattern.encode(), flags=re.M | re.I)
+        deadline = monotonic() + self.conn.timeout_ops * len(commands)
+
+        buf = b""
+        prompts: list = []
+        async with channel._channel_lock():
+            channel.write(channel_input=self.conn.comms_return_char.join(commands))
+            channel.send_return()
+            while len(prompts) < len(commands):
+                if monotonic() > deadline:
+                    raise NetworkError(f"Timed out after {len(prompts)} of {len(commands)} batched commands")
+                buf += await channel.read()
+                search_from = prompts[-1].end() if prompts else 0
+                prompts.extend(prompt.finditer(buf, search_from))
+
+        return _split_batch_output(buf, commands, prompts)
+
+    async def get_snapshot(self) -> DeviceSnapshot:
+        """Read everything the main page shows in one batched exchange.
+
+        Returns:
+            DeviceSnapshot: System info, uptime, ports, interfaces, FRNT and save state
+
+        Raises:
+            NetworkError: If unable to communicate with device
+            ParseError: If unable to parse device response
+        """
+        self._validate_connection()
+
+        try:
+            commands, fresh = self._snapshot_commands()
+            outputs = dict(zip(commands, await self._send_batch(commands)))
+            self._snapshot_done(commands)
+            snapshot = _build_snapshot(outputs, self._config_saved(outputs, fresh))
+            logger.debug("get_snapshot function: %s", snapshot)
+            return snapshot
+
+        except (NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error getting device snapshot: %s", str(e))
+            raise NetworkError(f"Snapshot retrieval failed: {str(e)}")
+
+    async def get_uptime(self) -> str:
+        """Get the uptime of the switch.
+
+        Returns:
+            str: Device uptime string
+
+        Raises:
+            NetworkError: If unable to retrieve uptime
+        """
+        self._validate_connection()
+
+        try:
+            uptime = await self.conn.send_command("uptime")
+
+            if uptime.failed:
+                logger.error("Failed to get uptime: %s", uptime.result)
+                raise NetworkError("Unable to retrieve uptime")
+
+            uptime_value = _process_uptime(uptime.result)
+            logger.debug("uptime: %s", uptime_value)
+            return uptime_value
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Unexpected error getting uptime: %s", str(e))
+            raise NetworkError(f"Uptime retrieval failed: {str(e)}")
+
+    async def get_sysinfo(self) -> dict:
+        """Get system info and return it as a dict.
+
+        Returns:
+            dict: System parameters dictionary
+
+        Raises:
+            NetworkError: If unable to communicate with device
+            ParseError: If unable to parse device response
+        """
+        self._validate_connection()
+
+        try:
+            sysinfo = await self._send_show("show system-information")
+
+            if sysinfo.failed:
+                raise NetworkError(f"Command failed: {sysinfo.result}")
+
+            system_info = _parse_sysinfo(sysinfo.result)
+            logger.debug("get_sysinfo function: %s", system_info)
+            return system_info
+
+        except (NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Failed to get system info: %s", str(e))
+            raise NetworkError(f"System info retrieval failed: {str(e)}")
+
+    async def get_mgmt_ip(self) -> list[dict]:
+        """Get current management ip info.
+
+        Returns:
+            list[dict]: Management interface information
+
+        Raises:
+            NetworkError: If unable to retrieve interface information
+            ParseError: If unable to parse response
+        """
+        self._validate_connection()
+
+        try:
+            ip_mgmt_info = await self._send_show("show ifaces")
+
+            if ip_mgmt_info.failed:
+                raise NetworkError(f"Command failed: {ip_mgmt_info.result}")
+
+            ifaces = _parse_ifaces(ip_mgmt_info.result)
+            logger.debug("get_mgmt_ip function: %s", ifaces)
+            return ifaces
+
+        except (NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error getting management IP: %s", str(e))
+            raise NetworkError(f"Management IP retrieval failed: {str(e)}")
+
+    async def get_ports(self) -> list[dict]:
+        """Get status of ports, and return it as a list of dicts.
+
+        Returns:
+            list[dict]: Status of all ports
+
+        Raises:
+            NetworkError: If unable to retrieve port information
+            ParseError: If unable to parse port data
+        """
+        self._validate_connection()
+
+        try:
+            status_ports = await self._send_show("show port")
+
+            if status_ports.failed:
+                raise NetworkError(f"Command failed: {status_ports.result}")
+
+            return_values = _parse_ports(status_ports.result)
+            logger.debug("get_ports function: %s", return_values)
+            return return_values
+
+        except (NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error getting port status: %s", str(e))
+            raise NetworkError(f"Port status retrieval failed: {str(e)}")
+
+    async def get_frnt(self) -> list | dict:
+        """Get status of the FRNT ring, and return it as a list|dict.
+
+        Returns:
+            list|dict: FRNT status
+
+        Raises:
+            NetworkError: If unable to retrieve FRNT information
+        """
+        self._validate_connection()
+
+        try:
+            status_ports = await self._send_show("show frnt")
+
+            if status_ports.failed:
+                raise NetworkError(f"Command failed: {status_ports.result}")
+
+            return_values: Any = parse_output(TEMPLATE_FRNT, status_ports.result)[0]
+            logger.debug("get_frnt function: %s", status_ports.result)
+            return return_values
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error getting FRNT status: %s", str(e))
+            raise NetworkError(f"FRNT status retrieval failed: {str(e)}")
+
+    async def diff_config(self) -> list[ConfigChange]:
+        """Return the changes in the running config that are not saved to startup.
+
+        Returns:
+            list[ConfigChange]: Changes by section, empty if the config is saved
+
+        Raises:
+            NetworkError: If unable to retrieve configurations
+        """
+        self._validate_connection()
+
+        try:
+            outputs = await self._get_configs(CONFIG_COMMANDS)
+            if self.digests is not None:
+                self._config_saved(outputs, {})
+            changes = diff_configs(outputs[STARTUP_CONFIG], outputs[RUNNING_CONFIG])
+            logger.debug("diff_config function: %s", changes)
+            return changes
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error comparing configurations: %s", str(e))
+            raise NetworkError(f"Configuration comparison failed: {str(e)}")
+
+    async def get_alarm_log(self) -> list | dict:
+        """Return the alarm log as a list | dict.
+
+        Returns:
+            list|dict: eventlog
+
+        Raises:
+            NetworkError: If unable to retrieve alarm log
+        """
+        self._validate_connection()
+
+        try:
+            returnobj = await self._send_show("show alarm")
+
+            if returnobj.failed:
+                raise NetworkError(f"Command failed: {returnobj.result}")
+
+            return_values: Any = parse_output(TEMPLATE_ALARM, returnobj.result)[0]
+            logger.debug(return_values)
+            return return_values
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error getting alarm log: %s", str(e))
+            raise NetworkError(f"Alarm log retrieval failed: {str(e)}")
+
+    async def poll_alarms(self, alarm_monitor: AlarmMonitor | None = None) -> Iterator[dict]:
+        """Return the alarm entries that are new or changed since the previous poll.
+
+        Args:
+            alarm_monitor (AlarmMonitor): Monitor holding the watermark, defaults to the shared one
+
+        Returns:
+            Iterator[dict]: New entries with id, trigger, enabled, active, reason and seen
+
+        Raises:
+            NetworkError: If unable to retrieve alarm log
+        """
+        self._validate_connection()
+
+        try:
+            returnobj = await self.conn.send_command("show alarm")
+
+            if returnobj.failed:
+                raise NetworkError(f"Command failed: {returnobj.result}")
+
+            return (alarm_monitor or monitor).feed(self.DEVICE, returnobj.result)
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error polling alarm log: %s", str(e))
+            raise NetworkError(f"Alarm log retrieval failed: {str(e)}")
+
+    async def get_event_log(self) -> str:
+        """Return the event log.
+
+        Returns:
+            str: log
+        """
+        self._validate_connection()
+
+        try:
+            async with self.batch_mode():
+                await self.set_interactive(False)
+                return_values = (await self.conn.send_command("alarm log")).result
+            return return_values
+        except Exception as e:
+            logger.error("Error getting event log: %s", str(e))
+            return ""
+
+    async def _stream_lines(self, command: str) -> AsyncIterator[str]:
+        """Send a command and yield its output lines as they arrive.
+
+        The command owns the channel until the generator is exhausted or
+        closed, nothing else may be sent meanwhile. The channel lock only
+        guards this when the driver was created with channel_lock. Closing
+        the generator before the prompt returned aborts the command with Ctrl-C.
+
+        Args:
+            command (str): Command to send
+
+        Yields:
+            str: Output lines without the echoed command
+
+        Raises:
+            NetworkError: If no output arrives within timeout_ops seconds
+        """
+        channel = self.conn.channel
+        prompt = re.compile(self.conn.comms_prompt_pattern.encode(), flags=re.M | re.I)
+        timeout = self.conn.timeout_ops
+
+        async with channel._channel_lock():
+            channel.write(channel_input=command)
+            channel.send_return()
+            buf = b""
+            echoed = False
+            done = False
+            deadline = monotonic() + timeout
+            try:
+                while not prompt.search(buf):
+                    chunk = await channel.read()
+                    if chunk:
+                        deadline = monotonic() + timeout
+                    elif monotonic() > deadline:
+                        raise NetworkError(f"Timed out waiting for output of {command}")
+                    *lines, buf = (buf + chunk).split(b"\n")
+                    for raw in lines:
+                        line = raw.decode(errors="replace").rstrip()
+                        if not echoed:
+                            echoed = True
+                            if line.strip() == command:
+                                continue
+                        yield line
+                done = True
+            finally:
+                if not done:
+                    await self._abort_command(prompt)
+
+    async def _abort_command(self, prompt: re.Pattern) -> None:
+        """Interrupt the running command with Ctrl-C and wait for the prompt."""
+        channel = self.conn.channel
+        deadline = monotonic() + self.conn.timeout_ops
+        buf = b""
+        try:
+            channel.write(channel_input="\x03")
+            while not prompt.search(buf) and monotonic() < deadline:
+                buf = (buf + await channel.read())[-256:]
+        except Exception as e:
+            logger.warning("Error aborting command: %s", str(e))
+
+    def stream_event_log(
+        self, since: datetime | None = None, until: datetime | None = None, severity: str | None = None
+    ) -> AsyncIterator[LogRecord]:
+        """Return the event log as records parsed while they arrive.
+
+        Args:
+            since (datetime): Skip records older than this
+            until (datetime): Skip records newer than this
+            severity (str): Skip records less severe than this syslog severity, e.g. "warning"
+
+        Returns:
+            AsyncIterator[LogRecord]: Records in log order, use with `async for`
+
+        Raises:
+            ValidationError: If severity is not a syslog severity
+        """
+        self._validate_connection()
+
+        try:
+            log_filter = LogFilter(since, until, severity)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return self._stream_event_log(log_filter)
+
+    async def _stream_event_log(self, log_filter: LogFilter) -> AsyncIterator[LogRecord]:
+        """Yield filtered event log records, with the switch in batch mode meanwhile."""
+        async with self.batch_mode():
+            await self.set_interactive(False)
+            lines = self._stream_lines("alarm log")
+            try:
+                async for line in lines:
+                    record = log_filter(line)
+                    if record is not None:
+                        yield record
+            finally:
+                await lines.aclose()
+
+    async def save_config(self) -> str:
+        """Get the startup config and returns it as a decoded string.
+
+        Returns:
+            str: config string
+
+        Raises:
+            NetworkError: If unable to retrieve configuration
+        """
+        self._validate_connection()
+
+        try:
+            async with self.batch_mode():
+                await self.set_interactive(False)
+                result = await self.conn.send_command("show startup-config")
+
+            if result.failed:
+                raise NetworkError(f"Failed to retrieve startup config: {result.result}")
+
+            logger.debug("Successfully retrieved startup configuration")
+            return result.result
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error retrieving config: %s", str(e))
+            raise NetworkError(f"Configuration retrieval failed: {str(e)}")
+
+    async def _get_configs(self, commands: Sequence[str]) -> dict:
+        """Send config show commands in batch mode and return their output by command."""
+        outputs = {}
+        if not commands:
+            return outputs
+
+        async with self.batch_mode():
+            await self.set_interactive(False)
+            for command in commands:
+                result = await self.conn.send_command(command)
+                if result.failed:
+                    raise NetworkError(f"Failed to get {command[5:]}: {result.result}")
+                outputs[command] = result.result
+        return outputs
+
+    async def compare_config(self) -> bool:
+        """Compare the running and startup config and returns status.
+
+        Returns:
+            bool: True = Match, False = Mismatch
+
+        Raises:
+            NetworkError: If unable to retrieve configurations
+        """
+        self._validate_connection()
+
+        try:
+            fresh = self._fresh_digests()
+            outputs = await self._get_configs([command for command in CONFIG_COMMANDS if command not in fresh])
+            configs_match = self._config_saved(outputs, fresh)
+            logger.debug("compare_config function: %s", configs_match)
+            return configs_match
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error comparing configurations: %s", str(e))
+            raise NetworkError(f"Configuration comparison failed: {str(e)}")
+
+    async def set_interactive(self, interactive: bool = True) -> None:
+        """Set the interactive mode on the switch, nothing is sent if it is already in that mode.
+
+        Args:
+            interactive (bool): True for interactive mode, False for batch mode
+        """
+        self._validate_connection()
+
+        mode = INTERACTIVE if interactive else BATCH
+        if self.terminal_mode == mode:
+            return
+
+        try:
+            result = await self.conn.send_command(mode)
+            if result.failed:
+                self.terminal_mode = None
+                logger.warning("Failed to set %s mode: %s", mode, result.result)
+            else:
+                self.terminal_mode = mode
+        except Exception as e:
+            self.terminal_mode = None
+            logger.warning("Error setting interactive mode: %s", str(e))
+
+    @asynccontextmanager
+    async def batch_mode(self) -> AsyncIterator["AsyncWestermo"]:
+        """Group batch mode reads so the terminal is switched once for all of them, see Westermo.batch_mode."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self.terminal_mode != INTERACTIVE:
+                await self.set_interactive(True)
+
+    @invalidates("show frnt", "show running-config")
+    async def set_frtn(self, ports: tuple = (1, 2)) -> None:
+        """Toggle the FRNT Ring.
+
+        Args:
+            ports (tuple): Ports to configure for FRNT ring, (0,) disables FRNT
+
+        Raises:
+            ValidationError: If port configuration is invalid
+            NetworkError: If configuration fails
+        """
+        self._validate_connection()
+
+        try:
+            if ports == (0,):
+                result = await self.conn.send_config("no frnt 1")
+                if result.failed:
+                    raise ConfigurationError(f"Failed to disable FRNT: {result.result}")
+            else:
+                if not ports or len(ports) > 2:
+                    raise ValidationError("FRNT requires exactly 1 or 2 ports")
+
+                for port in ports:
+                    if not isinstance(port, int) or port < 1 or port > 48:
+                        raise ValidationError(f"Invalid port number: {port}")
+
+                portstr = ",".join(str(x) for x in ports)
+                result = await self.conn.send_config(f"frnt 1 ring-ports {portstr}")
+                if result.failed:
+                    raise ConfigurationError(f"Failed to set FRNT ports: {result.result}")
+
+        except (ValidationError, ConfigurationError):
+            raise
+        except Exception as e:
+            logger.error("Error configuring FRNT: %s", str(e))
+            raise NetworkError(f"FRNT configuration failed: {str(e)}")
+
+    @invalidates("show frnt", "show running-config")
+    async def set_focal(self, member: bool = True) -> None:
+        """Set member on the FRNT Ring.
+
+        Args:
+            member (bool): True for member mode, False for focal point
+
+        Raises:
+            NetworkError: If configuration fails
+        """
+        self._validate_connection()
+
+        try:
+            result = await self.conn.send_config("frnt 1 no focal-point" if member else "frnt 1 focal-point")
+            if result.failed:
+                raise ConfigurationError(f"Failed to set focal mode: {result.result}")
+
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            logger.error("Error setting focal mode: %s", str(e))
+            raise NetworkError(f"Focal configuration failed: {str(e)}")
+
+    @invalidates("show port", "show alarm", "show running-config")
+    async def set_alarm(self, alarm: list[bool]) -> None:
+        """Configure alarm when link down for interfaces in list.
+
+        Args:
+            alarm (list): interfaces with alarm on or off
+
+        Raises:
+            ValidationError: If alarm list is invalid
+            NetworkError: If configuration fails
+        """
+        self._validate_connection()
+
+        if len(alarm) > 48:
+            raise ValidationError("Too many ports specified (max 48)")
+
+        if not alarm:
+            logger.info("No alarm configuration provided")
+            return
+
+        port_list = ",".join(str(i + 1) for i, enabled in enumerate(alarm) if enabled)
+
+        try:
+            for cmd in ["alarm no action 1", "alarm no trigger 1"]:
+                result = await self.conn.send_config(cmd)
+                if result.failed:
+                    logger.warning("Failed to clear alarm config: %s", result.result)
+
+            if port_list:
+                for cmd in [
+                    f"alarm trigger 1 link-alarm condition low port {port_list}",
+                    f"alarm action 1 target {','.join(ALARM_TARGETS)}",
+                ]:
+                    result = await self.conn.send_config(cmd)
+                    if result.failed:
+                        raise ConfigurationError(f"Alarm configuration failed: {result.result}")
+
+        except (ValidationError, ConfigurationError):
+            raise
+        except Exception as e:
+            logger.error("Error configuring alarms: %s", str(e))
+            raise NetworkError(f"Alarm configuration failed: {str(e)}")
+
+    @invalidates("show ifaces", "show running-config")
+    async def set_mgmt_ip(self, ip_add: str) -> bool:
+        """Change the management ip-address of the switch to (ip).
+
+        Args:
+            ip_add (str): IP Address to set
+
+        Returns:
+            bool: True if successful, False otherwise
+
+        Raises:
+            ValidationError: If IP address format is invalid
+        """
+        self._validate_connection()
+
+        try:
+            validated_ip, ip_with_cidr = InputValidator.validate_ip_with_cidr(ip_add)
+
+            result = await self.conn.send_config(f"iface vlan1 inet static address {MGMT_PRIMARY}")
+            if result.failed:
+                logger.error("Failed to set primary IP: %s", result.result)
+                return False
+
+            await self.conn.send_config("exit")
+
+            interactive_result = await self.conn.send_interactive(
+                [
+                    ("iface vlan1 inet static no address secondary", REMOVE_SECONDARY, False),
+                    ("y", "", False),
+                ],
+                privilege_level="configuration",
+            )
+            if interactive_result.failed:
+                logger.error("Failed to remove secondary IPs: %s", interactive_result.result)
+                return False
+
+            await self.conn.send_config("exit")
+
+            result = await self.conn.send_config(f"iface vlan1 inet static address {ip_with_cidr} secondary")
+            if result.failed:
+                logger.error("Failed to set secondary IP: %s", result.result)
+                return False
+
+            return True
+
+        except ValidationError as e:
+            logger.warning("IP address validation failed: %s", str(e))
+            raise
+        except Exception as e:
+            logger.error("Error setting management IP: %s", str(e))
+            return False
+
+    @invalidates("show system-information", "show running-config")
+    async def set_hostname(self, hostname: str) -> None:
+        """Change the hostname of the switch.
+
+        Args:
+            hostname (str): Hostname to switch to
+
+        Raises:
+            ValidationError: If hostname is invalid
+            NetworkError: If configuration fails
+        """
+        self._validate_connection()
+
+        try:
+            validated_hostname = InputValidator.validate_hostname(hostname)
+
+            result = await self.conn.send_config(f"system hostname {validated_hostname}")
+            if result.failed:
+                raise ConfigurationError(f"Failed to set hostname: {result.result}")
+
+        except ValidationError as e:
+            logger.warning("Hostname validation failed: %s", str(e))
+            raise
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            logger.error("Error setting hostname: %s", str(e))
+            raise NetworkError(f"Hostname configuration failed: {str(e)}")
+
+    @invalidates("show system-information", "show running-config")
+    async def set_location(self, location: str) -> None:
+        """Change the location parameter of the switch.
+
+        Args:
+            location (str): location string to switch to
+
+        Raises:
+            ValidationError: If location format is invalid
+            NetworkError: If configuration fails
+        """
+        self._validate_connection()
+
+        try:
+            if location == "":
+                result = await self.conn.send_config("no system location")
+                if result.failed:
+                    raise ConfigurationError(f"Failed to remove location: {result.result}")
+            else:
+                location = InputValidator.validate_location(location)
+                result = await self.conn.send_config(f"system location '{location}'")
+                if result.failed:
+                    raise ConfigurationError(f"Failed to set location: {result.result}")
+
+        except (ValidationError, ConfigurationError):
+            raise
+        except Exception as e:
+            logger.error("Error setting location: %s", str(e))
+            raise NetworkError(f"Location configuration failed: {str(e)}")
+
+    @invalidates(ALL_COMMANDS)
+    async def factory_conf(self) -> None:
+        """Reset device to factory defaults.
+
+        Raises:
+            NetworkError: If factory reset fails
+        """
+        self._validate_connection()
+
+        try:
+            logger.warning("Initiating factory reset on %s", self.DEVICE["host"])
+
+            result = await self.conn.send_interactive(
+                [("factory-reset", "=> Are you sure (y/N)?", False), ("y", "", False)]
+            )
+            if result.failed:
+                raise ConfigurationError(f"Factory reset failed: {result.result}")
+
+        except ConfigurationError:
+            raise
+        except Exception as e:
+            logger.error("Error during factory reset: %s", str(e))
+            raise NetworkError(f"Factory reset failed: {str(e)}")
+
+    async def _send_config_steps(self, steps: list) -> None:
+        """Send planned configuration steps, runs of plain commands in one send_configs call.
+
+        Raises:
+            ConfigurationError: If the switch rejects a command
+        """
+        batch: list[str] = []
+        for step in [*steps, None]:
+            if isinstance(step, str):
+                batch.append(step)
+                continue
+            if batch:
+                responses = await self.conn.send_configs(batch, stop_on_failed=True)
+                if responses.failed:
+                    failed = next(response for response in responses if response.failed)
+                    raise ConfigurationError(f"Failed to apply '{failed.channel_input}': {failed.result}")
+                batch = []
+            if step is not None:
+                command, question = step
+                result = await self.conn.send_interactive(
+                    [(command, question, False), ("y", "", False)], privilege_level="configuration"
+                )
+                if result.failed:
+                    raise ConfigurationError(f"Failed to apply '{command}': {result.result}")
+
+    async def apply_desired_state(self, state: DesiredState, save: bool = True) -> ChangeReport:
+        """Bring the switch to a desired state, sending only the settings that differ.
+
+        Args:
+            state (DesiredState): Wanted settings, None fields are left alone
+            save (bool): Save the running config to startup if anything changed
+
+        Returns:
+            ChangeReport: Changed settings, commands sent and the switch MAC
+
+        Raises:
+            ValidationError: If a desired value is invalid
+            ConfigurationError: If the switch rejects a command or the save fails
+            NetworkError: If unable to communicate with device
+        """
+        self._validate_connection()
+
+        try:
+            commands = _desired_state_commands(state)
+            async with self.batch_mode():
+                await self.set_interactive(False)
+                outputs = dict(zip(commands, await self._send_batch(commands)))
+            report, steps = self._plan_desired_state(state, outputs)
+            if steps:
+                try:
+                    await self._send_config_steps(steps)
+                finally:
+                    self._invalidate(ALL_COMMANDS)
+                if save:
+                    if not await self.save_run2startup():
+                        raise ConfigurationError("Failed to save running config")
+                    report.saved = True
+            logger.info("apply_desired_state function: %d changes", len(report.changes))
+            return report
+
+        except (ValidationError, ConfigurationError, NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error applying desired state: %s", str(e))
+            raise NetworkError(f"Desired state apply failed: {str(e)}")
+
+    @invalidates("show startup-config")
+    async def save_run2startup(self) -> bool:
+        """Save the configuration from running to startup.
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        self._validate_connection()
+
+        try:
+            response = await self.conn.send_command("copy run start")
+
+            if response.failed or response.result != "":
+                logger.error("Failed to save configuration: %s", response.result)
+                return False
+
+            logger.info("Configuration saved on %s", self.DEVICE["host"])
+            return True
+
+        except Exception as e:
+            logger.error("Error saving configuration: %s", str(e))
+            return False
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# coding=utf-8
+"""
+Headless command line interface for scripted jobs and machines without a display.
+
+    westermo-conf facts 10.0.0.1 10.0.0.2 --json
+    westermo-conf provision site/site.csv --workers 16
+    westermo-conf backup 10.0.0.1 --directory site/configs
+    westermo-conf diff 10.0.0.1
+    westermo-conf diff --files old.cfg new.cfg
+    westermo-conf discover /dev/ttyUSB0 /dev/ttyUSB1
+
+Only the standard library is imported at startup. Scrapli and the client
+are imported by the subcommand that connects, ttp only when a parser falls
+back to a template, and tkinter never.
+
+The exit status is 0 on success and 1 if any switch failed. diff also
+exits with 1 when it found differences, like diff(1), and discover when
+it found no switch.
+"""
+import argparse
+import json
+import logging
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+# Options copied to the scrapli connection parameters when given
+CONNECTION_OPTIONS = {
+    "port": "port",
+    "username": "auth_username",
+    "password": "auth_password",
+    "transport": "transport",
+    "timeout": "timeout_ops",
+}
+
+
+def device_kwargs(args: argparse.Namespace) -> dict:
+    """Return the connection parameters given on the command line, the rest come from Config."""
+    options = {key: getattr(args, option) for option, key in CONNECTION_OPTIONS.items()}
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def follow_log_level() -> None:
+    """Make the client library log at the CLI level, it logs DEBUG to stderr on its own."""
+    logging.getLogger("westermo_ser_lib").setLevel(logging.getLogger().getEffectiveLevel())
+
+
+def for_each_host(args: argparse.Namespace, action: Callable[[Any], dict]) -> list[dict]:
+    """Run an action on every host in turn, recording failures instead of stopping.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments with hosts and connection options
+        action (Callable): Called with the connected Westermo client, returns the result fields
+
+    Returns:
+        list[dict]: One result per host with `host`, `ok` and the action fields or `error`
+    """
+    from westermo_ser_lib import Westermo
+
+    follow_log_level()
+    results = []
+    for host in args.hosts:
+        try:
+            with Westermo(host=host, **device_kwargs(args)) as switch:
+                results.append({"host": host, "ok": True, **action(switch)})
+        except Exception as e:
+            logger.info("%s failed: %s", host, e)
+            results.append({"host": host, "ok": False, "error": str(e) or type(e).__name__})
+    return results
+
+
+def _facts(switch: Any) -> dict:
+    """Return the snapshot of a switch."""
+    return asdict(switch.get_snapshot())
+
+
+def _facts_line(result: dict) -> str:
+    """Return the facts of one switch as a line of text."""
+    sysinfo = result["sysinfo"]
+    ports = ",".join(str(port["port"]) for port in result["ports"] if port["link"]) or "-"
+    saved = "saved" if result["config_saved"] else "UNSAVED"
+    return (
+        f"{result['host']}  {sysinfo.get('system_name', '')}  {sysinfo.get('system_mac', '')}  "
+        f"up {result['uptime']}  mgmt {result['mgmt_ip'] or '-'}  link {ports}  {saved}"
+    )
+
+
+def cmd_facts(args: argparse.Namespace) -> tuple[Any, str, bool]:
+    """Read the system information, ports, interfaces and config state of each host."""
+    results = for_each_host(args, _facts)
+    text = "\n".join(_facts_line(r) if r["ok"] else f"{r['host']}  FAILED: {r['error']}" for r in results)
+    return results, text, all(r["ok"] for r in results)
+
+
+def cmd_provision(args: argparse.Namespace) -> tuple[Any, str, bool]:
+    """Provision every switch of a site CSV, like AutoConf, and write the MACs back."""
+    from fleet import FleetProvisioner
+
+    provisioner = FleetProvisioner(
+        workers=args.workers, timeout=args.host_timeout, main=not args.reserve, **device_kwargs(args)
+    )
+    follow_log_level()
+    report = provisioner.run_file(args.csv)
+    data = {"elapsed": report.elapsed, "results": [asdict(result) for result in report.results]}
+    return data, report.summary(), not report.failed
+
+
+def cmd_backup(args: argparse.Namespace) -> tuple[Any, str, bool]:
+    """Write the startup config of each host to <hostname>.cfg."""
+    directory = Path(args.directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    def backup(switch: Any) -> dict:
+        path = directory / f"{switch.get_sysinfo()['system_name']}.cfg"
+        contents = switch.save_config()
+        path.write_text(contents, encoding="utf-8")
+        return {"file": str(path), "bytes": len(contents.encode("utf-8"))}
+
+    results = for_each_host(args, backup)
+    text = "\n".join(f"{r['host']}  {r['file']}" if r["ok"] else f"{r['host']}  FAILED: {r['error']}" for r in results)
+    return results, text, all(r["ok"] for r in results)
+
+
+def cmd_diff(args: argparse.Namespace) -> tuple[Any, str, bool]:
+    """Show the unsaved changes of each host, or the changes between two config files."""
+    from weos_config import diff_configs, format_changes
+
+    if args.files:
+        old, new = (Path(file).read_text(encoding="utf-8") for file in args.files)
+        changes = diff_configs(old, new)
+        return [asdict(change) for change in changes], format_changes(changes), not changes
+
+    results = for_each_host(args, lambda switch: {"changes": switch.diff_config()})
+    lines = []
+    for result in results:
+        if not result["ok"]:
+            lines.append(f"{result['host']}  FAILED: {result['error']}")
+            continue
+        changes = result["changes"]
+        lines.append(f"{result['host']}  {len(changes)} unsaved changes" if changes else f"{result['host']}  saved")
+        lines.extend("  " + str(change) for change in changes)
+        result["changes"] = [asdict(change) for change in changes]
+    return results, "\n".join(lines), all(r["ok"] and not r["changes"] for r in results)
+
+
+def cmd_discover(args: argparse.Namespace) -> tuple[Any, str, bool]:
+    """Probe serial ports at the same time for switch consoles and their speed."""
+    from serial_discovery import discover, format_probes
+
+    probes = discover(args.ports or None, args.baud_rates, args.probe_timeout)
+    data = [{**asdict(probe), "found": probe.found} for probe in probes]
+    return data, format_probes(probes), any(probe.found for probe in probes)
+
+
+def _baud_rates(text: str) -> list[int]:
+    """Parse a comma separated list of baud rates."""
+    return [int(rate) for rate in text.split(",")]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Return the argument parser with all subcommands."""
+    connection = argparse.ArgumentParser(add_help=False)
+    group = connection.add_argument_group("connection, defaults from config.py")
+    group.add_argument("--port", type=int, help="TCP port")
+    group.add_argument("--username", help="login name")
+    group.add_argument("--password", help="password, or set WESTERMO_PASSWORD")
+    group.add_argument("--transport", help="scrapli transport, e.g. telnet or system")
+    group.add_argument("--timeout", type=float, help="seconds allowed per command")
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", help="print the result as JSON")
+    output.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+
+    parser = argparse.ArgumentParser(prog="westermo-conf", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    facts = commands.add_parser("facts", parents=[connection, output], help="query switch facts")
+    facts.add_argument("hosts", nargs="+", metavar="host")
+    facts.set_defaults(func=cmd_facts)
+
+    provision = commands.add_parser("provision", parents=[connection, output], help="provision switches from a CSV")
+    provision.add_argument("csv", help="site CSV file")
+    provision.add_argument("--reserve", action="store_true", help="provision the reserve (R) switches")
+    provision.add_argument("--workers", type=int, help="switches provisioned at the same time")
+    provision.add_argument("--host-timeout", type=float, help="seconds allowed per switch")
+    provision.set_defaults(func=cmd_provision)
+
+    backup = commands.add_parser("backup", parents=[connection, output], help="back up startup configs")
+    backup.add_argument("hosts", nargs="+", metavar="host")
+    backup.add_argument("--directory", help="target directory, defaults to Config.CONFIG_DIRECTORY")
+    backup.set_defaults(func=cmd_backup)
+
+    diff = commands.add_parser("diff", parents=[connection, output], help="show unsaved or file changes")
+    diff.add_argument("hosts", nargs="*", metavar="host")
+    diff.add_argument("--files", nargs=2, metavar=("OLD", "NEW"), help="compare two config files instead")
+    diff.set_defaults(func=cmd_diff)
+
+    discover = commands.add_parser("discover", parents=[output], help="find switches on serial ports")
+    discover.add_argument("ports", nargs="*", metavar="port", help="serial devices, default all available")
+    discover.add_argument("--baud-rates", type=_baud_rates, help="speeds to try in order, e.g. 115200,9600")
+    discover.add_argument("--probe-timeout", type=float, help="seconds to wait for a console at each speed")
+    discover.set_defaults(func=cmd_discover)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface.
+
+    Args:
+        argv (list[str]): Arguments without the program name, defaults to sys.argv
+
+    Returns:
+        int: Exit status
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "diff" and bool(args.hosts) == bool(args.files):
+        parser.error("diff needs either hosts or --files OLD NEW")
+    if args.command == "backup" and args.directory is None:
+        from config import Config
+
+        args.directory = Config.CONFIG_DIRECTORY
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+    data, text, ok = args.func(args)
+    if args.json:
+        print(json.dumps(data, indent=2, default=str))
+    elif text:
+        print(text)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
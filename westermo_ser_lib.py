@@ -5,14 +5,37 @@ Westermo_lib.
 This module uses a ssh connection to communicate with Westermo,
 currently only testet on the lynx range for common configuring.
 """
-from typing import Any, Tuple
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import wraps
+from hashlib import sha256
+from inspect import iscoroutinefunction
+from typing import Any, Iterator, Sequence, Tuple
 import re
 import logging
-from time import sleep
+from time import monotonic
 from ipaddress import ip_address, ip_network, AddressValueError
-from threading import Thread
+from threading import Event, Lock, Thread
 from scrapli import Scrapli  # type: ignore
+from scrapli_serial import SERIAL_TRANSPORTS, add_console_login
 from telnet2serlib import Handler  # type: ignore
+from alarm_monitor import AlarmMonitor, monitor
+from event_log import LogFilter, LogRecord, filter_records
+from metrics import MeteredConnection, instrument_methods, timed_parse
+from transcript import attach_recorder, attach_replay
+from ttp_registry import parse_output
+import weos_parsers
+from desired_state import (
+    ALARM_TARGETS,
+    LINKED_PORTS,
+    MGMT_PRIMARY,
+    REMOVE_SECONDARY,
+    ChangeReport,
+    DesiredState,
+    plan_changes,
+)
+from weos_config import CONFIG_NOISE, ConfigChange, diff_configs, parse_config
 
 
 # Custom exceptions for better error handling
@@ -136,6 +159,24 @@ class InputValidator:
         except (ValueError, AddressValueError) as e:
             raise ValidationError(f"Invalid IP address: {str(e)}")
 
+    @staticmethod
+    def validate_location(location: str) -> str:
+        """Validate and sanitize a system location.
+
+        Args:
+            location (str): Location string to validate, empty removes the location
+
+        Returns:
+            str: Location with only letters, numbers, spaces and dots
+
+        Raises:
+            ValidationError: If location is too long
+        """
+        if len(location) > 255:
+            raise ValidationError("Location too long (max 255 characters)")
+
+        return re.sub("[^a-zA-Z0-9 \n\\.]", "", location)
+
 
 def threaded(func):
     """
@@ -155,6 +196,108 @@ def threaded(func):
     return wrapper
 
 
+ALL_COMMANDS = "*"
+
+# Set once the telnet to serial bridge of this process listens, None while none runs
+_bridge_ready: Event | None = None
+_bridge_lock = Lock()
+
+
+def uses_bridge(kwargs: dict) -> bool:
+    """Return True if the connection parameters point at the telnet to serial bridge."""
+    return kwargs.get("transport") == "telnet" and kwargs.get("port") == 2323
+
+
+# Terminal modes, named like the commands that select them
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+def invalidates(*commands):
+    """
+    Decorate a write method to drop the cached output it affects.
+
+    The read cache and config digests are invalidated after the method ran,
+    also when it failed, as a failed write may still have changed part of
+    the configuration. Pass ALL_COMMANDS to clear everything.
+    """
+
+    def decorator(func):
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                try:
+                    return await func(self, *args, **kwargs)
+                finally:
+                    self._invalidate(*commands)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self._invalidate(*commands)
+
+        return wrapper
+
+    return decorator
+
+
+class CommandCache:
+    """TTL cache for the output of read-only show commands."""
+
+    def __init__(self, ttls: dict) -> None:
+        """Initialize the class.
+
+        Args:
+            ttls (dict): Seconds to keep the output, per command. Commands
+                not listed are never cached.
+        """
+        self.ttls = dict(ttls)
+        self._entries: dict = {}
+        self.hits: dict = {}
+        self.misses: dict = {}
+
+    def get(self, command: str) -> Any:
+        """Return the cached response for command, or None if missing or expired."""
+        entry = self._entries.get(command)
+        if entry is not None and monotonic() < entry[0]:
+            self.hits[command] = self.hits.get(command, 0) + 1
+            return entry[1]
+        self._entries.pop(command, None)
+        self.misses[command] = self.misses.get(command, 0) + 1
+        return None
+
+    def put(self, command: str, response: Any) -> None:
+        """Store the response for command if the command has a TTL."""
+        ttl = self.ttls.get(command, 0)
+        if ttl > 0:
+            self._entries[command] = (monotonic() + ttl, response)
+
+    def invalidate(self, *commands: str) -> None:
+        """Drop the cached output of commands, or everything for ALL_COMMANDS."""
+        if ALL_COMMANDS in commands:
+            self._entries.clear()
+            return
+        for command in commands:
+            self._entries.pop(command, None)
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters, in total and per command."""
+        commands = sorted(set(self.hits) | set(self.misses))
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "commands": {
+                command: {"hits": self.hits.get(command, 0), "misses": self.misses.get(command, 0)}
+                for command in commands
+            },
+        }
+
+
 def str_to_dict(string):
     """Parse a string to a dictionary."""
     string = string.strip("{}")
@@ -162,15 +305,321 @@ def str_to_dict(string):
     return {key[1:-2]: str(value) for key, value in (pair.split(": ") for pair in pairs)}
 
 
-class Westermo:
+# Templates used to parse the show commands
+TEMPLATE_SYSINFO = "ttp_templates/system-information.txt"
+TEMPLATE_IFACES = "ttp_templates/show_ifaces.txt"
+TEMPLATE_PORTS = "ttp_templates/ports.txt"
+TEMPLATE_FRNT = "ttp_templates/show_frnt.txt"
+TEMPLATE_ALARM = "ttp_templates/alarm_log.txt"
+
+STARTUP_CONFIG = "show startup-config"
+RUNNING_CONFIG = "show running-config"
+CONFIG_COMMANDS = (STARTUP_CONFIG, RUNNING_CONFIG)
+
+# Commands sent in one channel write by Westermo.get_snapshot, in order
+SNAPSHOT_COMMANDS = (
+    BATCH,
+    "show system-information",
+    "uptime",
+    "show port",
+    "show ifaces",
+    "show frnt",
+    STARTUP_CONFIG,
+    RUNNING_CONFIG,
+    INTERACTIVE,
+)
+
+
+@dataclass
+class DeviceSnapshot:
+    """Everything the main page shows, read from the switch in one exchange."""
+
+    sysinfo: dict
+    uptime: str
+    ports: list[dict]
+    ifaces: list[dict]
+    mgmt_ip: str
+    frnt: list | dict
+    config_saved: bool
+
+
+def _process_uptime(output: str) -> str:
+    """Return the time part of the uptime output."""
+    uptime_result = output.strip()
+    if " " in uptime_result:
+        return uptime_result.split(" ")[0]  # Get first part before space
+    return uptime_result[:8]  # Fallback to first 8 chars
+
+
+def _process_sysinfo(parsed: Any) -> dict:
+    """Return the system information from the parsed template result."""
+    if not parsed or not parsed[0]:
+        raise ParseError("Failed to parse system information output")
+    return parsed[0]
+
+
+def _process_ifaces(parsed: Any) -> list[dict]:
+    """Return the interfaces from the parsed template result."""
+    if not parsed or not parsed[0]:
+        raise ParseError("Failed to parse interface information")
+    return parsed[0]
+
+
+def _process_ports(parsed: Any) -> list[dict]:
+    """Convert the parsed port table to typed port entries."""
+    if not parsed or len(parsed[0]) < 3:
+        raise ParseError("Failed to parse port information or no ports found")
+
+    return_values = parsed[0][2:]
+
+    for keys in return_values:
+        try:
+            keys["port"] = int(keys["port"][4:])  # Remove "Eth " prefix
+            keys["vid"] = int(keys["vid"])
+            keys["link"] = keys["link"] == "UP"
+
+            alarm_status = keys.get("alarm", "N/A")
+            if alarm_status == "ALARM":
+                keys["alarm"] = True
+            elif alarm_status == "None":
+                keys["alarm"] = False
+            else:
+                keys["alarm"] = False
+
+        except (ValueError, KeyError) as e:
+            logger.warning("Error processing port data: %s", str(e))
+
+    return return_values
+
+
+def _parse_sysinfo(output: str) -> dict:
+    """Parse system information natively, falling back to the TTP template."""
+    with timed_parse("native:show system-information"):
+        sysinfo = weos_parsers.parse_sysinfo(output)
+    if sysinfo is None:
+        sysinfo = _process_sysinfo(parse_output(TEMPLATE_SYSINFO, output))
+    return sysinfo
+
+
+def _parse_ifaces(output: str) -> list[dict]:
+    """Parse interfaces natively, falling back to the TTP template."""
+    with timed_parse("native:show ifaces"):
+        ifaces = weos_parsers.parse_ifaces(output)
+    if not ifaces:
+        ifaces = _process_ifaces(parse_output(TEMPLATE_IFACES, output))
+    return ifaces
+
+
+def _parse_ports(output: str) -> list[dict]:
+    """Parse the port table natively, falling back to the TTP template."""
+    with timed_parse("native:show port"):
+        ports = weos_parsers.parse_ports(output)
+    if not ports:
+        ports = _process_ports(parse_output(TEMPLATE_PORTS, output))
+    return ports
+
+
+def _select_mgmt_ip(ifaces: list[dict]) -> str:
+    """Return the secondary address of vlan1, or an empty string."""
+    mgmt_ip = ""
+    for val in ifaces:
+        if val.get("iface_name") == "vlan1":
+            mgmt_ip = val.get("secondary_ip", "")
+    return mgmt_ip
+
+
+def normalize_config(config: str) -> str:
+    """Return the config without pager line, footer, trailing spaces and blank lines."""
+    lines = (line.rstrip() for line in config.splitlines())
+    return "\n".join(line for line in lines if line and not CONFIG_NOISE.match(line))
+
+
+def config_digest(config: str) -> str:
+    """Return the SHA-256 digest of the normalized config."""
+    return sha256(normalize_config(config).encode()).hexdigest()
+
+
+def _configs_match(startup: str, running: str) -> bool:
+    """Compare the startup config (with its footer) to the running config."""
+    parsed_startup = "".join(startup.splitlines(keepends=True)[:-4]).rstrip()
+    return parsed_startup == running
+
+
+def _split_batch_output(buf: bytes, commands: Sequence[str], prompts: list) -> list[str]:
+    """Cut batched output at each prompt match and drop the echoed commands."""
+    outputs = []
+    start = 0
+    for command, match in zip(commands, prompts):
+        lines = [line.rstrip() for line in buf[start : match.start()].decode(errors="replace").splitlines()]
+        if lines and lines[0].strip() == command:
+            lines = lines[1:]
+        outputs.append("\n".join(lines).strip("\n"))
+        start = match.end()
+    return outputs
+
+
+def _build_snapshot(by_command: dict, config_saved: bool) -> DeviceSnapshot:
+    """Parse the outputs of SNAPSHOT_COMMANDS, by command, into a DeviceSnapshot."""
+    ifaces = _parse_ifaces(by_command["show ifaces"])
+    return DeviceSnapshot(
+        sysinfo=_parse_sysinfo(by_command["show system-information"]),
+        uptime=_process_uptime(by_command["uptime"]),
+        ports=_parse_ports(by_command["show port"]),
+        ifaces=ifaces,
+        mgmt_ip=_select_mgmt_ip(ifaces),
+        frnt=parse_output(TEMPLATE_FRNT, by_command["show frnt"])[0],
+        config_saved=config_saved,
+    )
+
+
+def _desired_state_commands(state: DesiredState) -> list[str]:
+    """Return the show commands apply_desired_state reads before planning."""
+    commands = [RUNNING_CONFIG, "show system-information"]
+    if state.alarm == LINKED_PORTS:
+        commands.append("show port")
+    return commands
+
+
+class SessionState:
+    """Read cache and config digest bookkeeping shared by the sync and async clients."""
+
+    cache: CommandCache | None = None
+    digests: CommandCache | None = None
+    metrics: Any = None
+    # Terminal mode of the session, None when unknown
+    terminal_mode: str | None = None
+    _batch_depth = 0
+
+    def _invalidate(self, *commands: str) -> None:
+        """Drop cached output and config digests affected by a write."""
+        if self.cache is not None:
+            self.cache.invalidate(*commands)
+        if self.digests is not None:
+            self.digests.invalidate(*commands)
+
+    def cache_stats(self) -> dict:
+        """Return the read cache hit and miss counters.
+
+        Returns:
+            dict: Totals and per command counters, empty if the cache is off
+        """
+        if self.cache is None:
+            return {}
+        return self.cache.stats()
+
+    def _fresh_digests(self) -> dict:
+        """Return the config digests that are still valid, by command."""
+        if self.digests is None:
+            return {}
+        digests = {command: self.digests.get(command) for command in CONFIG_COMMANDS}
+        return {command: digest for command, digest in digests.items() if digest is not None}
+
+    def _snapshot_commands(self) -> tuple[list[str], dict]:
+        """Return the snapshot commands to send, leaving out configs with a valid digest.
+
+        A session already in batch mode, e.g. inside batch_mode, stays in it
+        and gets no mode switches. Otherwise the exchange ends in interactive
+        mode, which is tracked once it succeeded, see _snapshot_done.
+        """
+        fresh = self._fresh_digests()
+        commands = [command for command in SNAPSHOT_COMMANDS if command not in fresh]
+        if self.terminal_mode == BATCH:
+            commands = [command for command in commands if command not in (BATCH, INTERACTIVE)]
+        else:
+            # Unknown until the exchange completes
+            self.terminal_mode = None
+        return commands, fresh
+
+    def _snapshot_done(self, commands: list[str]) -> None:
+        """Track the terminal mode a successful snapshot exchange left the switch in."""
+        if INTERACTIVE in commands:
+            self.terminal_mode = INTERACTIVE
+
+    def _config_saved(self, outputs: dict, fresh: dict) -> bool:
+        """Compare startup and running config from new outputs and still valid digests."""
+        if self.digests is None:
+            return _configs_match(outputs[STARTUP_CONFIG], outputs[RUNNING_CONFIG])
+
+        for command in CONFIG_COMMANDS:
+            if command in outputs:
+                fresh[command] = config_digest(outputs[command])
+                self.digests.put(command, fresh[command])
+        return fresh[STARTUP_CONFIG] == fresh[RUNNING_CONFIG]
+
+    def _plan_desired_state(self, state: DesiredState, outputs: dict) -> tuple[ChangeReport, list]:
+        """Validate a desired state and plan its commands against the outputs of _desired_state_commands."""
+        if isinstance(state.alarm, str) and state.alarm != LINKED_PORTS:
+            raise ValidationError(f"Unknown alarm setting: {state.alarm}")
+        if isinstance(state.alarm, list) and len(state.alarm) > 48:
+            raise ValidationError("Too many ports specified (max 48)")
+
+        desired = DesiredState(
+            hostname=None if state.hostname is None else InputValidator.validate_hostname(state.hostname),
+            location=None if state.location is None else InputValidator.validate_location(state.location),
+            mgmt_ip=None if state.mgmt_ip is None else InputValidator.validate_ip_with_cidr(state.mgmt_ip)[1],
+            alarm=state.alarm,
+        )
+        link_ports = None
+        if "show port" in outputs:
+            link_ports = [bool(port["link"]) for port in _parse_ports(outputs["show port"])]
+
+        changes, steps = plan_changes(parse_config(outputs[RUNNING_CONFIG]), desired, link_ports)
+        report = ChangeReport(
+            changes=changes,
+            commands=[step if isinstance(step, str) else step[0] for step in steps],
+            mac=_parse_sysinfo(outputs["show system-information"]).get("system_mac", ""),
+        )
+        return report, steps
+
+
+@instrument_methods
+class Westermo(SessionState):
     """Class for interacting with the westermo switch."""
 
-    def __init__(self, **kwargs) -> None:
-        """Initialize the Class."""
+    def __init__(
+        self,
+        read_cache: bool = False,
+        cache_ttls: dict | None = None,
+        pool: Any = None,
+        config_digest: bool = False,
+        metrics: Any = None,
+        record: str | None = None,
+        replay: str | None = None,
+        replay_speed: float | None = None,
+        **kwargs,
+    ) -> None:
+        """Initialize the Class.
+
+        Args:
+            read_cache (bool): Cache the output of show commands
+            cache_ttls (dict): Seconds to cache each show command, defaults to Config.CACHE_TTLS
+            pool (ConnectionPool): Keep the session open in this pool between contexts
+            config_digest (bool): Compare configs by digest, downloading them again only
+                after a write or when Config.CONFIG_DIGEST_TTL expired
+            metrics (Metrics): Record method and command latency, bytes and retries here
+            record (str): Write the channel traffic of each session to this transcript
+            replay (str): Serve this transcript instead of connecting to a switch
+            replay_speed (float): Replay pace, 1.0 is the recorded pace, None as fast as possible
+            **kwargs: Scrapli connection parameters, transport `serial` with the serial device
+                as host talks to the console without the telnet to serial bridge
+        """
         from config import Config
 
+        self.pool = pool
+        self.metrics = metrics
+        self.record = record
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.cache = CommandCache(cache_ttls if cache_ttls is not None else Config.CACHE_TTLS) if read_cache else None
+        self.digests = CommandCache(dict.fromkeys(CONFIG_COMMANDS, Config.CONFIG_DIGEST_TTL)) if config_digest else None
+
         device_config = Config.get_device_config()
         device_config.update(kwargs)
+        bridged = uses_bridge(kwargs)
+        if bridged and Config.SERIAL_DIRECT:
+            # Read and write the serial port directly instead of through the bridge
+            device_config.update(transport="serial", host=Config.SERIAL_PORT)
+            bridged = False
 
         safe_params = {k: v for k, v in kwargs.items() if k not in ["auth_password", "password"]}
         logger.info("Initializing Westermo connection: %s", safe_params)
@@ -178,22 +627,54 @@ class Westermo:
         self.DEVICE = device_config
 
         # Only start telnet2serial bridge if we're using telnet transport
-        if kwargs.get("transport") == "telnet" and kwargs.get("port") == 2323:
-            logger.info("Starting telnet-to-serial bridge...")
-            self.telnet2serlib()
-            sleep(0.2)
+        # and no pooled session is still using the running one
+        if self.replay is not None:
+            logger.info("Replaying %s - skipping telnet-to-serial bridge", self.replay)
+        elif self.pool is not None and self.pool.has_idle(self.DEVICE):
+            logger.info("Pooled session available - skipping telnet-to-serial bridge")
+        elif bridged:
+            self.start_bridge()
         else:
             logger.info("Direct connection mode - skipping telnet-to-serial bridge")
 
+    def _connect(self) -> Any:
+        """Open a new Scrapli session and prepare the terminal."""
+        self.conn = Scrapli(**self.DEVICE)
+        logger.debug("Scrapli initialized")
+        if self.DEVICE["transport"] in SERIAL_TRANSPORTS:
+            add_console_login(self.conn)
+        if self.replay is not None:
+            attach_replay(self.conn, self.replay, self.replay_speed)
+        elif self.record is not None:
+            attach_recorder(self.conn, self.record)
+        self.conn.open()
+        logger.info("Scrapli connection opened")
+        if "on_open" in self.DEVICE:
+            # A custom on_open may leave the terminal in any mode
+            self.terminal_mode = None
+            self.set_interactive()
+        else:
+            # The platform on_open already selected interactive mode
+            self.terminal_mode = INTERACTIVE
+        return self.conn
+
     def __enter__(self):
         """Run commands on class enter."""
         logger.info("Establishing connection to Westermo device")
         try:
-            self.conn = Scrapli(**self.DEVICE)
-            logger.debug("Scrapli initialized")
-            self.conn.open()
-            logger.info("Scrapli connection opened")
-            self.set_interactive()
+            if self.pool is not None:
+                had_idle = self.pool.has_idle(self.DEVICE)
+                self.conn, reused = self.pool.acquire(self.DEVICE, self._connect)
+                if reused:
+                    # batch_mode leaves sessions interactive before they are released
+                    self.terminal_mode = INTERACTIVE
+                    logger.info("Reusing pooled connection")
+                elif had_idle and self.metrics is not None:
+                    self.metrics.inc("westermo_retries_total", operation="connect")
+            else:
+                self._connect()
+            if self.metrics is not None:
+                self.conn = MeteredConnection(self.conn, self.metrics)
             return self
         except Exception as e:
             logger.error("Failed to connect: %s", str(e))
@@ -201,7 +682,12 @@ class Westermo:
 
     def __exit__(self, *args) -> None:
         """Run commands on class exit."""
-        _ = args
+        if self.pool is not None and getattr(self, "conn", None) is not None:
+            # Sessions that saw a communication error are not reused
+            conn = self.conn.conn if isinstance(self.conn, MeteredConnection) else self.conn
+            self.pool.release(self.DEVICE, conn, broken=len(args) > 1 and isinstance(args[1], NetworkError))
+            self.conn = None
+            return
         if hasattr(self, "conn") and self.conn:
             try:
                 self.conn.close()
@@ -214,11 +700,47 @@ class Westermo:
         if not hasattr(self, "conn") or self.conn is None:
             raise NetworkError("Not connected to device. Use 'with Westermo(...):' context manager.")
 
-    @threaded
-    def telnet2serlib(self):
-        """Start the telnet to serial shim."""
+    def _send_show(self, command: str) -> Any:
+        """Send a read-only command, answering from the read cache when enabled."""
+        if self.cache is None:
+            return self.conn.send_command(command)
+
+        response = self.cache.get(command)
+        if response is None:
+            response = self.conn.send_command(command)
+            if not response.failed:
+                self.cache.put(command, response)
+        return response
+
+    def start_bridge(self) -> bool:
+        """Start the telnet to serial shim unless it already runs, and wait until it listens.
+
+        The shim serves one session after the other, so every Westermo in
+        this process shares it.
+
+        Returns:
+            bool: True if the shim accepts connections
+        """
+        global _bridge_ready
+        from config import Config
+
+        with _bridge_lock:
+            ready = _bridge_ready
+            if ready is None:
+                logger.info("Starting telnet-to-serial bridge...")
+                ready = _bridge_ready = Event()
+                self.telnet2serlib(ready)
+        if not ready.wait(Config.BRIDGE_START_TIMEOUT):
+            logger.warning("Telnet bridge not listening after %s s", Config.BRIDGE_START_TIMEOUT)
+            return False
+        return _bridge_ready is ready
 
+    @threaded
+    def telnet2serlib(self, ready: Event | None = None):
+        """Start the telnet to serial shim, ready is set once it listens or failed to start."""
+        global _bridge_ready
         from config import Config
+
         try:
             connections = Handler(
                 tel_port=Config.TELNET_PORT,
@@ -227,11 +749,20 @@ class Westermo:
                 timeout=Config.SERIAL_TIMEOUT,
                 xonxoff=Config.SERIAL_XONXOFF
             )
+            if ready is not None:
+                ready.set()
             while True:
                 connections.run()
-        except Exception as e:
+        except (Exception, SystemExit) as e:
+            # Handler exits when the serial device is missing
             logger.error("Telnet bridge error: %s", str(e))
             logger.warning("Continuing without telnet bridge...")
+        finally:
+            with _bridge_lock:
+                if _bridge_ready is ready:
+                    _bridge_ready = None
+            if ready is not None:
+                ready.set()
 
     def get_uptime(self) -> str:
         """Get the uptime of the switch.
@@ -251,12 +782,7 @@ class Westermo:
                 logger.error("Failed to get uptime: %s", uptime.result)
                 raise NetworkError("Unable to retrieve uptime")
 
-            uptime_result = uptime.result.strip()
-            if " " in uptime_result:
-                uptime_value = uptime_result.split(" ")[0]  # Get first part before space
-            else:
-                uptime_value = uptime_result[:8]  # Fallback to first 8 chars
-
+            uptime_value = _process_uptime(uptime.result)
             logger.debug("uptime: %s", uptime_value)
             return uptime_value
 
@@ -279,17 +805,12 @@ class Westermo:
         self._validate_connection()
 
         try:
-            sysinfo = self.conn.send_command("show system-information")
+            sysinfo = self._send_show("show system-information")
 
             if sysinfo.failed:
                 raise NetworkError(f"Command failed: {sysinfo.result}")
 
-            return_values: Any = list(sysinfo.ttp_parse_output(template="ttp_templates/system-information.txt"))
-
-            if not return_values or not return_values[0]:
-                raise ParseError("Failed to parse system information output")
-
-            system_info = return_values[0]
+            system_info = _parse_sysinfo(sysinfo.result)
             logger.debug("get_sysinfo function: %s", system_info)
             return system_info
 
@@ -311,18 +832,14 @@ class Westermo:
         self._validate_connection()
 
         try:
-            ip_mgmt_info = self.conn.send_command("show ifaces")
+            ip_mgmt_info = self._send_show("show ifaces")
 
             if ip_mgmt_info.failed:
                 raise NetworkError(f"Command failed: {ip_mgmt_info.result}")
 
-            return_values: Any = list(ip_mgmt_info.ttp_parse_output(template="ttp_templates/show_ifaces.txt"))
-
-            if not return_values or not return_values[0]:
-                raise ParseError("Failed to parse interface information")
-
-            logger.debug("get_mgmt_ip function: %s", return_values[0])
-            return return_values[0]
+            ifaces = _parse_ifaces(ip_mgmt_info.result)
+            logger.debug("get_mgmt_ip function: %s", ifaces)
+            return ifaces
 
         except (NetworkError, ParseError):
             raise
@@ -343,35 +860,12 @@ class Westermo:
         self._validate_connection()
 
         try:
-            status_ports = self.conn.send_command("show port")
+            status_ports = self._send_show("show port")
 
             if status_ports.failed:
                 raise NetworkError(f"Command failed: {status_ports.result}")
 
-            first_parse: Any = list(status_ports.ttp_parse_output(template="ttp_templates/ports.txt"))
-
-            if not first_parse or len(first_parse[0]) < 3:
-                raise ParseError("Failed to parse port information or no ports found")
-
-            return_values = first_parse[0][2:]
-
-            for keys in return_values:
-                try:
-                    keys["port"] = int(keys["port"][4:])  # Remove "Eth " prefix
-                    keys["vid"] = int(keys["vid"])
-                    keys["link"] = keys["link"] == "UP"
-
-                    alarm_status = keys.get("alarm", "N/A")
-                    if alarm_status == "ALARM":
-                        keys["alarm"] = True
-                    elif alarm_status == "None":
-                        keys["alarm"] = False
-                    else:
-                        keys["alarm"] = False
-
-                except (ValueError, KeyError) as e:
-                    logger.warning("Error processing port data: %s", str(e))
-
+            return_values = _parse_ports(status_ports.result)
             logger.debug("get_ports function: %s", return_values)
             return return_values
 
@@ -393,12 +887,12 @@ class Westermo:
         self._validate_connection()
 
         try:
-            status_ports = self.conn.send_command("show frnt")
+            status_ports = self._send_show("show frnt")
 
             if status_ports.failed:
                 raise NetworkError(f"Command failed: {status_ports.result}")
 
-            return_values: Any = list(status_ports.ttp_parse_output(template="ttp_templates/show_frnt.txt"))[0]
+            return_values: Any = parse_output(TEMPLATE_FRNT, status_ports.result)[0]
             logger.debug("get_frnt function: %s", status_ports.result)
             return return_values
 
@@ -408,6 +902,66 @@ class Westermo:
             logger.error("Error getting FRNT status: %s", str(e))
             raise NetworkError(f"FRNT status retrieval failed: {str(e)}")
 
+    def _send_batch(self, commands: Sequence[str]) -> list[str]:
+        """Send several commands in one channel write and split the output.
+
+        The switch echoes every command after its prompt, so the combined
+        output is cut at each prompt and the echoed line is dropped.
+
+        Args:
+            commands (Sequence[str]): Commands to send, in order
+
+        Returns:
+            list[str]: Output of each command
+
+        Raises:
+            NetworkError: If not all prompts are seen before the timeout
+        """
+        channel = self.conn.channel
+        prompt = re.compile(self.conn.comms_prompt_pattern.encode(), flags=re.M | re.I)
+        deadline = monotonic() + self.conn.timeout_ops * len(commands)
+
+        buf = b""
+        prompts: list = []
+        with channel._channel_lock():
+            channel.write(channel_input=self.conn.comms_return_char.join(commands))
+            channel.send_return()
+            while len(prompts) < len(commands):
+                if monotonic() > deadline:
+                    raise NetworkError(f"Timed out after {len(prompts)} of {len(commands)} batched commands")
+                buf += channel.read()
+                search_from = prompts[-1].end() if prompts else 0
+                prompts.extend(prompt.finditer(buf, search_from))
+
+        return _split_batch_output(buf, commands, prompts)
+
+    def get_snapshot(self) -> DeviceSnapshot:
+        """Read everything the main page shows in one batched exchange.
+
+        Returns:
+            DeviceSnapshot: System info, uptime, ports, interfaces, FRNT and save state
+
+        Raises:
+            NetworkError: If unable to communicate with device
+            ParseError: If unable to parse device response
+        """
+        self._validate_connection()
+
+        try:
+            commands, fresh = self._snapshot_commands()
+            outputs = dict(zip(commands, self._send_batch(commands)))
+            self._snapshot_done(commands)
+            snapshot = _build_snapshot(outputs, self._config_saved(outputs, fresh))
+            logger.debug("get_snapshot function: %s", snapshot)
+            return snapshot
+
+        except (NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error getting device snapshot: %s", str(e))
+            raise NetworkError(f"Snapshot retrieval failed: {str(e)}")
+
+    @invalidates("show frnt", "show running-config")
     def set_frtn(self, ports: tuple = (1, 2)) -> None:
         """Toggle the FRNT Ring.
 
@@ -447,6 +1001,7 @@ class Westermo:
             logger.error("Error configuring FRNT: %s", str(e))
             raise NetworkError(f"FRNT configuration failed: {str(e)}")
 
+    @invalidates("show frnt", "show running-config")
     def set_focal(self, member: bool = True) -> None:
         """Set member on the FRNT Ring.
 
@@ -476,6 +1031,7 @@ class Westermo:
             logger.error("Error setting focal mode: %s", str(e))
             raise NetworkError(f"Focal configuration failed: {str(e)}")
 
+    @invalidates("show port", "show alarm", "show running-config")
     def set_alarm(self, alarm: list[bool]) -> None:
         """Configure alarm when link down for interfaces in list.
 
@@ -511,7 +1067,7 @@ class Westermo:
             if port_list:
                 alarm_commands = [
                     f"alarm trigger 1 link-alarm condition low port {port_list}",
-                    "alarm action 1 target led,log,digout",
+                    f"alarm action 1 target {','.join(ALARM_TARGETS)}",
                 ]
 
                 for cmd in alarm_commands:
@@ -527,6 +1083,7 @@ class Westermo:
             logger.error("Error configuring alarms: %s", str(e))
             raise NetworkError(f"Alarm configuration failed: {str(e)}")
 
+    @invalidates("show ifaces", "show running-config")
     def set_mgmt_ip(self, ip_add: str) -> bool:
         """Change the management ip-address of the switch to (ip).
 
@@ -544,8 +1101,8 @@ class Westermo:
         try:
             validated_ip, ip_with_cidr = InputValidator.validate_ip_with_cidr(ip_add)
 
-            logger.debug("set_mgmt_ip function: setting vlan1 to static 192.168.2.200/24")
-            result = self.conn.send_config("iface vlan1 inet static address 192.168.2.200/24")
+            logger.debug("set_mgmt_ip function: setting vlan1 to static %s", MGMT_PRIMARY)
+            result = self.conn.send_config(f"iface vlan1 inet static address {MGMT_PRIMARY}")
             if result.failed:
                 logger.error("Failed to set primary IP: %s", result.result)
                 return False
@@ -555,11 +1112,7 @@ class Westermo:
             logger.debug("set_mgmt_ip function: removing all secondary ip")
             interactive_result = self.conn.send_interactive(
                 [
-                    (
-                        "iface vlan1 inet static no address secondary",
-                        "Remove all secondary IP addresses, are you sure (y/N)? ",
-                        False,
-                    ),
+                    ("iface vlan1 inet static no address secondary", REMOVE_SECONDARY, False),
                     ("y", "", False),
                 ],
                 privilege_level="configuration",
@@ -586,6 +1139,7 @@ class Westermo:
             logger.error("Error setting management IP: %s", str(e))
             return False
 
+    @invalidates("show system-information", "show running-config")
     def set_hostname(self, hostname: str) -> None:
         """Change the hostname of the switch.
 
@@ -619,29 +1173,51 @@ class Westermo:
     def set_interactive(self, interactive: bool = True) -> None:
         """Set the interactive mode on the switch.
 
-        This enables paging, but also lets you structure commands fully
+        This enables paging, but also lets you structure commands fully.
+        Nothing is sent if the session is already in the requested mode.
 
         Args:
             interactive (bool): True for interactive mode, False for batch mode
         """
         self._validate_connection()
 
+        mode = INTERACTIVE if interactive else BATCH
+        if self.terminal_mode == mode:
+            return
+
         try:
-            if interactive:
-                result = self.conn.send_command("interactive")
-                if result.failed:
-                    logger.warning("Failed to set interactive mode: %s", result.result)
-                else:
-                    logger.debug("Interactive mode set")
+            result = self.conn.send_command(mode)
+            if result.failed:
+                self.terminal_mode = None
+                logger.warning("Failed to set %s mode: %s", mode, result.result)
             else:
-                result = self.conn.send_command("batch")
-                if result.failed:
-                    logger.warning("Failed to set batch mode: %s", result.result)
-                else:
-                    logger.debug("Batch mode set")
+                self.terminal_mode = mode
+                logger.debug("%s mode set", mode.capitalize())
         except Exception as e:
+            self.terminal_mode = None
             logger.warning("Error setting interactive mode: %s", str(e))
 
+    @contextmanager
+    def batch_mode(self) -> Iterator["Westermo"]:
+        """Group batch mode reads so the terminal is switched once for all of them.
+
+        save_config, compare_config, diff_config and the event log switch to
+        batch mode themselves. Inside this context they stay in batch mode,
+        and interactive mode is restored once when the outermost context ends.
+
+            with switch.batch_mode():
+                saved = switch.compare_config()
+                config = switch.save_config()
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self.terminal_mode != INTERACTIVE:
+                self.set_interactive(True)
+
+    @invalidates("show system-information", "show running-config")
     def set_location(self, location: str) -> None:
         """Change the location parameter of the switch.
 
@@ -661,10 +1237,7 @@ class Westermo:
                     raise ConfigurationError(f"Failed to remove location: {result.result}")
                 logger.debug("set_location function: removing location")
             else:
-                if len(location) > 255:
-                    raise ValidationError("Location too long (max 255 characters)")
-
-                location = re.sub("[^a-zA-Z0-9 \n\\.]", "", location)
+                location = InputValidator.validate_location(location)
                 result = self.conn.send_config(f"system location '{location}'")
                 if result.failed:
                     raise ConfigurationError(f"Failed to set location: {result.result}")
@@ -676,6 +1249,7 @@ class Westermo:
             logger.error("Error setting location: %s", str(e))
             raise NetworkError(f"Location configuration failed: {str(e)}")
 
+    @invalidates(ALL_COMMANDS)
     def factory_conf(self) -> None:
         """Reset device to factory defaults.
 
@@ -700,6 +1274,79 @@ class Westermo:
             logger.error("Error during factory reset: %s", str(e))
             raise NetworkError(f"Factory reset failed: {str(e)}")
 
+    def _send_config_steps(self, steps: list) -> None:
+        """Send planned configuration steps, runs of plain commands in one send_configs call.
+
+        Raises:
+            ConfigurationError: If the switch rejects a command
+        """
+        batch: list[str] = []
+        for step in [*steps, None]:
+            if isinstance(step, str):
+                batch.append(step)
+                continue
+            if batch:
+                responses = self.conn.send_configs(batch, stop_on_failed=True)
+                if responses.failed:
+                    failed = next(response for response in responses if response.failed)
+                    raise ConfigurationError(f"Failed to apply '{failed.channel_input}': {failed.result}")
+                batch = []
+            if step is not None:
+                command, question = step
+                result = self.conn.send_interactive(
+                    [(command, question, False), ("y", "", False)], privilege_level="configuration"
+                )
+                if result.failed:
+                    raise ConfigurationError(f"Failed to apply '{command}': {result.result}")
+
+    def apply_desired_state(self, state: DesiredState, save: bool = True) -> ChangeReport:
+        """Bring the switch to a desired state, sending only the settings that differ.
+
+        The running config and system information (and the port table for
+        LINKED_PORTS) are read in one batched exchange in batch mode, so the
+        pager doesn't stop a long config, then the planned
+        commands are sent in one configuration session. A switch that
+        already has every setting gets no writes.
+
+        Args:
+            state (DesiredState): Wanted settings, None fields are left alone
+            save (bool): Save the running config to startup if anything changed
+
+        Returns:
+            ChangeReport: Changed settings, commands sent and the switch MAC
+
+        Raises:
+            ValidationError: If a desired value is invalid
+            ConfigurationError: If the switch rejects a command or the save fails
+            NetworkError: If unable to communicate with device
+        """
+        self._validate_connection()
+
+        try:
+            commands = _desired_state_commands(state)
+            with self.batch_mode():
+                self.set_interactive(False)
+                outputs = dict(zip(commands, self._send_batch(commands)))
+            report, steps = self._plan_desired_state(state, outputs)
+            if steps:
+                try:
+                    self._send_config_steps(steps)
+                finally:
+                    self._invalidate(ALL_COMMANDS)
+                if save:
+                    if not self.save_run2startup():
+                        raise ConfigurationError("Failed to save running config")
+                    report.saved = True
+            logger.info("apply_desired_state function: %d changes", len(report.changes))
+            return report
+
+        except (ValidationError, ConfigurationError, NetworkError, ParseError):
+            raise
+        except Exception as e:
+            logger.error("Error applying desired state: %s", str(e))
+            raise NetworkError(f"Desired state apply failed: {str(e)}")
+
+    @invalidates("show startup-config")
     def save_run2startup(self) -> bool:
         """Save the configuration from running to startup.
 
@@ -723,37 +1370,140 @@ class Westermo:
             logger.error("Error saving configuration: %s", str(e))
             return False
 
+    def _stream_lines(self, command: str) -> Iterator[str]:
+        """Send a command and yield its output lines as they arrive.
 
-def save_config(self) -> str:
-    """Get the startup config and returns it as a decoded string.
+        The command owns the channel until the generator is exhausted or
+        closed, nothing else may be sent meanwhile. The channel lock only
+        guards this when the driver was created with channel_lock. Closing
+        the generator before the prompt returned aborts the command with Ctrl-C.
 
-    Returns:
-        str: config string
+        Args:
+            command (str): Command to send
 
-    Raises:
-        NetworkError: If unable to retrieve configuration
-    """
-    self._validate_connection()
+        Yields:
+            str: Output lines without the echoed command
 
-    try:
-        self.set_interactive(False)
-        result = self.conn.send_command("show startup-config")
+        Raises:
+            NetworkError: If no output arrives within timeout_ops seconds
+        """
+        channel = self.conn.channel
+        prompt = re.compile(self.conn.comms_prompt_pattern.encode(), flags=re.M | re.I)
+        timeout = self.conn.timeout_ops
+
+        with channel._channel_lock():
+            channel.write(channel_input=command)
+            channel.send_return()
+            buf = b""
+            echoed = False
+            done = False
+            deadline = monotonic() + timeout
+            try:
+                while not prompt.search(buf):
+                    chunk = channel.read()
+                    if chunk:
+                        deadline = monotonic() + timeout
+                    elif monotonic() > deadline:
+                        raise NetworkError(f"Timed out waiting for output of {command}")
+                    *lines, buf = (buf + chunk).split(b"\n")
+                    for raw in lines:
+                        line = raw.decode(errors="replace").rstrip()
+                        if not echoed:
+                            echoed = True
+                            if line.strip() == command:
+                                continue
+                        yield line
+                done = True
+            finally:
+                if not done:
+                    self._abort_command(prompt)
+
+    def _abort_command(self, prompt: re.Pattern) -> None:
+        """Interrupt the running command with Ctrl-C and wait for the prompt."""
+        channel = self.conn.channel
+        deadline = monotonic() + self.conn.timeout_ops
+        buf = b""
+        try:
+            channel.write(channel_input="\x03")
+            while not prompt.search(buf) and monotonic() < deadline:
+                buf = (buf + channel.read())[-256:]
+        except Exception as e:
+            logger.warning("Error aborting command: %s", str(e))
 
-        if result.failed:
-            raise NetworkError(f"Failed to retrieve startup config: {result.result}")
+    def stream_event_log(
+        self, since: datetime | None = None, until: datetime | None = None, severity: str | None = None
+    ) -> Iterator[LogRecord]:
+        """Return the event log as records parsed while they arrive.
 
-        config = result.result
-        self.set_interactive(True)
-        logger.debug("Successfully retrieved startup configuration")
-        return config
+        Unlike get_event_log the first records are available right away and
+        memory use does not grow with the log. Closing the returned generator
+        stops the transfer, close it before sending other commands.
 
-    except NetworkError:
-        self.set_interactive(True)
-        raise
-    except Exception as e:
-        logger.error("Error retrieving config: %s", str(e))
-        self.set_interactive(True)
-        raise NetworkError(f"Configuration retrieval failed: {str(e)}")
+        Args:
+            since (datetime): Skip records older than this
+            until (datetime): Skip records newer than this
+            severity (str): Skip records less severe than this syslog severity, e.g. "warning"
+
+        Returns:
+            Iterator[LogRecord]: Records in log order
+
+        Raises:
+            ValidationError: If severity is not a syslog severity
+        """
+        self._validate_connection()
+
+        try:
+            log_filter = LogFilter(since, until, severity)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return self._stream_event_log(log_filter)
+
+    def _stream_event_log(self, log_filter: LogFilter) -> Iterator[LogRecord]:
+        """Yield filtered event log records, with the switch in batch mode meanwhile."""
+        with self.batch_mode():
+            self.set_interactive(False)
+            lines = self._stream_lines("alarm log")
+            try:
+                yield from filter_records(lines, log_filter)
+            finally:
+                lines.close()
+
+    def save_config(self) -> str:
+        """Get the startup config and returns it as a decoded string.
+
+        Returns:
+            str: config string
+
+        Raises:
+            NetworkError: If unable to retrieve configuration
+        """
+        self._validate_connection()
+
+        try:
+            config = self._get_configs([STARTUP_CONFIG])[STARTUP_CONFIG]
+            logger.debug("Successfully retrieved startup configuration")
+            return config
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error retrieving config: %s", str(e))
+            raise NetworkError(f"Configuration retrieval failed: {str(e)}")
+
+    def _get_configs(self, commands: Sequence[str]) -> dict:
+        """Send config show commands in batch mode and return their output by command."""
+        outputs = {}
+        if not commands:
+            return outputs
+
+        with self.batch_mode():
+            self.set_interactive(False)
+            for command in commands:
+                result = self.conn.send_command(command)
+                if result.failed:
+                    raise NetworkError(f"Failed to get {command[5:]}: {result.result}")
+                outputs[command] = result.result
+        return outputs
 
     def compare_config(self) -> bool:
         """Compare the running and startup config and returns status.
@@ -767,33 +1517,41 @@ def save_config(self) -> str:
         self._validate_connection()
 
         try:
-            self.set_interactive(False)
+            fresh = self._fresh_digests()
+            outputs = self._get_configs([command for command in CONFIG_COMMANDS if command not in fresh])
+            configs_match = self._config_saved(outputs, fresh)
+            logger.debug("compare_config function: %s", configs_match)
+            return configs_match
 
-            startup_result = self.conn.send_command("show startup-config")
-            if startup_result.failed:
-                raise NetworkError(f"Failed to get startup config: {startup_result.result}")
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error comparing configurations: %s", str(e))
+            raise NetworkError(f"Configuration comparison failed: {str(e)}")
 
-            running_result = self.conn.send_command("show running-config")
-            if running_result.failed:
-                raise NetworkError(f"Failed to get running config: {running_result.result}")
+    def diff_config(self) -> list[ConfigChange]:
+        """Return the changes in the running config that are not saved to startup.
 
-            # Process startup config (remove footer)
-            raw_startup = startup_result.result
-            parsed_startup = "".join(raw_startup.splitlines(keepends=True)[:-4]).rstrip()
-            raw_running = running_result.result
+        Returns:
+            list[ConfigChange]: Changes by section, empty if the config is saved
 
-            self.set_interactive(True)
+        Raises:
+            NetworkError: If unable to retrieve configurations
+        """
+        self._validate_connection()
 
-            configs_match = parsed_startup == raw_running
-            logger.debug("compare_config function: %s", configs_match)
-            return configs_match
+        try:
+            outputs = self._get_configs(CONFIG_COMMANDS)
+            if self.digests is not None:
+                self._config_saved(outputs, {})
+            changes = diff_configs(outputs[STARTUP_CONFIG], outputs[RUNNING_CONFIG])
+            logger.debug("diff_config function: %s", changes)
+            return changes
 
         except NetworkError:
-            self.set_interactive(True)
             raise
         except Exception as e:
             logger.error("Error comparing configurations: %s", str(e))
-            self.set_interactive(True)
             raise NetworkError(f"Configuration comparison failed: {str(e)}")
 
     def get_alarm_log(self) -> list | dict:
@@ -809,12 +1567,12 @@ def save_config(self) -> str:
 
         try:
             logger.debug("get_alarm_log function: ")
-            returnobj = self.conn.send_command("show alarm")
+            returnobj = self._send_show("show alarm")
 
             if returnobj.failed:
                 raise NetworkError(f"Command failed: {returnobj.result}")
 
-            return_values: Any = list(returnobj.ttp_parse_output(template="ttp_templates/alarm_log.txt"))[0]
+            return_values: Any = parse_output(TEMPLATE_ALARM, returnobj.result)[0]
             logger.debug(return_values)
             return return_values
 
@@ -824,6 +1582,34 @@ def save_config(self) -> str:
             logger.error("Error getting alarm log: %s", str(e))
             raise NetworkError(f"Alarm log retrieval failed: {str(e)}")
 
+    def poll_alarms(self, alarm_monitor: AlarmMonitor | None = None) -> Iterator[dict]:
+        """Return the alarm entries that are new or changed since the previous poll.
+
+        Args:
+            alarm_monitor (AlarmMonitor): Monitor holding the watermark, defaults to the shared one
+
+        Returns:
+            Iterator[dict]: New entries with id, trigger, enabled, active, reason and seen
+
+        Raises:
+            NetworkError: If unable to retrieve alarm log
+        """
+        self._validate_connection()
+
+        try:
+            returnobj = self.conn.send_command("show alarm")
+
+            if returnobj.failed:
+                raise NetworkError(f"Command failed: {returnobj.result}")
+
+            return (alarm_monitor or monitor).feed(self.DEVICE, returnobj.result)
+
+        except NetworkError:
+            raise
+        except Exception as e:
+            logger.error("Error polling alarm log: %s", str(e))
+            raise NetworkError(f"Alarm log retrieval failed: {str(e)}")
+
     def get_event_log(self) -> str:
         """Return the event list as a list | dict.
 
@@ -834,14 +1620,13 @@ def save_config(self) -> str:
 
         try:
             logger.debug("get_event_log function: ")
-            self.set_interactive(False)
-            return_values = self.conn.send_command("alarm log").result
-            self.set_interactive(True)
+            with self.batch_mode():
+                self.set_interactive(False)
+                return_values = self.conn.send_command("alarm log").result
             logger.debug(return_values)
             return return_values
         except Exception as e:
             logger.error("Error getting event log: %s", str(e))
-            self.set_interactive(True)
             return ""
 
 
@@ -857,7 +1642,6 @@ if __name__ == "__main__":
 
     try:
         with Westermo(**SWITCH) as switch:
-            switch.set_interactive()
             switch.get_sysinfo()
             switch.get_uptime()
             input()